@@ -22,14 +22,18 @@ log = getLogger(__name__)
 plugin = Plugin.find(__name__)
 
 
+@resource(limit=3, validate=lambda con: con.isAlive())
+def connection():
+    """
+    Open a (pooled) connection to libvirt.
+    :return: A libvirt connection.
+    :rtype: libvirt.virConnect
+    """
+    return libvirt.open(plugin.cfg.virt.uri)
+
+
 class Virt:
-    
-    @classmethod
-    def open(cls):
-        cfg = plugin.cfg()
-        con = libvirt.open(cfg.virt.uri)
-        return con
-        
+
     @remote
     def getDomainID(self, name):
         """
@@ -39,12 +43,9 @@ class Virt:
         :return: A domain ID.
         :rtype: int
         """
-        con = self.open()
-        try:
+        with connection() as con:
             domain = con.lookupByName(name)
             return domain.ID()
-        finally:
-            con.close()
     
     @remote
     def listDomains(self):
@@ -53,8 +54,7 @@ class Virt:
         :return: List of dict: {id, name, active}
         :rtype: list
         """
-        con = self.open()
-        try:
+        with connection() as con:
             domains = []
             for id in con.listDomainsID():
                 domain = con.lookupByID(id)
@@ -63,8 +63,6 @@ class Virt:
                          active=domain.isActive())
                 domains.append(d)
             return domains
-        finally:
-            con.close()
             
     @remote
     def isAlive(self, id):
@@ -75,12 +73,9 @@ class Virt:
         :return: True if alive.
         :rtype: bool
         """
-        con = self.open()
-        try:
+        with connection() as con:
             domain = con.lookupByID(id)
             return domain.isAlive()
-        finally:
-            con.close()
             
     @remote
     @pam(user='root')
@@ -90,12 +85,9 @@ class Virt:
         :param id: A domain ID.
         :type id: int
         """
-        con = self.open()
-        try:
+        with connection() as con:
             domain = con.lookupByID(id)
             domain.create()
-        finally:
-            con.close()
         
     @remote
     @pam(user='root')
@@ -105,9 +97,6 @@ class Virt:
         :param id: A domain ID.
         :type id: int
         """
-        con = self.open()
-        try:
+        with connection() as con:
             domain = con.lookupByID(id)
             domain.shutdown()
-        finally:
-            con.close()
\ No newline at end of file
@@ -34,6 +34,8 @@ class Action:
     :type interval: dt
     :ivar last: The last run timestamp.
     :type last: datetime
+    :ivar running: The action is scheduled or running.
+    :type running: bool
     """
 
     def __init__(self, target, **interval):
@@ -54,6 +56,7 @@ class Action:
             interval[k] = int(v)
         self.interval = timedelta(**interval)
         self.last = dt(1900, 1, 1)
+        self.running = False
 
     def name(self):
         """
@@ -69,20 +72,28 @@ class Action:
         method = t.__name__
         return '%s.%s()' % (cls, method)
 
+    @property
+    def seconds(self):
+        """
+        The run interval in seconds.
+        :rtype: float
+        """
+        interval = self.interval
+        return interval.days * 86400 + interval.seconds + interval.microseconds / 1e6
+
     @released
     def __call__(self):
         """
         Invoke the action.
         """
         try:
-            _next = self.last + self.interval
-            now = dt.utcnow()
-            if _next < now:
-                self.last = now
-                log.debug('perform "%s"', self.name())
-                self.target()
+            self.last = dt.utcnow()
+            log.debug('perform "%s"', self.name())
+            self.target()
         except Exception, e:
             log.exception(e)
+        finally:
+            self.running = False
 
     def __unicode__(self):
         return self.name()
@@ -13,11 +13,15 @@
 # Jeff Ortel <jortel@redhat.com>
 #
 
+from threading import RLock
+
 from gofer.agent.decorator import Actions
 from gofer.agent.reporting import loaded
 from gofer.decorators import options
 from gofer.rmi.tracker import Tracker
 from gofer.rmi.criteria import Builder
+from gofer.common import synchronized
+from gofer.pam import Cache
 from gofer.rmi.dispatcher import Dispatcher
 from gofer.threadpool import ThreadPool
 
@@ -100,6 +104,15 @@ class Admin:
         """
         return loaded(self.container, Actions())
 
+    @remote
+    def flush(self):
+        """
+        Flush the PAM authentication cache.
+        :return: The number of cached results flushed.
+        :rtype: int
+        """
+        return Cache().flush()
+
     @property
     def __name__(self):
         return self.__class__.__name__
@@ -111,18 +124,27 @@ class Admin:
 class Builtin(object):
     """
     The builtin pseudo-plugin.
+    The thread pool is shared by all builtin pseudo-plugins.
+    :cvar THREADS: The max # of threads in the shared pool.
     """
 
+    THREADS = 3
+
+    __mutex = RLock()
+    __pool = None
+
     def __init__(self, plugin):
         """
         :param plugin: A real plugin.
         :type plugin: gofer.agent.plugin.Plugin
         """
-        self.pool = ThreadPool(3)
+        self.pool = self._pool()
         self.dispatcher = Dispatcher()
         self.dispatcher += [Admin(plugin.container)]
         self.plugin = plugin
+        self.workers = None
         self.latency = 0
+        self.progress = 0
 
     @property
     def url(self):
@@ -132,6 +154,22 @@ class Builtin(object):
     def authenticator(self):
         return self.plugin.authenticator
 
+    @property
+    def skipped(self):
+        return self.plugin.skipped
+
+    @synchronized
+    def _pool(self):
+        """
+        Get the shared thread pool.
+        Created on first use.
+        :return: The shared pool.
+        :rtype: ThreadPool
+        """
+        if Builtin.__pool is None:
+            Builtin.__pool = ThreadPool(1, limit=Builtin.THREADS)
+        return Builtin.__pool
+
     def provides(self, name):
         """
         Get whether the plugin provides the name.
@@ -142,11 +180,13 @@ class Builtin(object):
         """
         return self.dispatcher.provides(name)
 
-    def dispatch(self, request):
+    def dispatch(self, request, call):
         """
         Dispatch (invoke) the specified RMI request.
         :param request: An RMI request
         :type request: gofer.Document
+        :param call: The requested call (parsed when scheduled).
+        :type call: gofer.Document
         :return: The RMI returned.
         """
         return self.dispatcher.dispatch(request)
@@ -154,5 +194,25 @@ class Builtin(object):
     def shutdown(self):
         """
         Shutdown the plugin.
+        The shared thread pool is not shutdown.
+        See: terminate().
+        """
+        pass
+
+    @staticmethod
+    def terminate():
+        """
+        Shutdown the shared thread pool.
+        Called when the agent is shutdown.
+        :return: List of orphaned calls.
+        :rtype: list
         """
-        self.pool.shutdown()
+        Builtin.__mutex.acquire()
+        try:
+            pool = Builtin.__pool
+            Builtin.__pool = None
+        finally:
+            Builtin.__mutex.release()
+        if pool is None:
+            return []
+        return pool.shutdown()
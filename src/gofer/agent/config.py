@@ -34,6 +34,28 @@ from gofer.config import REQUIRED, OPTIONAL, ANY, BOOL, NUMBER, FLOAT
 #   service
 #      The default PAM service for authentication.  Default:passwd
 #
+# [journal]
+#   fsync
+#      The pending request journal fsync policy (always|interval|never).  Default:always
+#   fsync_interval
+#      The journal housekeeping (and fsync) interval (seconds).  Default:1.0
+#   segment_size
+#      The size (bytes) at which journal segments are sealed.  Default:1048576
+#
+# [threads]
+#   budget
+#      The max number of (plugin) threads shared by all plugins.  Threads needed
+#      for the plugin <min> threads are always granted.  0=unlimited.  Default:0
+#   builtin
+#      The max number of threads in the pool shared by builtin (admin) calls.  Default:3
+#
+# [actions]
+#   threads
+#      The max number of threads used to run (recurring) actions.  Default:2
+#   jitter
+#      The max random delay (seconds) added to each action run.  Used to
+#      spread the load of actions run by many agents.  Default:0
+#
 
 AGENT_SCHEMA = (
     ('management', REQUIRED,
@@ -51,6 +73,25 @@ AGENT_SCHEMA = (
             ('service', OPTIONAL, ANY),
         )
     ),
+    ('journal', REQUIRED,
+        (
+            ('fsync', OPTIONAL, '(always|interval|never)'),
+            ('fsync_interval', OPTIONAL, FLOAT),
+            ('segment_size', OPTIONAL, NUMBER),
+        )
+    ),
+    ('threads', REQUIRED,
+        (
+            ('budget', OPTIONAL, NUMBER),
+            ('builtin', OPTIONAL, NUMBER),
+        )
+    ),
+    ('actions', REQUIRED,
+        (
+            ('threads', OPTIONAL, NUMBER),
+            ('jitter', OPTIONAL, FLOAT),
+        )
+    ),
 )
 
 #
@@ -64,10 +105,21 @@ AGENT_SCHEMA = (
 #      The (optional) fully qualified module to be loaded from the PYTHON path.
 #   threads
 #      The (optional) number of threads for the RMI dispatcher.
+#      Format: <min>[:<max>].  Threads above <min> are added as needed and retired when idle.
+#   consumers
+#      The (optional) number of (competing) consumers reading the plugin queue.
+#   progress
+#      The (optional) minimum interval (seconds) between progress reports.  Default: 1.
 #   accept
 #      Accept forwarding from.  A comma (,) separated list of plugin names (,=none|*=all).
 #   forward
 #      Forward to.  A comma (,) separated list of plugin names (,=none|*=all).
+#   requires
+#      The (optional) plugins that must be loaded first.  A comma (,) separated list of plugin names.
+#   lazy
+#      The (optional) plugin is imported and loaded on first request (0|1).  Default: 0.
+#   idle
+#      The (optional) idle period (seconds) after which a lazy plugin is unloaded.  0=never.  Default: 0.
 #
 # [messaging]
 #
@@ -97,6 +149,16 @@ AGENT_SCHEMA = (
 #   expiration
 #      The (optional) auto-deleted queue expiration (seconds).
 #
+# [fork]
+#
+#   processes
+#      The (optional) number of pre-forked worker processes used by the fork call model.
+#      0=a process is forked for each call.  Default:0
+#   max_calls
+#      The (optional) number of calls after which a worker process is replaced.  0=unlimited.
+#   max_rss
+#      The (optional) resident set size (MB) above which a worker process is replaced.  0=unlimited.
+#
 
 PLUGIN_SCHEMA = (
     ('main', REQUIRED,
@@ -104,10 +166,15 @@ PLUGIN_SCHEMA = (
             ('enabled', REQUIRED, BOOL),
             ('name', OPTIONAL, ANY),
             ('plugin', OPTIONAL, ANY),
-            ('threads', OPTIONAL, NUMBER),
+            ('threads', OPTIONAL, '(^\d+)(:\d+)?$'),
+            ('consumers', OPTIONAL, NUMBER),
             ('latency', OPTIONAL, FLOAT),
+            ('progress', OPTIONAL, FLOAT),
             ('accept', OPTIONAL, ANY),
             ('forward', OPTIONAL, ANY),
+            ('requires', OPTIONAL, ANY),
+            ('lazy', OPTIONAL, BOOL),
+            ('idle', OPTIONAL, NUMBER),
         )
     ),
     ('messaging', REQUIRED,
@@ -129,6 +196,13 @@ PLUGIN_SCHEMA = (
             ('expiration', OPTIONAL, NUMBER)
         )
     ),
+    ('fork', OPTIONAL,
+        (
+            ('processes', OPTIONAL, NUMBER),
+            ('max_calls', OPTIONAL, NUMBER),
+            ('max_rss', OPTIONAL, NUMBER),
+        )
+    ),
 )
 
 
@@ -142,6 +216,19 @@ AGENT_DEFAULTS = {
     },
     'pam': {
         'service': 'passwd'
+    },
+    'journal': {
+        'fsync': 'always',
+        'fsync_interval': '1.0',
+        'segment_size': '1048576',
+    },
+    'threads': {
+        'budget': '0',
+        'builtin': '3',
+    },
+    'actions': {
+        'threads': '2',
+        'jitter': '0',
     }
 }
 
@@ -150,15 +237,24 @@ PLUGIN_DEFAULTS = {
     'main': {
         'enabled': '0',
         'threads': '1',
+        'consumers': '1',
         'latency': '0',
+        'progress': '1',
         'accept': ',',
-        'forward': ','
+        'forward': ',',
+        'lazy': '0',
+        'idle': '0'
     },
     'messaging': {
         'heartbeat': '10'
     },
     'model': {
         'managed': '2'
+    },
+    'fork': {
+        'processes': '0',
+        'max_calls': '0',
+        'max_rss': '0',
     }
 }
 
@@ -74,12 +74,34 @@ class Delegate(object):
     load = []
     unload = []
 
-    def __init__(self):
-        self.load = Delegate.load
-        self.unload = Delegate.unload
+    @staticmethod
+    def clear():
+        """
+        Clear the lists of decorated functions.
+        """
         Delegate.load = []
         Delegate.unload = []
 
+    @staticmethod
+    def collated():
+        """
+        Get a delegate for the functions decorated while
+        the plugin module was imported.
+        :return: The plugin delegate.
+        :rtype: Delegate
+        """
+        return Delegate(Delegate.load, Delegate.unload)
+
+    def __init__(self, load=(), unload=()):
+        """
+        :param load: Plugin load functions.
+        :type load: list
+        :param unload: Plugin unload functions.
+        :type unload: list
+        """
+        self.load = list(load)
+        self.unload = list(unload)
+
     def loaded(self):
         """
         Plugin loaded.
@@ -18,7 +18,9 @@ import os
 import logging
 
 from fcntl import ioctl
-from time import sleep
+from heapq import heappush, heappop
+from random import uniform
+from time import time, sleep
 from getopt import getopt, GetoptError
 from termios import TIOCSCTTY
 
@@ -30,10 +32,14 @@ from gofer import NAME
 from gofer import pam
 from gofer.common import Thread, released, utf8
 from gofer.config import get_bool
+from gofer.agent.builtin import Builtin
 from gofer.agent.plugin import Plugin, PluginLoader
 from gofer.agent.manager import Manager
 from gofer.agent.lock import Lock, LockFailed
 from gofer.agent.config import AgentConfig
+from gofer.rmi.store import Journal
+from gofer.rmi.model.protocol import Segment
+from gofer.threadpool import ThreadPool
 
 log = logging.getLogger(__name__)
 
@@ -41,10 +47,41 @@ log = logging.getLogger(__name__)
 class ActionThread(Thread):
     """
     Run actions independently of main thread.
+    Actions are kept in a heap ordered by when each is next due and
+    are run by a thread pool dedicated to actions.  An action still
+    running when next due is skipped.
+    :cvar THREADS: The max # of threads used to run actions.
+    :type THREADS: int
+    :cvar JITTER: The max random delay (seconds) added to each run.
+    :type JITTER: float
+    :cvar SCAN: How often (seconds) plugins are checked for added
+        (or removed) actions.
+    :type SCAN: int
+    :ivar pool: The thread pool used to run actions.
+    :type pool: ThreadPool
+    :ivar heap: Actions ordered by when due.  Items of: (at, n, Action).
+    :type heap: list
+    :ivar scheduled: The schedule of each action.  Items of: (base, n).
+        The *base* is when the action is due (without jitter) and *n*
+        identifies the valid heap item.
+    :type scheduled: dict
+    :ivar plugins: The plugin providing each action.
+    :type plugins: dict
+    :ivar n: Used to order and identify heap items.
+    :type n: int
     """
-    
+
+    THREADS = 2
+    JITTER = 0
+    SCAN = 10
+
     def __init__(self):
         Thread.__init__(self, name='Actions')
+        self.pool = ThreadPool(1, limit=self.THREADS)
+        self.heap = []
+        self.scheduled = {}
+        self.plugins = {}
+        self.n = 0
         self.setDaemon(True)
 
     @released
@@ -52,11 +89,102 @@ class ActionThread(Thread):
         """
         Run actions.
         """
+        scanned = 0
         while not Thread.aborted():
-            for plugin in Plugin.all():
-                for action in plugin.actions:
-                    plugin.pool.run(action)
-            sleep(10)
+            now = time()
+            if now - scanned >= self.SCAN:
+                self.scan(now)
+                scanned = now
+            while self.heap and self.heap[0][0] <= now:
+                at, n, action = heappop(self.heap)
+                self.fire(action, n, now)
+            delay = scanned + self.SCAN - now
+            if self.heap:
+                delay = min(delay, self.heap[0][0] - now)
+            sleep(max(0, delay))
+
+    def scan(self, now):
+        """
+        Schedule actions added by plugins (loaded) and unschedule
+        actions of plugins unloaded.  Added actions are due now.
+        :param now: The current time (epoch seconds).
+        :type now: float
+        """
+        actions = {}
+        for plugin in Plugin.all():
+            for action in plugin.actions:
+                actions[action] = plugin
+        for action in set(actions).difference(self.scheduled):
+            self.schedule(action, now)
+        for action in set(self.scheduled).difference(actions):
+            del self.scheduled[action]
+        self.plugins = actions
+
+    def schedule(self, action, base):
+        """
+        Schedule an action.
+        :param action: The action to schedule.
+        :type action: gofer.agent.action.Action
+        :param base: When due without jitter (epoch seconds).
+        :type base: float
+        """
+        self.n += 1
+        at = base
+        if self.JITTER:
+            at += uniform(0, self.JITTER)
+        self.scheduled[action] = (base, self.n)
+        heappush(self.heap, (at, self.n, action))
+
+    def fire(self, action, n, now):
+        """
+        Run a (due) action and schedule the next run.
+        Runs missed (suspended or busy) are not made up.
+        :param action: The due action.
+        :type action: gofer.agent.action.Action
+        :param n: Identifies the heap item.
+        :type n: int
+        :param now: The current time (epoch seconds).
+        :type now: float
+        """
+        base, _n = self.scheduled.get(action, (0, None))
+        if n != _n:
+            # unscheduled
+            return
+        if action.running:
+            log.debug('action: %s still running, skipped', action)
+        else:
+            action.running = True
+            plugin = self.plugins.get(action)
+            try:
+                if plugin is None:
+                    self.pool.run(action)
+                else:
+                    self.pool.run(self.perform, plugin, action)
+            except Exception:
+                action.running = False
+                log.exception(utf8(action))
+        base += max(1, action.seconds)
+        self.schedule(action, max(base, now))
+
+    @staticmethod
+    def perform(plugin, action):
+        """
+        Run an action.
+        The plugin is held while the action runs so that (lazy) plugins
+        are not deactivated.  Actions of plugins no longer active are
+        skipped.
+        :param plugin: The plugin providing the action.
+        :type plugin: gofer.agent.plugin.Plugin
+        :param action: The action to run.
+        :type action: gofer.agent.action.Action
+        """
+        if not plugin.hold():
+            action.running = False
+            return
+        try:
+            action()
+        finally:
+            plugin.unhold()
 
 
 class Agent(object):
@@ -71,6 +199,13 @@ class Agent(object):
     def __init__(self):
         cfg = AgentConfig()
         pam.SERVICE = cfg.pam.service
+        Journal.FSYNC = cfg.journal.fsync
+        Journal.FSYNC_INTERVAL = float(cfg.journal.fsync_interval)
+        Journal.SEGMENT_SIZE = int(cfg.journal.segment_size)
+        ThreadPool.budget.limit = int(cfg.threads.budget)
+        Builtin.THREADS = int(cfg.threads.builtin)
+        ActionThread.THREADS = int(cfg.actions.threads)
+        ActionThread.JITTER = float(cfg.actions.jitter)
 
     def start(self, block=True):
         """
@@ -79,8 +214,8 @@ class Agent(object):
         :type block: bool
         """
         cfg = AgentConfig()
-        for plugin in Plugin.all():
-            plugin.start()
+        Segment.purge()
+        PluginLoader.start_all()
         if get_bool(cfg.management.enabled):
             host = cfg.management.host
             port = int(cfg.management.port)
@@ -92,6 +227,20 @@ class Agent(object):
         if block:
             actions.join(self.WAIT)
 
+    def shutdown(self):
+        """
+        Shutdown the agent.
+        - shutdown plugins.
+        - shutdown the shared builtin thread pool.
+        """
+        for plugin in Plugin.all():
+            try:
+                plugin.shutdown(False)
+            except Exception:
+                log.exception('plugin:%s', plugin.name)
+        Builtin.terminate()
+        log.info('agent shutdown.')
+
 
 class AgentLock(Lock):
     """
@@ -122,9 +271,12 @@ def start(daemon=True):
     if daemon:
         start_daemon(lock)
     try:
-        PluginLoader.load_all()
         agent = Agent()
-        agent.start()
+        PluginLoader.load_all()
+        try:
+            agent.start()
+        finally:
+            agent.shutdown()
     finally:
         lock.release()
 
@@ -23,21 +23,26 @@ import sys
 
 from logging import getLogger
 from threading import RLock
+from time import time
 
 from gofer import Singleton, synchronized, NAME
 from gofer.agent.config import PLUGIN_SCHEMA, PLUGIN_DEFAULTS
 from gofer.agent.decorator import Actions
 from gofer.agent.decorator import Delegate
+from gofer.agent.deplist import DepList
+from gofer.agent.resource import Janitor
 from gofer.agent.rmi import Scheduler, Task
 from gofer.agent.whiteboard import Whiteboard
-from gofer.common import nvl, mkdir
+from gofer.common import Thread, nvl, mkdir
 from gofer.common import released
 from gofer.config import Config, Graph, FileReader, get_bool, get_integer
-from gofer.messaging import Document, Connector, Node, Queue, Exchange
+from gofer.messaging import Connector, Node, Queue, Exchange
 from gofer.messaging import NotFound
+from gofer.metrics import Counter
 from gofer.rmi.consumer import RequestConsumer
 from gofer.rmi.decorator import Remote
 from gofer.rmi.dispatcher import Dispatcher
+from gofer.rmi.model.prefork import Pool
 from gofer.threadpool import ThreadPool
 
 
@@ -56,6 +61,13 @@ def attach(fn):
 class Container(object):
     """
     Plugin container.
+    :ivar plugins: Plugins by name and path.
+    :type plugins: dict
+    :ivar routes: The routing table used to forward requests for classes
+        not provided by a plugin.  Keyed by plugin, each entry maps a
+        classname to the plugin providing it.  Built on demand and
+        invalidated when plugins are added or deleted.
+    :type routes: dict
     """
 
     __metaclass__ = Singleton
@@ -63,6 +75,7 @@ class Container(object):
     def __init__(self):
         self.__mutex = RLock()
         self.plugins = {}
+        self.routes = None
 
     @synchronized
     def add(self, plugin, *names):
@@ -78,6 +91,7 @@ class Container(object):
         for name in names:
             self.plugins[name] = plugin
         self.plugins[plugin.path] = plugin
+        self.routes = None
         return plugin
 
     @synchronized
@@ -90,6 +104,7 @@ class Container(object):
         for k, v in self.plugins.items():
             if v == plugin:
                 del self.plugins[k]
+        self.routes = None
         return plugin
 
     @synchronized
@@ -111,12 +126,102 @@ class Container(object):
         :rtype: list
         """
         unique = []
+        found = set()
         for p in self.plugins.values():
-            if p in unique:
+            if p in found:
                 continue
+            found.add(p)
             unique.append(p)
         return unique
 
+    @synchronized
+    def invalidate(self):
+        """
+        Invalidate the routing table.
+        Called when the classes provided by a plugin have changed.
+        """
+        self.routes = None
+
+    @synchronized
+    def route(self, plugin, classname):
+        """
+        Find the plugin to which requests for a class not provided
+        by the specified plugin are forwarded.
+        :param plugin: The plugin that received the request.
+        :type plugin: Plugin
+        :param classname: The requested class name.
+        :type classname: str
+        :return: The plugin providing the class or None.
+        :rtype: Plugin
+        """
+        if self.routes is None:
+            self.routes = self._routes()
+        try:
+            return self.routes[plugin].get(classname)
+        except KeyError:
+            return None
+
+    def _routes(self):
+        """
+        Build the routing table.
+        A request may be forwarded to a plugin when the target plugin
+        is in the *forward* list of the plugin receiving the request
+        and the receiving plugin is in the *accept* list of the target.
+        :return: The routing table.
+        :rtype: dict
+        """
+        plugins = self.all()
+        provided = []
+        for target in plugins:
+            accept = target.accept
+            for classname in target.dispatcher.catalog:
+                provided.append((classname, target, accept))
+        routes = {}
+        for plugin in plugins:
+            table = {}
+            forward = plugin.forward
+            for classname, target, accept in provided:
+                if target == plugin or classname in table:
+                    continue
+                if plugin.provides(classname):
+                    continue
+                if not forward.intersection(('*', target.name)):
+                    # (forwarding) not approved
+                    continue
+                if not accept.intersection(('*', plugin.name)):
+                    # (accept) not approved
+                    continue
+                table[classname] = target
+            routes[plugin] = table
+        return routes
+
+    @synchronized
+    def inactive(self, plugin):
+        """
+        Get the inactive (lazy) plugins to which requests received by
+        the specified plugin may be forwarded.  The classes provided by
+        a lazy plugin are not known until it has been activated.
+        :param plugin: The plugin that received the request.
+        :type plugin: Plugin
+        :return: A list of inactive plugins.
+        :rtype: list
+        """
+        inactive = []
+        forward = plugin.forward
+        for target in self.all():
+            if target == plugin:
+                continue
+            if not target.lazy or target.impl is not None:
+                continue
+            if not forward.intersection(('*', target.name)):
+                # (forwarding) not approved
+                continue
+            if not target.accept.intersection(('*', plugin.name)):
+                # (accept) not approved
+                continue
+            inactive.append(target)
+        return inactive
+
     @synchronized
     def load(self, path):
         """
@@ -170,7 +275,7 @@ class Plugin(object):
     :type descriptor: PluginDescriptor
     :param path: The descriptor path.
     :type path: str
-    :ivar pool: The main thread pool.
+    :ivar pool: The main thread pool.  Created when started.
     :type pool: ThreadPool
     :ivar impl: The plugin implementation.
     :ivar impl: module
@@ -182,8 +287,12 @@ class Plugin(object):
     :type whiteboard: Whiteboard
     :ivar authenticator: The plugin message authenticator.
     :type authenticator: gofer.messaging.auth.Authenticator
-    :ivar consumer: An AMQP request consumer.
-    :type consumer: gofer.rmi.consumer.RequestConsumer.
+    :ivar consumers: The AMQP request consumers.
+    :type consumers: list
+    :ivar skipped: The number of expired requests skipped.
+    :type skipped: Counter
+    :ivar workers: The (optional) pool of pre-forked worker processes.
+    :type workers: Pool
     """
 
     container = Container()
@@ -233,6 +342,19 @@ class Plugin(object):
         """
         return Plugin.container.all()
 
+    @staticmethod
+    def _threads(descriptor):
+        """
+        Get the thread pool sizing.
+        Specified as: <min>[:<max>].
+        :param descriptor: The plugin descriptor.
+        :type descriptor: PluginDescriptor
+        :return: tuple of: (min, max)
+        :rtype: tuple
+        """
+        threads = str(descriptor.main.threads or 1).split(':')
+        return int(threads[0]), int(threads[-1])
+
     def __init__(self, descriptor, path):
         """
         :param descriptor: The plugin descriptor.
@@ -243,15 +365,19 @@ class Plugin(object):
         self.__mutex = RLock()
         self.path = path
         self.descriptor = descriptor
-        self.pool = ThreadPool(int(descriptor.main.threads or 1))
+        self.pool = None
         self.impl = None
         self.actions = []
         self.dispatcher = Dispatcher()
         self.whiteboard = Whiteboard()
-        self.scheduler = Scheduler(self)
+        self.scheduler = None
         self.delegate = Delegate()
         self.authenticator = None
-        self.consumer = None
+        self.consumers = []
+        self.skipped = Counter()
+        self.calls = 0
+        self.used = 0
+        self.__workers = None
 
     @property
     def name(self):
@@ -294,24 +420,87 @@ class Plugin(object):
         _list = [p.strip() for p in _list.split(',')]
         return set(_list)
 
+    @property
+    def requires(self):
+        _list = self.cfg.main.requires or ''
+        _list = [p.strip() for p in _list.split(',')]
+        return set([p for p in _list if p])
+
+    @property
+    def lazy(self):
+        return get_bool(self.cfg.main.lazy)
+
+    @property
+    def idle(self):
+        return float(self.cfg.main.idle or 0)
+
+    @property
+    def n_consumers(self):
+        return int(self.cfg.main.consumers or 1)
+
     @property
     def is_started(self):
-        return self.scheduler.isAlive()
+        return self.scheduler is not None and self.scheduler.isAlive()
 
     @property
     def latency(self):
         return float(self.cfg.main.latency)
 
+    @property
+    def progress(self):
+        return float(self.cfg.main.progress)
+
+    @property
+    def workers(self):
+        return self._workers()
+
+    @synchronized
+    def _workers(self):
+        """
+        Get the pool of pre-forked worker processes used by the fork
+        call model.  Created on first use so that workers are forked
+        after the plugin has been loaded.
+        :return: The pool or None when calls are not pre-forked.
+        :rtype: Pool
+        """
+        if self.__workers is None:
+            fork = self.cfg.fork
+            processes = int(fork.processes or 0)
+            if processes > 0:
+                self.__workers = Pool(
+                    processes,
+                    calls=int(fork.max_calls or 0),
+                    rss=int(fork.max_rss or 0))
+        return self.__workers
+
+    @synchronized
+    def _allocate(self):
+        """
+        Create the thread pool and the scheduler.
+        Created when the plugin is started so that disabled and
+        loaded (but not started) plugins do not start threads.
+        Lazy plugins do not hold threads while idle.
+        """
+        if self.pool is None:
+            capacity, limit = Plugin._threads(self.descriptor)
+            if self.lazy:
+                capacity = 0
+            self.pool = ThreadPool(capacity, limit=limit)
+        if self.scheduler is None:
+            self.scheduler = Scheduler(self)
+
     @synchronized
     def start(self):
         """
         Start the plugin.
+        - allocate the thread pool and scheduler
         - attach
         - start scheduler
         """
         if self.is_started:
             # already started
             return
+        self._allocate()
         self.attach()
         self.scheduler.start()
 
@@ -322,6 +511,7 @@ class Plugin(object):
         - detach
         - shutdown the thread pool.
         - shutdown the scheduler.
+        - shutdown the worker processes.
         :param teardown: Teardown the broker model.
         :type teardown: bool
         :return: List of pending requests.
@@ -334,6 +524,8 @@ class Plugin(object):
         pending = self.pool.shutdown()
         self.scheduler.shutdown()
         self.scheduler.join()
+        if self.__workers is not None:
+            self.__workers.shutdown()
         return pending
 
     @synchronized
@@ -355,16 +547,19 @@ class Plugin(object):
     def attach(self):
         """
         Attach (connect) to AMQP connector using the specified uuid.
+        The configured number of (competing) consumers are started
+        on the plugin queue and all feed the same scheduler.
         """
         self.detach(False)
         self.refresh()
         model = BrokerModel(self)
         model.setup()
         node = Node(model.queue)
-        consumer = RequestConsumer(node, self)
-        consumer.authenticator = self.authenticator
-        consumer.start()
-        self.consumer = consumer
+        for n in range(self.n_consumers):
+            consumer = RequestConsumer(node, self)
+            consumer.authenticator = self.authenticator
+            consumer.start()
+            self.consumers.append(consumer)
         log.info('plugin:%s, attached => %s', self.name, self.node)
 
     @synchronized
@@ -374,12 +569,14 @@ class Plugin(object):
         :param teardown: Teardown the broker model.
         :type teardown: bool
         """
-        if not self.consumer:
+        if not self.consumers:
             # not attached
             return
-        self.consumer.shutdown()
-        self.consumer.join()
-        self.consumer = None
+        for consumer in self.consumers:
+            consumer.shutdown()
+        for consumer in self.consumers:
+            consumer.join()
+        self.consumers = []
         log.info('plugin:%s, detached [%s]', self.name, self.node)
         if teardown:
             model = BrokerModel(self)
@@ -395,37 +592,158 @@ class Plugin(object):
         """
         return self.dispatcher.provides(name)
 
-    def dispatch(self, request):
+    def dispatch(self, request, call):
         """
         Dispatch (invoke) the specified RMI request.
         :param request: An RMI request
         :type request: gofer.Document
+        :param call: The requested call (parsed when scheduled).
+        :type call: gofer.Document
         :return: The RMI returned.
         """
-        dispatcher = self.dispatcher
-        call = Document(request.request)
-        if not self.provides(call.classname):
-            for plugin in Plugin.all():
-                if plugin == self:
-                    continue
-                if not plugin.provides(call.classname):
-                    # not provided
-                    continue
-                valid = set()
-                valid.add('*')
-                valid.add(plugin.name)
-                if not valid.intersection(self.forward):
-                    # (forwarding) not approved
-                    continue
-                valid = set()
-                valid.add('*')
-                valid.add(self.name)
-                if not valid.intersection(plugin.accept):
-                    # (accept) not approved
-                    continue
-                dispatcher = plugin.dispatcher
-                break
-        return dispatcher.dispatch(request)
+        lazy = self.lazy
+        if lazy:
+            self.activate()
+        try:
+            if not self.provides(call.classname):
+                plugin = self.route(call.classname)
+                if plugin is not None:
+                    return plugin.forwarded(request)
+            return self.dispatcher.dispatch(request)
+        finally:
+            if lazy:
+                self.release()
+
+    def route(self, classname):
+        """
+        Find the plugin to which requests for a class not provided
+        by this plugin are forwarded.  When not routed, inactive (lazy)
+        plugins that may provide the class are activated until found.
+        :param classname: The requested class name.
+        :type classname: str
+        :return: The plugin providing the class or None.
+        :rtype: Plugin
+        """
+        container = Plugin.container
+        plugin = container.route(self, classname)
+        if plugin is not None:
+            return plugin
+        for target in container.inactive(self):
+            target.activate()
+            target.release()
+            plugin = container.route(self, classname)
+            if plugin is not None:
+                return plugin
+
+    def forwarded(self, request):
+        """
+        Dispatch (invoke) an RMI request forwarded by another plugin.
+        Lazy plugins are activated (and counted) just as for requests
+        received by the plugin.
+        :param request: An RMI request
+        :type request: gofer.Document
+        :return: The RMI returned.
+        """
+        lazy = self.lazy
+        if lazy:
+            self.activate()
+        try:
+            return self.dispatcher.dispatch(request)
+        finally:
+            if lazy:
+                self.release()
+
+    @synchronized
+    def activate(self):
+        """
+        Activate a lazy plugin.
+        The plugin module is imported and loaded on first use.  Calls are
+        counted so that the plugin is not deactivated while in use.
+        """
+        if self.impl is None:
+            try:
+                PluginLoader._import(self)
+                self.delegate.loaded()
+            except Exception:
+                self.impl = None
+                raise
+            if self.idle:
+                Janitor.instance().add(self)
+            log.info('plugin:%s, activated', self.name)
+        self.calls += 1
+        self.used = time()
+
+    @synchronized
+    def release(self):
+        """
+        A call to an activated (lazy) plugin has completed.
+        """
+        self.calls -= 1
+        self.used = time()
+
+    @synchronized
+    def hold(self):
+        """
+        Hold an active plugin while in use (running an action).
+        Counted as a call so that the plugin is not deactivated.  Unlike
+        activate(), inactive (lazy) plugins are not activated and the
+        idle period is not extended.
+        :return: True if held.  False when not active.
+        :rtype: bool
+        """
+        if self.impl is None:
+            return False
+        self.calls += 1
+        return True
+
+    @synchronized
+    def unhold(self):
+        """
+        An active plugin held while in use is no longer in use.
+        """
+        self.calls -= 1
+
+    @synchronized
+    def evict(self):
+        """
+        Deactivate a lazy plugin that has been idle longer
+        than the idle period.  Called by the janitor.
+        :return: The number of plugins deactivated.
+        :rtype: int
+        """
+        if self.impl is None or self.calls:
+            return 0
+        if time() - self.used <= self.idle:
+            return 0
+        self.deactivate()
+        return 1
+
+    @synchronized
+    def deactivate(self):
+        """
+        Deactivate a lazy plugin.
+        The plugin module is imported again on next use.
+        - Teardown instances of remote classes.
+        - Plugin unloaded.
+        - Shutdown the worker processes.
+        - Discard the plugin module.
+        """
+        if self.impl is None:
+            # not active
+            return
+        if self.idle:
+            Janitor.instance().remove(self)
+        self.dispatcher.close()
+        self.delegate.unloaded()
+        if self.__workers is not None:
+            self.__workers.shutdown()
+            self.__workers = None
+        self.dispatcher = Dispatcher()
+        self.actions = []
+        sys.modules.pop(self.impl.__name__, None)
+        self.impl = None
+        Plugin.container.invalidate()
+        log.info('plugin:%s, deactivated', self.name)
 
     @synchronized
     def load(self):
@@ -450,12 +768,18 @@ class Plugin(object):
         - Delete the plugin.
         - Abort scheduled requests.
         - Plugin shutdown.
+        - Teardown instances of remote classes.
         - Purge pending requests.
         """
         Plugin.delete(self)
         self.shutdown()
-        self.delegate.unloaded()
-        self.scheduler.pending.delete()
+        if self.lazy:
+            self.deactivate()
+        else:
+            self.dispatcher.close()
+            self.delegate.unloaded()
+        if self.scheduler is not None:
+            self.scheduler.pending.delete()
         log.info('plugin:%s, unloaded', self.name)
 
     @synchronized
@@ -466,18 +790,27 @@ class Plugin(object):
         - Delete the plugin.
         - Abort scheduled requests.
         - Plugin shutdown.
+        - Teardown instances of remote classes.
         - Reload plugin.
         - Reschedule pending work to reloaded plugin.
         """
         Plugin.delete(self)
         scheduled = self.shutdown(False)
-        self.delegate.unloaded()
+        if self.lazy:
+            self.deactivate()
+        else:
+            self.dispatcher.close()
+            self.delegate.unloaded()
         plugin = PluginLoader.load(self.path)
         if plugin:
+            plugin._allocate()
+            pending = plugin.scheduler.pending
             for call in scheduled:
                 if isinstance(call.fn, Task):
-                    task = call.fn
-                    task.transaction.plugin = plugin
+                    transaction = call.fn.transaction
+                    transaction.plugin = plugin
+                    transaction.pending = pending
+                    pending.adopt(transaction.id)
                 plugin.pool.schedule(call)
             plugin.start()
         log.info('plugin:%s, reloaded', self.name)
@@ -594,14 +927,19 @@ class PluginLoader:
         '/opt/%s/plugins' % NAME,
     ]
 
+    __lock = RLock()
+
     @staticmethod
     def load_all():
         """
         Load all plugins.
+        Plugins are loaded concurrently in dependency order.  A plugin
+        is only loaded after the plugins it requires have been loaded.
         :return: A list of loaded plugins.
         :rtype: list
         """
         loaded = []
+        plugins = []
         root = PluginDescriptor.ROOT
         mkdir(root)
         paths = [os.path.join(root, fn) for fn in os.listdir(root)]
@@ -611,11 +949,99 @@ class PluginLoader:
                 continue
             if os.path.isdir(path):
                 continue
-            plugin = PluginLoader.load(path)
-            if plugin:
-                loaded.append(plugin)
+            plugin = PluginLoader._read(path)
+            if plugin.enabled:
+                plugins.append(plugin)
+            else:
+                log.warn('plugin:%s, DISABLED', plugin.name)
+        names = set()
+        for wave in PluginLoader.ordered(plugins):
+            ready = []
+            for plugin in wave:
+                missing = plugin.requires - names
+                if missing:
+                    log.error(
+                        'plugin:%s, requires: %s, not loaded',
+                        plugin.name,
+                        ', '.join(sorted(missing)))
+                else:
+                    ready.append(plugin)
+            for plugin in PluginLoader.concurrently(PluginLoader._load, ready):
+                if plugin:
+                    loaded.append(plugin)
+                    names.add(plugin.name)
         return loaded
 
+    @staticmethod
+    def start_all():
+        """
+        Start all loaded plugins.
+        Plugins are started concurrently in dependency order.
+        """
+        for wave in PluginLoader.ordered(Plugin.all()):
+            PluginLoader.concurrently(lambda p: p.start(), wave)
+
+    @staticmethod
+    def ordered(plugins):
+        """
+        Group plugins into waves using the dependencies declared by
+        the *requires* descriptor property.  Plugins within a wave do not
+        depend on each other and only depend on plugins in earlier waves.
+        :param plugins: A list of plugins.
+        :type plugins: list
+        :return: A list of waves.  Each wave is a list of plugins.
+        :rtype: list
+        """
+        index = {}
+        graph = DepList()
+        for plugin in plugins:
+            index.setdefault(plugin.name, []).append(plugin)
+            graph.add((plugin.name, tuple(sorted(plugin.requires))))
+        depth = {}
+        waves = []
+        for name, requires in graph.sort():
+            if name in depth:
+                continue
+            n = 0
+            for required in requires:
+                n = max(n, depth.get(required, -1) + 1)
+            depth[name] = n
+            if n == len(waves):
+                waves.append([])
+            waves[n].extend(index[name])
+        return waves
+
+    @staticmethod
+    def concurrently(fn, plugins):
+        """
+        Call fn(plugin) for each plugin in a separate thread
+        and wait for all of the calls to complete.
+        :param fn: The function to be called.
+        :type fn: callable
+        :param plugins: A list of plugins.
+        :type plugins: list
+        :return: The list of values returned by fn, in plugin order.
+            The value is None when fn raised an exception.
+        :rtype: list
+        """
+        threads = []
+        returned = [None] * len(plugins)
+
+        def call(n, plugin):
+            try:
+                returned[n] = fn(plugin)
+            except Exception:
+                log.exception('plugin:%s', plugin.name)
+
+        for n, plugin in enumerate(plugins):
+            thread = Thread(target=call, args=(n, plugin), name='plugin:%s' % plugin.name)
+            thread.setDaemon(True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+        return returned
+
     @staticmethod
     def load(path):
         """
@@ -625,21 +1051,31 @@ class PluginLoader:
         :return: The loaded plugin.
         :rtype: Plugin
         """
-        fn = os.path.basename(path)
-        name, _ = os.path.splitext(fn)
-        default = dict(main=dict(name=name))
-        conf = Config(PLUGIN_DEFAULTS, default, path)
-        conf.validate(PLUGIN_SCHEMA)
-        descriptor = PluginDescriptor(conf)
-        plugin = Plugin(descriptor, path)
+        plugin = PluginLoader._read(path)
         if plugin.enabled:
-            plugin = Plugin(descriptor, path)
             plugin = PluginLoader._load(plugin)
         else:
             log.warn('plugin:%s, DISABLED', plugin.name)
             plugin = None
         return plugin
 
+    @staticmethod
+    def _read(path):
+        """
+        Read the plugin descriptor.
+        :param path: A plugin descriptor path.
+        :type path: str
+        :return: The (not loaded) plugin.
+        :rtype: Plugin
+        """
+        fn = os.path.basename(path)
+        name, _ = os.path.splitext(fn)
+        default = dict(main=dict(name=name))
+        conf = Config(PLUGIN_DEFAULTS, default, path)
+        conf.validate(PLUGIN_SCHEMA)
+        descriptor = PluginDescriptor(conf)
+        return Plugin(descriptor, path)
+
     @staticmethod
     def _find(plugin):
         """
@@ -661,19 +1097,44 @@ class PluginLoader:
     @staticmethod
     def _load(plugin):
         """
-        Import a module by file name.
+        Import and load the plugin.
+        Lazy plugins are imported when activated on first use.
         :param plugin: A plugin to load.
         :type plugin: Plugin
         :return: The loaded plugin.
         :rtype: Plugin
         """
-        Remote.clear()
-        Actions.clear()
+        try:
+            if plugin.lazy:
+                Plugin.add(plugin)
+                log.info('plugin:%s, lazy', plugin.name)
+            else:
+                PluginLoader._import(plugin)
+            plugin.load()
+            return plugin
+        except Exception:
+            log.exception('plugin:%s, import failed', plugin.name)
+            Plugin.delete(plugin)
+
+    @staticmethod
+    def _import(plugin):
+        """
+        Import a module by file name.
+        Serialized because the decorated functions are collected
+        in (global) class attributes while the module is imported.
+        :param plugin: A plugin to import.
+        :type plugin: Plugin
+        """
         Plugin.add(plugin)
+        path = plugin.descriptor.main.plugin
+        if path:
+            Plugin.add(plugin, path)
+        PluginLoader.__lock.acquire()
         try:
-            path = plugin.descriptor.main.plugin
+            Remote.clear()
+            Actions.clear()
+            Delegate.clear()
             if path:
-                Plugin.add(plugin, path)
                 plugin.impl = __import__(path, {}, {}, [path.split('.')[-1]])
             else:
                 path = PluginLoader._find(plugin.name)
@@ -686,9 +1147,7 @@ class PluginLoader:
 
             plugin.dispatcher += Remote.collated()
             plugin.actions = Actions.collated()
-            plugin.delegate = Delegate()
-            plugin.load()
-            return plugin
-        except Exception:
-            log.exception('plugin:%s, import failed', plugin.name)
-            Plugin.delete(plugin)
+            plugin.delegate = Delegate.collated()
+        finally:
+            PluginLoader.__lock.release()
+        Plugin.container.invalidate()
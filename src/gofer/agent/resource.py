@@ -0,0 +1,344 @@
+#
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+#
+# Jeff Ortel <jortel@redhat.com>
+#
+
+"""
+Pooled plugin resources.
+"""
+
+from logging import getLogger
+from threading import RLock, Condition
+from time import time, sleep
+
+from gofer.common import Thread, synchronized, conditional, utf8
+
+
+log = getLogger(__name__)
+
+
+# default idle timeout (seconds)
+IDLE = 300
+
+
+def close(resource):
+    """
+    Close a resource.
+    The close() method is called when defined.
+    :param resource: A resource.
+    :type resource: object
+    """
+    fn = getattr(resource, 'close', None)
+    if not callable(fn):
+        return
+    try:
+        fn()
+    except Exception:
+        log.exception(utf8(resource))
+
+
+class Lease(object):
+    """
+    A resource leased for the duration of a (with) block.
+    :ivar pool: The pool.
+    :type pool: ResourcePool
+    :ivar resource: The leased resource.
+    :type resource: object
+    """
+
+    def __init__(self, pool):
+        """
+        :param pool: The pool.
+        :type pool: ResourcePool
+        """
+        self.pool = pool
+        self.resource = None
+
+    def __enter__(self):
+        self.resource = self.pool.get()
+        return self.resource
+
+    def __exit__(self, *unused):
+        resource = self.resource
+        self.resource = None
+        self.pool.put(resource)
+
+
+class ResourcePool(object):
+    """
+    A pool of (expensive) resources shared by requests.
+    Each resource is used by one request at a time.  Idle resources
+    are health checked before being reused and evicted (closed) when
+    idle longer than the idle timeout.  Requests wait when all of the
+    resources are in use.
+    Usage:
+      with pool() as resource:
+          ...
+    :ivar factory: Called to create a resource.
+    :type factory: callable
+    :ivar limit: The max number of resources.
+    :type limit: int
+    :ivar idle: The idle timeout (seconds).  0=never evicted.
+    :type idle: float
+    :ivar validate: Called to health check an idle resource.
+        Signature: validate(resource) returns True when healthy.
+    :type validate: callable
+    :ivar resources: Idle resources.  List of: (resource, idle-since).
+    :type resources: list
+    :ivar created: The number of resources created and not closed.
+    :type created: int
+    :ivar closed: The pool has been closed.
+    :type closed: bool
+    """
+
+    def __init__(self, factory, limit=1, idle=IDLE, validate=None):
+        """
+        :param factory: Called to create a resource.
+        :type factory: callable
+        :param limit: The max number of resources.
+        :type limit: int
+        :param idle: The idle timeout (seconds).  0=never evicted.
+        :type idle: float
+        :param validate: Called to health check an idle resource.
+        :type validate: callable
+        """
+        self.__condition = Condition()
+        self.factory = factory
+        self.limit = limit
+        self.idle = idle
+        self.validate = validate
+        self.resources = []
+        self.created = 0
+        self.closed = False
+        if idle:
+            Janitor.instance().add(self)
+
+    def get(self):
+        """
+        Get a resource.
+        An idle resource is reused when healthy.  Otherwise, a resource
+        is created when the limit has not been reached.
+        :return: A resource.
+        :rtype: object
+        """
+        while True:
+            resource = self._checkout()
+            if resource is None:
+                try:
+                    return self.factory()
+                except Exception:
+                    self._discard()
+                    raise
+            if self.healthy(resource):
+                return resource
+            log.info('resource: %s, not healthy', utf8(resource))
+            self._discard()
+            close(resource)
+
+    @conditional
+    def put(self, resource):
+        """
+        Return a resource obtained using get().
+        :param resource: A resource.
+        :type resource: object
+        """
+        if self.closed:
+            close(resource)
+            return
+        self.resources.append((resource, time()))
+        self.__condition.notify()
+
+    def healthy(self, resource):
+        """
+        Health check the resource.
+        :param resource: A resource.
+        :type resource: object
+        :return: True if healthy.
+        :rtype: bool
+        """
+        if self.validate is None:
+            return True
+        try:
+            return self.validate(resource)
+        except Exception:
+            log.debug(utf8(resource), exc_info=True)
+            return False
+
+    def evict(self):
+        """
+        Close resources idle longer than the idle timeout.
+        :return: The number of resources evicted.
+        :rtype: int
+        """
+        evicted = self._expired()
+        for resource in evicted:
+            close(resource)
+        return len(evicted)
+
+    def close(self):
+        """
+        Close the pool.
+        Idle resources are closed immediately and resources in
+        use are closed when returned.
+        """
+        if self.idle:
+            Janitor.instance().remove(self)
+        for resource in self._close():
+            close(resource)
+
+    def __call__(self):
+        """
+        Lease a resource.
+        :return: A lease.
+        :rtype: Lease
+        """
+        return Lease(self)
+
+    @conditional
+    def _checkout(self):
+        """
+        Checkout an idle resource.
+        Waits until one is available or may be created.
+        :return: An idle resource or None when one needs to be created.
+        :rtype: object
+        """
+        while True:
+            if self.closed:
+                raise ValueError('resource pool closed')
+            if self.resources:
+                return self.resources.pop()[0]
+            if self.created < self.limit:
+                self.created += 1
+                return
+            self.__condition.wait()
+
+    @conditional
+    def _discard(self):
+        """
+        A resource is not healthy or could not be created.
+        """
+        if self.created:
+            self.created -= 1
+        self.__condition.notify()
+
+    @conditional
+    def _expired(self):
+        """
+        Remove resources idle longer than the idle timeout.
+        :return: The removed resources.
+        :rtype: list
+        """
+        if not self.idle:
+            return []
+        expired = []
+        kept = []
+        now = time()
+        for resource, since in self.resources:
+            if now - since > self.idle:
+                expired.append(resource)
+            else:
+                kept.append((resource, since))
+        self.resources = kept
+        self.created -= len(expired)
+        return expired
+
+    @conditional
+    def _close(self):
+        """
+        Flag the pool as closed.
+        :return: The idle resources.
+        :rtype: list
+        """
+        self.closed = True
+        resources = [r[0] for r in self.resources]
+        self.resources = []
+        self.created = 0
+        self.__condition.notify_all()
+        return resources
+
+
+class Janitor(Thread):
+    """
+    Evicts idle resources.
+    Registered objects have an evict() method.
+    :cvar INTERVAL: The eviction interval (seconds).
+    :type INTERVAL: float
+    :ivar pools: The registered pools.
+    :type pools: set
+    """
+
+    INTERVAL = 10
+
+    __lock = RLock()
+    __inst = None
+
+    @staticmethod
+    def instance():
+        """
+        Get the (running) janitor.
+        Created on first use.
+        :rtype: Janitor
+        """
+        Janitor.__lock.acquire()
+        try:
+            if Janitor.__inst is None:
+                Janitor.__inst = Janitor()
+                Janitor.__inst.start()
+            return Janitor.__inst
+        finally:
+            Janitor.__lock.release()
+
+    def __init__(self):
+        Thread.__init__(self, name='janitor')
+        self.__mutex = RLock()
+        self.pools = set()
+        self.setDaemon(True)
+
+    @synchronized
+    def add(self, pool):
+        """
+        Register a pool.
+        :param pool: A pool.
+        :type pool: ResourcePool
+        """
+        self.pools.add(pool)
+
+    @synchronized
+    def remove(self, pool):
+        """
+        Unregister a pool.
+        :param pool: A pool.
+        :type pool: ResourcePool
+        """
+        self.pools.discard(pool)
+
+    @synchronized
+    def registered(self):
+        """
+        Get the registered pools.
+        :return: The registered pools.
+        :rtype: list
+        """
+        return list(self.pools)
+
+    def run(self):
+        """
+        Periodically evict idle resources.
+        """
+        while not Thread.aborted():
+            sleep(Janitor.INTERVAL)
+            for pool in self.registered():
+                try:
+                    pool.evict()
+                except Exception:
+                    log.exception('evict: %s', pool)
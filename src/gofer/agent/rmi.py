@@ -20,8 +20,9 @@ from gofer.agent.builtin import Builtin
 from gofer.common import Thread, released
 from gofer.messaging import Document, Producer
 from gofer.metrics import Timer, timestamp
-from gofer.rmi.context import Cancelled, Context, Progress
+from gofer.rmi.context import Cancelled, Context, Progress, subscribed
 from gofer.rmi.store import Pending, Empty
+from gofer.rmi.tracker import Tracker
 
 
 log = getLogger(__name__)
@@ -79,18 +80,23 @@ class Task(object):
         if not self.plugin.url or cancelled():
             self.discard()
             return
+        if self.transaction.expired:
+            self.skip()
+            return
         producer = self._producer(self.plugin)
-        progress = Progress(request, producer)
-        context = Context(request.sn, progress, cancelled)
+        progress = Progress(request, producer, self.plugin.progress)
+        context = Context(request.sn, progress, cancelled, self.plugin.workers)
         Context.set(context)
         producer.open()
         try:
             self.producer = producer
             self.send_started(request)
-            result = self.plugin.dispatch(request)
+            result = self.plugin.dispatch(request, self.transaction.call)
+            progress.flush()
             self.commit()
             self.send_reply(request, result)
         finally:
+            progress.close()
             producer.close()
             Context.set()
 
@@ -106,6 +112,12 @@ class Task(object):
         """
         self.transaction.discard()
 
+    def skip(self):
+        """
+        Skip the (expired) transaction.
+        """
+        self.transaction.skip()
+
     def send_started(self, request):
         """
         Send the a status update if requested.
@@ -117,6 +129,8 @@ class Task(object):
         address = request.replyto
         if not address:
             return
+        if not subscribed(request, 'started'):
+            return
         try:
             self.producer.send(
                 address,
@@ -162,9 +176,11 @@ class Transaction(object):
     :type pending: Pending
     :ivar request: The subject of the transaction.
     :type request: Document
+    :ivar call: The requested call (parsed) when scheduled.
+    :type call: Document
     """
 
-    def __init__(self, plugin, pending, request):
+    def __init__(self, plugin, pending, request, call):
         """
         :param plugin: A plugin.
         :type plugin: gofer.agent.plugin.Plugin
@@ -172,15 +188,27 @@ class Transaction(object):
         :type pending: Pending
         :param request: An RMI request.
         :type request: Document
+        :param call: The requested call.
+        :type call: Document
         """
         self.plugin = plugin
         self.pending = pending
         self.request = request
+        self.call = call
 
     @property
     def id(self):
         return self.request.sn
 
+    @property
+    def expired(self):
+        """
+        The deadline stamped by the caller has passed.
+        Nobody is waiting for the reply.
+        """
+        deadline = self.request.deadline
+        return bool(deadline) and deadline < time()
+
     def commit(self):
         """
         Commit the transaction.
@@ -194,8 +222,29 @@ class Transaction(object):
         Discard the transaction.
         """
         self.pending.commit(self.request.sn)
+        self.untrack()
         log.info('Request: %s, discarded', self.id)
 
+    def skip(self):
+        """
+        Skip (discard) the expired transaction.
+        The plugin *skipped* counter is incremented.
+        """
+        self.pending.commit(self.request.sn)
+        self.untrack()
+        skipped = self.plugin.skipped.increment()
+        log.info('Request: %s, expired (skipped: %d)', self.id, skipped)
+
+    def untrack(self):
+        """
+        Remove the (discarded) request from the cancel tracker.
+        """
+        try:
+            Tracker().remove(self.request.sn)
+        except KeyError:
+            # already cleaned up
+            pass
+
 
 class Scheduler(Thread):
     """
@@ -226,23 +275,26 @@ class Scheduler(Thread):
                 # aborted
                 break
             try:
-                plugin = self.select_plugin(request)
-                transaction = Transaction(plugin, self.pending, request)
+                call = Document(request.request)
+                plugin = self.select_plugin(call)
+                transaction = Transaction(plugin, self.pending, request, call)
+                if transaction.expired:
+                    transaction.skip()
+                    continue
                 task = Task(transaction)
                 plugin.pool.run(task)
             except Exception:
                 self.pending.commit(request.sn)
                 log.exception(request.sn)
 
-    def select_plugin(self, request):
+    def select_plugin(self, call):
         """
-        Select the plugin based on the request.
-        :param request: A request to be scheduled.
-        :rtype request: gofer.messaging.Document
+        Select the plugin based on the requested call.
+        :param call: The call requested by a request to be scheduled.
+        :rtype call: gofer.messaging.Document
         :return: The appropriate plugin.
         :rtype: gofer.agent.plugin.Plugin
         """
-        call = Document(request.request)
         if self.builtin.provides(call.classname):
             plugin = self.builtin
         else:
@@ -260,6 +312,10 @@ class Scheduler(Thread):
     def shutdown(self):
         """
         Shutdown the scheduler.
+        The pending queue is closed once the scheduler has stopped.
         """
         self.builtin.shutdown()
         self.abort()
+        if self.isAlive():
+            self.join()
+        self.pending.close()
@@ -17,9 +17,11 @@ import inspect
 
 from gofer import NAME, Options
 from gofer.rmi.decorator import Remote
-from gofer.rmi.model import DIRECT, valid_model
+from gofer.rmi.model import DIRECT, valid_model, valid_timeout
+from gofer.rmi.scope import REQUEST, SINGLETON, POOLED, valid_scope, valid_size
 from gofer.agent.decorator import Actions
 from gofer.agent.decorator import Delegate
+from gofer.agent.resource import ResourcePool, IDLE
 
 
 def options(fn):
@@ -40,7 +42,7 @@ def options(fn):
     return opt
 
 
-def remote(fx=None, model=DIRECT, secret=None):
+def remote(fx=None, model=DIRECT, secret=None, timeout=None, scope=None, size=None):
     """
     The *remote* decorator.
     Used to expose function/methods as RMI targets.
@@ -50,11 +52,29 @@ def remote(fx=None, model=DIRECT, secret=None):
     :type model: str
     :param secret: An optional shared secret. *DEPRECATED*
     :type secret: str
+    :param timeout: An optional max run time (seconds).
+    :type timeout: (int|float)
+    :param scope: An optional instance scope (request|singleton|pooled).
+        Overrides the scope of the class.
+    :type scope: str
+    :param size: The max number of pooled instances (default: 1).
+        Only valid with *scope*.
+    :type size: int
     :return: The decorated function.
+    :raise ValueError: When *size* is specified without *scope*.
     """
+    if scope is None and size is not None:
+        raise ValueError('size requires scope')
+    if size is None:
+        size = 1
+
     def inner(fn):
         opt = options(fn)
         opt.call.model = valid_model(model)
+        if timeout is not None:
+            opt.call.timeout = valid_timeout(timeout)
+        if scope is not None:
+            opt.call.scope = Options(name=valid_scope(scope), size=valid_size(size))
         if secret:
             required = Options()
             required.secret = secret
@@ -68,6 +88,35 @@ def remote(fx=None, model=DIRECT, secret=None):
         return inner
 
 
+def scope(name, size=1):
+    """
+    The *scope* class decorator.
+    Used to specify the lifecycle of instances of a class
+    created to invoke remote methods.  Instances are keyed by
+    constructor arguments and torn down (close() called when
+    defined) when the plugin is unloaded.
+      - request: created for each request (default).
+      - singleton: created once and shared by all requests.
+      - pooled: pooled and used by one request at a time.
+    :param name: The scope name (request|singleton|pooled).
+    :type name: str
+    :param size: The max number of pooled instances.
+    :type size: int
+    :return: The decorated class.
+    """
+    spec = Options(name=valid_scope(name), size=valid_size(size))
+
+    def inner(cls):
+        opt = cls.__dict__.get(NAME)
+        if opt is None:
+            # copy options inherited from a base class.
+            opt = Options(getattr(cls, NAME, Options()))
+            setattr(cls, NAME, opt)
+        opt.scope = spec
+        return cls
+    return inner
+
+
 def pam(user, service=None):
     """
     The *pam* decorator.
@@ -167,5 +216,40 @@ def unload(fn):
     return fn
 
 
+def resource(fx=None, limit=1, idle=IDLE, validate=None):
+    """
+    The *resource* decorator.
+    Used to designate a function as the factory of a pooled resource
+    such as a connection to a backend service.  The function is replaced
+    by a ResourcePool that is closed when the plugin is unloaded.
+    Usage:
+      @resource(limit=3)
+      def connection():
+          return connect()
+
+      with connection() as con:
+          ...
+    :param fx: The function being decorated when called without params.
+    :type fx: function
+    :param limit: The max number of resources.
+    :type limit: int
+    :param idle: The idle timeout (seconds).  0=never evicted.
+    :type idle: float
+    :param validate: Called to health check an idle resource.
+        Signature: validate(resource) returns True when healthy.
+    :type validate: callable
+    :return: The resource pool.
+    :rtype: ResourcePool
+    """
+    def inner(fn):
+        pool = ResourcePool(fn, limit=limit, idle=idle, validate=validate)
+        Delegate.unload.append(pool.close)
+        return pool
+    if inspect.isfunction(fx):
+        return inner(fx)
+    else:
+        return inner
+
+
 # backwards compatibility
 initializer = load
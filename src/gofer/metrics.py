@@ -22,8 +22,9 @@ import time
 
 from math import modf
 from datetime import datetime
+from threading import RLock
 
-from gofer.common import utf8
+from gofer.common import utf8, synchronized
 
 
 def timestamp():
@@ -68,3 +69,27 @@ class Timer:
 
     def __str__(self):
         return utf8(self)
+
+
+class Counter(object):
+    """
+    A thread-safe counter.
+    :ivar value: The current value.
+    :type value: int
+    """
+
+    def __init__(self):
+        self.__mutex = RLock()
+        self.value = 0
+
+    @synchronized
+    def increment(self, n=1):
+        """
+        Increment the counter.
+        :param n: The increment.
+        :type n: int
+        :return: The updated value.
+        :rtype: int
+        """
+        self.value += n
+        return self.value
@@ -16,10 +16,19 @@
 """
 PAM module for python
 """
+import os
+import hmac
+
+from collections import deque
 from ctypes import CDLL, POINTER, Structure, CFUNCTYPE, cast, byref, sizeof
 from ctypes import c_void_p, c_uint, c_char_p, c_char, c_int
 from ctypes.util import find_library
+from hashlib import sha256
 from logging import getLogger
+from threading import RLock
+from time import time
+
+from gofer.common import Singleton, synchronized
 
 SERVICE = 'passwd'
 PROMPT_ECHO_OFF = 1
@@ -131,9 +140,146 @@ class PamConversation(Structure):
     ]
 
 
+class Cache(object):
+    """
+    A bounded cache of PAM authentication results.
+    Keyed by user, service and a salted hash of the password.
+    The salt is random and never leaves the process.
+    :cvar LIMIT: The max number of cached results.
+    :type LIMIT: int
+    :cvar TTL: The time (seconds) successful results are cached.
+    :type TTL: float
+    :cvar NEGATIVE_TTL: The time (seconds) failed results are cached.
+    :type NEGATIVE_TTL: float
+    :ivar salt: The password hash salt.
+    :type salt: str
+    :ivar entries: Cached results by key.  Items of: (authenticated, expiration, n).
+    :type entries: dict
+    :ivar order: The insertion order.  Items of: (n, key).  Items for results
+        replaced or removed are stale and skipped.
+    :type order: deque
+    :ivar n: The insertion counter.
+    :type n: int
+    """
+
+    __metaclass__ = Singleton
+
+    LIMIT = 1000
+    TTL = 300
+    NEGATIVE_TTL = 5
+
+    def __init__(self):
+        self.__mutex = RLock()
+        self.salt = os.urandom(16)
+        self.entries = {}
+        self.order = deque()
+        self.n = 0
+
+    def key(self, user, password, service):
+        """
+        Get the cache key.
+        :param user: The username.
+        :type user: str
+        :param password: The password.
+        :type password: str
+        :param service: The PAM service.
+        :type service: str
+        :return: The key.
+        :rtype: tuple
+        """
+        if isinstance(password, unicode):
+            password = password.encode('utf-8')
+        digest = hmac.new(self.salt, password, sha256).hexdigest()
+        return user, service, digest
+
+    @synchronized
+    def get(self, user, password, service):
+        """
+        Get a cached result.
+        :param user: The username.
+        :type user: str
+        :param password: The password.
+        :type password: str
+        :param service: The PAM service.
+        :type service: str
+        :return: The cached result or None when not cached.
+        :rtype: bool
+        """
+        key = self.key(user, password, service)
+        try:
+            authenticated, expiration, _ = self.entries[key]
+        except KeyError:
+            return None
+        if expiration > time():
+            return authenticated
+        del self.entries[key]
+
+    @synchronized
+    def put(self, user, password, service, authenticated):
+        """
+        Cache a result.
+        The oldest result is dropped when the cache is full.
+        :param user: The username.
+        :type user: str
+        :param password: The password.
+        :type password: str
+        :param service: The PAM service.
+        :type service: str
+        :param authenticated: The result.
+        :type authenticated: bool
+        """
+        if authenticated:
+            ttl = Cache.TTL
+        else:
+            ttl = Cache.NEGATIVE_TTL
+        if not ttl:
+            return
+        key = self.key(user, password, service)
+        self.entries.pop(key, None)
+        while self.entries and len(self.entries) >= Cache.LIMIT:
+            self._evict()
+        self.n += 1
+        self.entries[key] = (authenticated, time() + ttl, self.n)
+        self.order.append((self.n, key))
+        if len(self.order) > 2 * Cache.LIMIT:
+            self._compact()
+
+    def _evict(self):
+        """
+        Drop the oldest result.
+        Stale insertion order items are skipped.
+        """
+        while True:
+            n, key = self.order.popleft()
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] == n:
+                del self.entries[key]
+                break
+
+    def _compact(self):
+        """
+        Drop stale insertion order items.
+        """
+        order = sorted((entry[2], key) for key, entry in self.entries.items())
+        self.order = deque(order)
+
+    @synchronized
+    def flush(self):
+        """
+        Flush all cached results.
+        :return: The number of results flushed.
+        :rtype: int
+        """
+        flushed = len(self.entries)
+        self.entries = {}
+        self.order = deque()
+        return flushed
+
+
 def authenticate(user, password, service=None):
     """
     Authenticate using PAM.
+    Results are cached.
     :param user: The username to authenticate.
     :type user: str
     :param password: The password to authenticate.
@@ -142,11 +288,18 @@ def authenticate(user, password, service=None):
     :return: True if authentication succeeds.
     :rtype: bool
     """
+    service = service or SERVICE
+    cache = Cache()
+    authenticated = cache.get(user, password, service)
+    if authenticated is not None:
+        return authenticated
     try:
-        return _authenticate(user, password, service or SERVICE)
+        authenticated = _authenticate(user, password, service)
     except Exception:
         log.exception('PAM authentication failed')
         return False
+    cache.put(user, password, service, authenticated)
+    return authenticated
 
 
 def _authenticate(user, password, service):
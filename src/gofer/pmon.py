@@ -17,8 +17,14 @@ Provides path and process monitoring classes.
 """
 
 import os
+import stat
+import struct
 
+from ctypes import CDLL, get_errno, c_int, c_char_p, c_uint32
+from ctypes.util import find_library
+from errno import EAGAIN, EINTR, ENOENT, ENOTDIR
 from hashlib import sha256
+from select import select, error as SelectError
 from threading import RLock
 from logging import getLogger
 from time import sleep
@@ -29,6 +35,170 @@ from gofer.common import Thread, synchronized, utf8
 log = getLogger(__name__)
 
 
+# --- inotify ----------------------------------------------------------------
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0x00080000
+
+# The events watched.
+IN_CHANGED = \
+    IN_MODIFY | \
+    IN_ATTRIB | \
+    IN_CLOSE_WRITE | \
+    IN_MOVED_FROM | \
+    IN_MOVED_TO | \
+    IN_CREATE | \
+    IN_DELETE | \
+    IN_DELETE_SELF | \
+    IN_MOVE_SELF
+
+# struct inotify_event (without the name).
+EVENT = struct.Struct('iIII')
+
+
+class Inotify(object):
+    """
+    Represents the (libc) inotify API.
+    """
+
+    libc = None
+    init = None
+    add_watch = None
+    rm_watch = None
+    loaded = False
+
+    @staticmethod
+    def load():
+        """
+        Load libc and bind the inotify functions.
+        The lib is only loaded once so this method can safely
+        be called multiple times.
+        """
+        if Inotify.loaded:
+            return
+
+        Inotify.libc = CDLL(find_library('c'), use_errno=True)
+
+        Inotify.init = Inotify.libc.inotify_init1
+        Inotify.init.restype = c_int
+        Inotify.init.argtypes = [c_int]
+
+        Inotify.add_watch = Inotify.libc.inotify_add_watch
+        Inotify.add_watch.restype = c_int
+        Inotify.add_watch.argtypes = [c_int, c_char_p, c_uint32]
+
+        Inotify.rm_watch = Inotify.libc.inotify_rm_watch
+        Inotify.rm_watch.restype = c_int
+        Inotify.rm_watch.argtypes = [c_int, c_int]
+
+        Inotify.loaded = True
+
+
+class Notifier(object):
+    """
+    Directory change notification (inotify).
+    :ivar fd: The inotify file descriptor.
+    :type fd: int
+    :ivar watches: Watch descriptors keyed by directory.
+    :type watches: dict
+    :ivar directories: Watched directories keyed by watch descriptor.
+    :type directories: dict
+    """
+
+    BUFSIZE = 0x10000
+
+    def __init__(self):
+        """
+        :raise OSError: inotify not supported.
+        """
+        Inotify.load()
+        self.fd = Inotify.init(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(get_errno(), 'inotify_init1() failed')
+        self.watches = {}
+        self.directories = {}
+
+    def fileno(self):
+        return self.fd
+
+    def watch(self, directory):
+        """
+        Watch a directory.
+        :param directory: The absolute path to a directory.
+        :type directory: str
+        :raise OSError: on failure.
+        """
+        if directory in self.watches:
+            return
+        wd = Inotify.add_watch(self.fd, directory, IN_CHANGED | IN_ONLYDIR)
+        if wd < 0:
+            raise OSError(get_errno(), 'inotify_add_watch() failed', directory)
+        self.watches[directory] = wd
+        self.directories[wd] = directory
+
+    def unwatch(self, directory):
+        """
+        Stop watching a directory.
+        :param directory: The absolute path to a directory.
+        :type directory: str
+        """
+        wd = self.watches.pop(directory, None)
+        if wd is None:
+            return
+        self.directories.pop(wd, None)
+        Inotify.rm_watch(self.fd, wd)
+
+    def read(self):
+        """
+        Read (pending) events.
+        A (None, '', IN_Q_OVERFLOW) event is returned when events
+        have been lost.
+        :return: List of: (directory, name, mask).
+        :rtype: list
+        """
+        try:
+            buf = os.read(self.fd, self.BUFSIZE)
+        except OSError, e:
+            if e.errno in (EAGAIN, EINTR):
+                return []
+            raise
+        events = []
+        offset = 0
+        while offset < len(buf):
+            wd, mask, cookie, n = EVENT.unpack_from(buf, offset)
+            offset += EVENT.size
+            name = buf[offset:offset + n].rstrip('\0')
+            offset += n
+            directory = self.directories.get(wd)
+            if mask & IN_IGNORED:
+                # watch removed
+                self.directories.pop(wd, None)
+                self.watches.pop(directory, None)
+            if directory is None and not mask & IN_Q_OVERFLOW:
+                continue
+            events.append((directory, name, mask))
+        return events
+
+    def close(self):
+        """
+        Close the inotify file descriptor.
+        """
+        os.close(self.fd)
+
+
 # --- utils ------------------------------------------------------------------
 
 
@@ -79,9 +249,110 @@ def digest(path):
     return None
 
 
+def status(path):
+    """
+    Get the status of a directory tree entry.
+    Only the inode is used for directories so that entries added
+    (or removed) are not reported as the directory being modified.
+    :param path: The absolute path to an entry.
+    :type path: str
+    :return: (inode, size, mtime) or None when not found.
+    :rtype: tuple
+    """
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if stat.S_ISDIR(st.st_mode):
+        return st.st_ino, 0, 0
+    else:
+        return st.st_ino, st.st_size, st.st_mtime
+
+
+def index(root):
+    """
+    Index a directory tree.
+    Symlinks are not followed.
+    :param root: The absolute path to a directory.
+    :type root: str
+    :return: Entry status keyed by path and the set of directories.
+    :rtype: tuple
+    """
+    entries = {}
+    directories = set()
+    for directory, dirs, files in os.walk(root):
+        for name in dirs:
+            path = os.path.join(directory, name)
+            entry = status(path)
+            if entry is None:
+                continue
+            entries[path] = entry
+            if not os.path.islink(path):
+                directories.add(path)
+        for name in files:
+            path = os.path.join(directory, name)
+            entry = status(path)
+            if entry is None:
+                continue
+            entries[path] = entry
+    return entries, directories
+
+
 # --- monitor ----------------------------------------------------------------
 
 
+class ChangeSet(object):
+    """
+    Changes to a directory tree.
+    :ivar added: Paths added.
+    :type added: list
+    :ivar modified: Paths modified.
+    :type modified: list
+    :ivar removed: Paths removed.
+    :type removed: list
+    """
+
+    @staticmethod
+    def diff(before, after):
+        """
+        Get the changes between two tree indexes.
+        :param before: An index.  Entry status keyed by path.
+        :type before: dict
+        :param after: An index.  Entry status keyed by path.
+        :type after: dict
+        :return: The changes.
+        :rtype: ChangeSet
+        """
+        changes = ChangeSet()
+        for path in sorted(after):
+            if path not in before:
+                changes.added.append(path)
+                continue
+            if before[path] != after[path]:
+                changes.modified.append(path)
+        for path in sorted(before):
+            if path not in after:
+                changes.removed.append(path)
+        return changes
+
+    def __init__(self):
+        self.added = []
+        self.modified = []
+        self.removed = []
+
+    def __len__(self):
+        return len(self.added) + len(self.modified) + len(self.removed)
+
+    def __unicode__(self):
+        return 'added:%d, modified:%d, removed:%d' % (
+            len(self.added),
+            len(self.modified),
+            len(self.removed))
+
+    def __str__(self):
+        return utf8(self)
+
+
 class Tracker(object):
     """
     Path monitoring tracker.
@@ -93,6 +364,8 @@ class Tracker(object):
     :type digest: str
     :ivar target: Called when path change detected.
     :type target: callable
+    :ivar watched: The path is watched for (inotify) change events.
+    :type watched: bool
     """
 
     def __init__(self, path, target):
@@ -106,6 +379,7 @@ class Tracker(object):
         self.last_modified = last_modified(path)
         self.digest = digest(path)
         self.target = target
+        self.watched = False
 
     def __call__(self, last_modified, digest):
         """
@@ -122,8 +396,61 @@ class Tracker(object):
         except Exception, e:
             log.info('path: "%s" call raised: "%s"', self, e)
 
+    def directories(self):
+        """
+        Get the directories to be watched for changes.
+        The first is the directory containing the path.
+        :return: List of directories.
+        :rtype: list
+        """
+        directories = [os.path.dirname(self.path)]
+        if os.path.isdir(self.path):
+            directories.append(self.path)
+        return directories
+
+    def affected(self, path, directory):
+        """
+        Get whether a change event affects the tracked path.
+        :param path: The path changed.
+        :type path: str
+        :param directory: The (watched) directory containing the path.
+        :type directory: str
+        :rtype: bool
+        """
+        return self.path in (path, directory)
+
+    def watching(self, directories):
+        """
+        Called when directories are added to those watched.
+        :param directories: The directories added.
+        :type directories: list
+        """
+        pass
+
+    def sniff(self, paths=None):
+        """
+        Sniff the path.
+          1. diff file modified times.
+          2. diff file hash.
+          3. target()
+        :param paths: The paths changed.  Not used.
+        :type paths: set
+        """
+        _last_modified = last_modified(self.path)
+        if _last_modified == self.last_modified:
+            # not touched
+            return
+        _digest = digest(self.path)
+        if _digest == self.digest:
+            # unchanged
+            return
+        self(_last_modified, _digest)
+
     def __eq__(self, other):
-        return self.path == other.path and self.target == other.target
+        return \
+            self.__class__ == other.__class__ and \
+            self.path == other.path and \
+            self.target == other.target
 
     def __hash__(self):
         return hash((self.path, self.target))
@@ -135,21 +462,213 @@ class Tracker(object):
         return utf8(self)
 
 
+class Tree(Tracker):
+    """
+    Directory tree monitoring tracker.
+    The status (inode, size, mtime) of every entry in the tree is indexed
+    and the target is called with the entries added, modified and removed.
+    :ivar index: Entry status keyed by path.
+    :type index: dict
+    :ivar dirs: The directories in the tree.
+    :type dirs: set
+    """
+
+    def __init__(self, path, target):
+        """
+        :param path: The absolute path to the tree (directory) to track.
+        :type path: str
+        :param target: Called when changes are detected.
+            Called as: target(path, changes).
+        :type target: callable
+        """
+        self.path = path
+        self.target = target
+        self.watched = False
+        self.index, self.dirs = index(path)
+
+    def __call__(self, changes):
+        """
+        Called when changes are detected.
+        :param changes: The changes detected.
+        :type changes: ChangeSet
+        """
+        try:
+            self.target(self.path, changes)
+        except Exception, e:
+            log.info('path: "%s" call raised: "%s"', self, e)
+
+    def directories(self):
+        """
+        Get the directories to be watched for changes.
+        The first is the directory containing the tree.
+        :return: List of directories.
+        :rtype: list
+        """
+        directories = [os.path.dirname(self.path)]
+        if os.path.isdir(self.path):
+            directories.append(self.path)
+            directories.extend(self.dirs)
+        return directories
+
+    def affected(self, path, directory):
+        """
+        Get whether a change event affects the tree.
+        :param path: The path changed.
+        :type path: str
+        :param directory: The (watched) directory containing the path.
+        :type directory: str
+        :rtype: bool
+        """
+        return path == self.path or path.startswith(self.path + os.sep)
+
+    def watching(self, directories):
+        """
+        Called when directories are added to those watched.
+        Entries created in the directories before being watched
+        are not reported by change events so the content of the
+        directories is checked.
+        :param directories: The directories added.
+        :type directories: list
+        """
+        paths = set()
+        for directory in directories:
+            if directory not in self.dirs:
+                continue
+            try:
+                for name in os.listdir(directory):
+                    paths.add(os.path.join(directory, name))
+            except OSError:
+                continue
+        if paths:
+            self.sniff(paths)
+
+    def sniff(self, paths=None):
+        """
+        Sniff the tree.
+        Only the changed paths are checked.  The whole tree is indexed
+        when the changed paths are not known or include the tree itself.
+        :param paths: The paths changed.
+        :type paths: set
+        """
+        if not paths or self.path in paths:
+            _index, dirs = index(self.path)
+            changes = ChangeSet.diff(self.index, _index)
+            self.index = _index
+            self.dirs = dirs
+        else:
+            changes = ChangeSet()
+            for path in sorted(paths):
+                self.update(path, changes)
+        if changes:
+            self(changes)
+
+    def update(self, path, changes):
+        """
+        Update the index for a changed path.
+        :param path: The changed path.
+        :type path: str
+        :param changes: Updated with the changes found.
+        :type changes: ChangeSet
+        """
+        entry = status(path)
+        previous = self.index.get(path)
+        if entry == previous:
+            # unchanged
+            return
+        if entry is None or path in self.dirs:
+            # removed or directory replaced
+            self.remove(path, changes)
+            previous = None
+        if entry is None:
+            return
+        if os.path.isdir(path) and not os.path.islink(path):
+            self.add(path, entry, changes)
+            return
+        if previous is None:
+            changes.added.append(path)
+        else:
+            changes.modified.append(path)
+        self.index[path] = entry
+
+    def add(self, path, entry, changes):
+        """
+        Add a directory (and its content) to the index.
+        :param path: The path to a directory.
+        :type path: str
+        :param entry: The directory status.
+        :type entry: tuple
+        :param changes: Updated with the paths added.
+        :type changes: ChangeSet
+        """
+        _index, dirs = index(path)
+        _index[path] = entry
+        dirs.add(path)
+        self.index.update(_index)
+        self.dirs.update(dirs)
+        changes.added.extend(sorted(_index))
+
+    def remove(self, path, changes):
+        """
+        Remove a path (and its content) from the index.
+        :param path: The path to remove.
+        :type path: str
+        :param changes: Updated with the paths removed.
+        :type changes: ChangeSet
+        """
+        prefix = path + os.sep
+        for p in sorted(self.index):
+            if p == path or p.startswith(prefix):
+                del self.index[p]
+                self.dirs.discard(p)
+                changes.removed.append(p)
+
+
 class PathMonitor(Thread):
     """
     Tracker monitor.
+    Paths are watched for change events using inotify.  The directory
+    containing each path is watched so that files replaced (renamed)
+    are detected.  Paths that cannot be watched (or when inotify is not
+    supported) are polled every *precision* seconds.  Directory trees
+    (recursive) are watched for changes to every entry in the tree.
     :ivar _paths: A list of paths to monitor.
     :type _paths: list path:[last_modified, digest, target, skip]
+    :ivar _notifier: The inotify notifier.  None when not supported.
+    :type _notifier: Notifier
+    :ivar _watched: Trackers keyed by watched directory.
+    :type _watched: dict
     :ivar __mutex: The mutex.
     :type __mutex: RLock
     """
 
-    def __init__(self, precision=1.0):
+    def __init__(self, precision=1.0, inotify=True):
+        """
+        :param precision: How often (seconds) paths not watched are polled.
+        :type precision: float
+        :param inotify: Use inotify when supported.
+        :type inotify: bool
+        """
         super(PathMonitor, self).__init__()
         self.__mutex = RLock()
         self._precision = precision
         self._paths = set()
+        self._notifier = None
+        self._watched = {}
         self.setDaemon(True)
+        if inotify:
+            self._notifier = self._inotify()
+
+    @staticmethod
+    def _inotify():
+        """
+        Get an inotify notifier.
+        :return: The notifier or None when not supported.
+        :rtype: Notifier
+        """
+        try:
+            return Notifier()
+        except (OSError, AttributeError), e:
+            log.info('inotify not supported, polling: %s', e)
 
     def shutdown(self):
         """
@@ -158,15 +677,26 @@ class PathMonitor(Thread):
         self.abort()
 
     @synchronized
-    def add(self, path, target):
+    def add(self, path, target, recursive=False):
         """
         Add a path to be monitored.
         :param path: An absolute path to monitor.
         :type path: str
         :param target: Called when a change at path is detected.
+            Called as: target(path) or target(path, changes) when recursive.
         :type target: callable
+        :param recursive: Monitor the directory tree at path.  The target
+            is passed the entries added, modified and removed.
+        :type recursive: bool
         """
-        self._paths.add(Tracker(path, target))
+        if recursive:
+            tracker = Tree(path, target)
+        else:
+            tracker = Tracker(path, target)
+        if tracker in self._paths:
+            return
+        self._paths.add(tracker)
+        self._watch(tracker)
 
     @synchronized
     def delete(self, path, target):
@@ -177,10 +707,10 @@ class PathMonitor(Thread):
         :param target: Called when a change at path is detected.
         :type target: callable
         """
-        try:
-            self._paths.remove(Tracker(path, target))
-        except KeyError:
-            pass
+        for tracker in list(self._paths):
+            if tracker.path == path and tracker.target == target:
+                self._paths.remove(tracker)
+                self._unwatch(tracker)
 
     @synchronized
     def paths(self):
@@ -197,26 +727,128 @@ class PathMonitor(Thread):
         """
         delay = self._precision
         while not Thread.aborted():
-            sleep(delay)
+            changed = self._wait(delay)
             for tracker in self.paths():
-                self._sniff(tracker)
+                if tracker.watched and tracker not in changed:
+                    continue
+                self._sniff(tracker, changed.get(tracker))
+                added = self._watch(tracker)
+                if added:
+                    tracker.watching(added)
+        self._close()
+
+    @synchronized
+    def _close(self):
+        """
+        Close the notifier.
+        Paths are no longer watched.
+        """
+        if self._notifier is None:
+            return
+        self._notifier.close()
+        self._notifier = None
+        self._watched = {}
+
+    def _wait(self, delay):
+        """
+        Wait for change events.
+        :param delay: The max time (seconds) to wait.
+        :type delay: float
+        :return: The paths changed keyed by affected tracker.
+        :rtype: dict
+        """
+        if self._notifier is None:
+            sleep(delay)
+            return {}
+        try:
+            readable, _, _ = select([self._notifier], [], [], delay)
+        except SelectError, e:
+            if e.args[0] != EINTR:
+                raise
+            readable = []
+        if readable:
+            return self._changed(self._notifier.read())
+        else:
+            return {}
+
+    @synchronized
+    def _changed(self, events):
+        """
+        Get the trackers affected by change events.
+        :param events: List of: (directory, name, mask).
+        :type events: list
+        :return: The paths changed keyed by affected tracker.
+            None when the paths changed are not known.
+        :rtype: dict
+        """
+        changed = {}
+        for directory, name, mask in events:
+            if mask & IN_Q_OVERFLOW:
+                return dict.fromkeys(self._paths)
+            path = os.path.join(directory, name) if name else directory
+            for tracker in self._watched.get(directory, ()):
+                if tracker.affected(path, directory):
+                    changed.setdefault(tracker, set()).add(path)
+        return changed
+
+    @synchronized
+    def _watch(self, tracker):
+        """
+        Watch the tracked path for change events.
+        The directories needed by the tracker are watched.  The path is
+        polled unless the containing directory and others that exist are
+        watched.  Directories no longer needed are no longer watched.
+        :param tracker: A tracked path.
+        :type tracker: Tracker
+        :return: The directories added to those watched.
+        :rtype: list
+        """
+        added = []
+        if self._notifier is None:
+            return added
+        if tracker not in self._paths:
+            # deleted
+            return added
+        directories = tracker.directories()
+        tracker.watched = True
+        for n, directory in enumerate(directories):
+            try:
+                if directory not in self._notifier.watches:
+                    self._notifier.watch(directory)
+                    added.append(directory)
+                self._watched.setdefault(directory, set()).add(tracker)
+            except OSError, e:
+                if n == 0 or e.errno not in (ENOENT, ENOTDIR):
+                    tracker.watched = False
+                log.debug('path: "%s" not watched: %s', directory, e)
+        self._unwatch(tracker, directories)
+        return added
 
-    def _sniff(self, tracker):
+    def _unwatch(self, tracker, keep=()):
+        """
+        Stop watching the tracked path.
+        Directories are no longer watched once not needed by any tracker.
+        :param tracker: A tracked path.
+        :type tracker: Tracker
+        :param keep: Directories to remain watched for the tracker.
+        :type keep: list
+        """
+        keep = set(keep)
+        for directory, trackers in self._watched.items():
+            if directory in keep:
+                continue
+            trackers.discard(tracker)
+            if trackers:
+                continue
+            del self._watched[directory]
+            self._notifier.unwatch(directory)
+
+    def _sniff(self, tracker, paths=None):
         """
         Sniff the path.
-          1. diff file modified times.
-          2. diff file hash.
-          3. target()
         :param tracker: A path to sniff.
         :type tracker: Tracker
+        :param paths: The paths changed.  None when not known.
+        :type paths: set
         """
-        path = tracker.path
-        _last_modified = last_modified(path)
-        if _last_modified == tracker.last_modified:
-            # not touched
-            return
-        _digest = digest(path)
-        if _digest == tracker.digest:
-            # unchanged
-            return
-        tracker(_last_modified, _digest)
+        tracker.sniff(paths)
@@ -22,6 +22,7 @@ from logging import getLogger
 from gofer.common import utf8
 from gofer.messaging import Document, Consumer
 from gofer.rmi.dispatcher import Reply, Return, RemoteException
+from gofer.rmi.context import NOTIFY
 
 
 log = getLogger(__name__)
@@ -50,6 +51,16 @@ class ReplyConsumer(Consumer):
         self.listener = None
         self.blacklist = set()
 
+    @property
+    def notify(self):
+        """
+        The status notifications needed by the listener.
+        Intended to be passed as the *notify* option by callers
+        specifying this consumer's queue as the reply address.
+        :rtype: list
+        """
+        return subscription(self.listener)
+
     def start(self, listener):
         """
         Start processing messages on the queue and
@@ -104,6 +115,31 @@ class ReplyConsumer(Consumer):
             log.exception(document)
 
 
+def subscription(listener):
+    """
+    Get the status notifications needed by a reply listener.
+    A callable listener needs all of them.  Otherwise, only those
+    handled by methods overriding the Listener methods.
+    :param listener: A reply listener.
+    :type listener: Listener or callable.
+    :return: The list of status notifications.
+    :rtype: list
+    """
+    if listener is None:
+        return []
+    if callable(listener):
+        return list(NOTIFY)
+    statuses = []
+    for status in NOTIFY:
+        method = getattr(listener, status, None)
+        if method is None:
+            continue
+        if getattr(method, 'im_func', None) is getattr(Listener, status).im_func:
+            continue
+        statuses.append(status)
+    return statuses
+
+
 class AsyncReply:
     """
     Asynchronous request reply.
@@ -17,6 +17,7 @@ from logging import getLogger
 
 from gofer.messaging import Consumer, Producer, Document
 from gofer.metrics import timestamp
+from gofer.rmi.context import subscribed
 
 log = getLogger(__name__)
 
@@ -88,9 +89,10 @@ class RequestConsumer(Consumer):
     def dispatch(self, request):
         """
         Dispatch received request.
-        Update the request: inject the inbound_url.
+        The accepted status is sent when subscribed.
         :param request: The received request.
         :type request: Document
         """
-        self.send(request, 'accepted')
+        if subscribed(request, 'accepted'):
+            self.send(request, 'accepted')
         self.scheduler.add(request)
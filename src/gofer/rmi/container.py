@@ -48,6 +48,10 @@ class Container(object):
           (str) An optional AMQP exchange used for synchronous replies.
       - reply
           (str) An AMQP reply address.
+      - notify
+          (list) The status notifications (accepted|started|progress)
+          to be sent to the reply address.  Default: only progress and
+          only when a progress callback is specified.
       - trigger
           (int) The trigger type (0=auto|1=manual).
       - data
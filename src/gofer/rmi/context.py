@@ -13,8 +13,10 @@
 # Jeff Ortel <jortel@redhat.com>
 #
 from logging import getLogger
+from threading import RLock, Timer
+from time import time
 
-from gofer.common import Local
+from gofer.common import Local, synchronized
 from gofer.rmi.tracker import Tracker
 from gofer.messaging import Producer
 
@@ -22,6 +24,29 @@ from gofer.messaging import Producer
 log = getLogger(__name__)
 
 
+# Status notifications that can be subscribed to.
+# The final reply and the *rejected* status are always sent.
+NOTIFY = ('accepted', 'started', 'progress')
+
+
+def subscribed(request, status):
+    """
+    Get whether the caller has subscribed to the specified status
+    notification.  Requests that do not contain a subscription (notify)
+    are subscribed to all.
+    :param request: The received request.
+    :type request: gofer.messaging.Document
+    :param status: A status (accepted|started|progress).
+    :type status: str
+    :return: True if subscribed.
+    :rtype: bool
+    """
+    notify = request.notify
+    if notify is None:
+        return True
+    return status in notify
+
+
 class Context(object):
     """
     Remote method invocation context.
@@ -32,6 +57,9 @@ class Context(object):
     :type progress: Progress
     :ivar cancelled: Provides cancellation status.
     :type cancelled: Cancelled
+    :ivar workers: The (optional) pool of pre-forked worker
+        processes used by the fork call model.
+    :type workers: gofer.rmi.model.prefork.Pool
     """
 
     _current = Local()
@@ -57,7 +85,7 @@ class Context(object):
         except AttributeError:
             return None
 
-    def __init__(self, sn, progress, cancelled):
+    def __init__(self, sn, progress, cancelled, workers=None):
         """
         :param sn: The current request serial number.
         :type  sn: str
@@ -65,41 +93,197 @@ class Context(object):
         :type  progress: Progress
         :param cancelled: Provides cancellation status.
         :type  cancelled: Cancelled
+        :param workers: The (optional) pool of pre-forked worker processes.
+        :type  workers: gofer.rmi.model.prefork.Pool
         """
         self.sn = sn
         self.progress = progress
         self.cancelled = cancelled
+        self.workers = workers
 
 
-class Progress(object):
+def concatenated(details, chunk):
     """
-    Provides support for progress reporting.
-    :ivar request: The current request.
-    :type request: gofer.messaging.Document
-    :ivar producer: An open AMQP producer.
-    :type producer: gofer.messaging.Producer
+    Concatenate a chunk of details.
+    :param details: The details.
+    :type details: object
+    :param chunk: A chunk of details.
+    :type chunk: object
+    :return: The concatenated details.  The chunk when
+        the details cannot be concatenated.
+    :rtype: object
+    """
+    for kind in (basestring, list, tuple):
+        if isinstance(details, kind) and isinstance(chunk, kind):
+            return details + chunk
+    return chunk
+
+
+class Reporter(object):
+    """
+    Rate-limited progress reporting.
+    Reports made within the interval of the last report sent are
+    coalesced.  Only the latest state is sent when the interval
+    expires (trailing edge) or when flushed.  Details reported as
+    chunks are appended until sent.
+    :ivar interval: The minimum interval (seconds) between reports.  0=unlimited.
+    :type interval: float
+    :ivar sent: When the last report was sent (epoch seconds).
+    :type sent: float
+    :ivar pending: A report has been coalesced and not yet sent.
+    :type pending: bool
+    :ivar timer: Sends the coalesced report when the interval expires.
+    :type timer: Timer
     :ivar total: The total work units.
     :type total: int
     :ivar completed: The completed work units.
     :type completed: int
     :ivar details: The reported details.
     :type details: object
+    :ivar appended: The details have been reported as chunks.
+    :type appended: bool
+    """
+
+    def __init__(self, interval=0):
+        """
+        :param interval: The minimum interval (seconds) between reports.
+        :type interval: float
+        """
+        self.__mutex = RLock()
+        self.interval = interval
+        self.sent = 0
+        self.pending = False
+        self.timer = None
+        self.total = 0
+        self.completed = 0
+        self.details = {}
+        self.appended = False
+
+    @synchronized
+    def report(self, details=None):
+        """
+        Report progress.
+        The report is sent unless reported within the interval.
+        Otherwise, it is sent when the interval expires.
+        :param details: An (optional) chunk of details.  Appended to
+            the details reported (as chunks) but not yet sent.
+        :type details: object
+        """
+        if details is not None:
+            self._append(details)
+        elapsed = time() - self.sent
+        if elapsed < self.interval:
+            self.pending = True
+            self._schedule(self.interval - elapsed)
+            return
+        self._send()
+
+    @synchronized
+    def flush(self):
+        """
+        Send the coalesced report (if any).
+        """
+        self.close()
+        if not self.pending:
+            return
+        self._send()
+
+    @synchronized
+    def close(self):
+        """
+        Cancel the trailing-edge send of the coalesced report.
+        """
+        if self.timer is None:
+            return
+        self.timer.cancel()
+        self.timer = None
+
+    def _schedule(self, delay):
+        """
+        Schedule the trailing-edge send of the coalesced report.
+        :param delay: Seconds until the interval expires.
+        :type delay: float
+        """
+        if self.timer is not None:
+            return
+        self.timer = Timer(delay, self._expired)
+        self.timer.setDaemon(True)
+        self.timer.start()
+
+    @synchronized
+    def _expired(self):
+        """
+        The interval has expired.
+        Send the coalesced report (if any).
+        """
+        self.timer = None
+        if not self.pending:
+            return
+        self._send()
+
+    def _append(self, details):
+        """
+        Append a chunk of details.
+        Dictionaries are appended by key.  Strings, lists and tuples
+        are concatenated.  Otherwise, the chunk replaces the details.
+        :param details: A chunk of details.
+        :type details: object
+        """
+        if not self.appended or not self.details:
+            if isinstance(details, dict):
+                details = dict(details)
+            self.details = details
+        elif isinstance(self.details, dict) and isinstance(details, dict):
+            for key, chunk in details.items():
+                self.details[key] = concatenated(self.details.get(key), chunk)
+        else:
+            self.details = concatenated(self.details, details)
+        self.appended = True
+
+    def _send(self):
+        """
+        Send the report.
+        Details reported as chunks are cleared once sent.
+        """
+        self.pending = False
+        self.sent = time()
+        try:
+            self.send()
+        finally:
+            if self.appended:
+                self.details = {}
+                self.appended = False
+
+    def send(self):
+        """
+        Send the progress report.
+        """
+        raise NotImplementedError()
+
+
+class Progress(Reporter):
+    """
+    Provides support for progress reporting.
+    :ivar request: The current request.
+    :type request: gofer.messaging.Document
+    :ivar producer: An open AMQP producer.
+    :type producer: gofer.messaging.Producer
     """
 
-    def __init__(self, request, producer):
+    def __init__(self, request, producer, interval=0):
         """
         :param request: The current request.
         :type request: gofer.messaging.Document
         :param producer: An open AMQP producer.
         :type producer: gofer.messaging.Producer
+        :param interval: The minimum interval (seconds) between reports.
+        :type interval: float
         """
+        super(Progress, self).__init__(interval)
         self.request = request
         self.producer = producer
-        self.total = 0
-        self.completed = 0
-        self.details = {}
 
-    def report(self):
+    def send(self):
         """
         Send the progress report.
         """
@@ -108,6 +292,8 @@ class Progress(object):
         address = self.request.replyto
         if not address:
             return
+        if not subscribed(self.request, 'progress'):
+            return
         try:
             self.producer.send(
                 address,
@@ -142,6 +328,14 @@ class Cancelled(object):
     def __call__(self):
         return self.tracker.cancelled(self.sn)
 
+    def watch(self):
+        """
+        Watch for cancellation.
+        :return: A selectable watch.  Must be closed.
+        :rtype: gofer.rmi.tracker.Watch
+        """
+        return self.tracker.watch(self.sn)
+
     def __del__(self):
         try:
             self.tracker.remove(self.sn)
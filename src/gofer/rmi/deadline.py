@@ -0,0 +1,237 @@
+#
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+#
+# Jeff Ortel <jortel@redhat.com>
+#
+
+"""
+Enforces RMI call timeouts.
+"""
+
+from ctypes import pythonapi, py_object, c_long
+from heapq import heappush, heappop
+from logging import getLogger
+from threading import RLock, Condition, current_thread
+from time import time
+
+from gofer.common import Thread, synchronized, conditional
+from gofer.metrics import Counter
+from gofer.rmi.context import Context
+from gofer.rmi.tracker import Tracker
+
+
+log = getLogger(__name__)
+
+
+class CallTimeout(Exception):
+    """
+    The RMI call did not complete within the timeout.
+    """
+
+    def __init__(self, timeout):
+        """
+        :param timeout: The timeout (seconds).
+        :type timeout: float
+        """
+        Exception.__init__(self, 'call timeout after %s (seconds)' % timeout)
+
+
+def interrupt(thread, exception):
+    """
+    Raise an (async) exception in the specified thread.
+    The exception is raised when the thread next executes python code.
+    :param thread: The thread to be interrupted.
+    :type thread: threading.Thread
+    :param exception: The exception class.  None clears a pending exception.
+    :type exception: type
+    :return: True if the thread was found.
+    :rtype: bool
+    """
+    if exception is not None:
+        exception = py_object(exception)
+    n = pythonapi.PyThreadState_SetAsyncExc(c_long(thread.ident), exception)
+    return n == 1
+
+
+class Deadline(object):
+    """
+    The deadline of an RMI call running in the current thread.
+    When expired, the call is flagged as cancelled.  Calls that are safe
+    to interrupt (direct model) are interrupted by raising CallTimeout in
+    the thread and, when running on a thread pool worker, the worker is
+    replaced so that pool capacity is restored.
+    :cvar expired: The number of deadlines expired (total).
+    :type expired: Counter
+    :ivar timeout: The timeout (seconds).  None=unlimited.
+    :type timeout: float
+    :ivar interruptible: The call may be interrupted.
+    :type interruptible: bool
+    :ivar thread: The thread running the call.
+    :type thread: threading.Thread
+    :ivar sn: The request serial number.
+    :type sn: str
+    :ivar at: The deadline (epoch seconds).
+    :type at: float
+    :ivar done: The call has completed.
+    :type done: bool
+    :ivar timed_out: The deadline has been reached.
+    :type timed_out: bool
+    :ivar interrupted: The thread has been interrupted.
+    :type interrupted: bool
+    """
+
+    expired = Counter()
+
+    def __init__(self, timeout, interruptible=False):
+        """
+        :param timeout: The timeout (seconds).  None=unlimited.
+        :type timeout: float
+        :param interruptible: The call may be interrupted.
+        :type interruptible: bool
+        """
+        self.__mutex = RLock()
+        self.timeout = timeout
+        self.interruptible = interruptible
+        self.thread = current_thread()
+        self.sn = getattr(Context.current(), 'sn', None)
+        self.at = 0
+        self.done = False
+        self.timed_out = False
+        self.interrupted = False
+
+    def start(self):
+        """
+        Start the clock.
+        """
+        if not self.timeout:
+            return
+        self.at = time() + self.timeout
+        Watchdog.instance().add(self)
+
+    @synchronized
+    def stop(self):
+        """
+        Stop the clock.
+        A pending interrupt (not yet raised) is cleared.
+        :raise CallTimeout: when the deadline has been reached.
+        """
+        self.done = True
+        if self.interrupted:
+            interrupt(self.thread, None)
+        if self.timed_out:
+            raise CallTimeout(self.timeout)
+
+    @synchronized
+    def expire(self):
+        """
+        The deadline has been reached.
+        """
+        if self.done:
+            return
+        self.timed_out = True
+        Deadline.expired.increment()
+        log.warn('call: sn=%s, timeout after %s (seconds)', self.sn, self.timeout)
+        self.cancel()
+        if not self.interruptible:
+            return
+        self.interrupted = interrupt(self.thread, CallTimeout)
+        pool = getattr(self.thread, 'pool', None)
+        if pool is not None:
+            pool.replace(self.thread)
+
+    def cancel(self):
+        """
+        Flag the call as cancelled.
+        """
+        if not self.sn:
+            return
+        try:
+            Tracker().cancel(self.sn)
+        except Exception:
+            log.debug('sn=%s, not tracked', self.sn)
+
+
+class Watchdog(Thread):
+    """
+    Expires call deadlines.
+    :ivar heap: Deadlines ordered by time.  Items of: (at, n, Deadline).
+    :type heap: list
+    :ivar n: Used to order deadlines with the same time.
+    :type n: int
+    """
+
+    __lock = RLock()
+    __inst = None
+
+    @staticmethod
+    def instance():
+        """
+        Get the (running) watchdog.
+        Created on first use.
+        :rtype: Watchdog
+        """
+        Watchdog.__lock.acquire()
+        try:
+            if Watchdog.__inst is None:
+                Watchdog.__inst = Watchdog()
+                Watchdog.__inst.start()
+            return Watchdog.__inst
+        finally:
+            Watchdog.__lock.release()
+
+    def __init__(self):
+        Thread.__init__(self, name='watchdog')
+        self.__condition = Condition()
+        self.heap = []
+        self.n = 0
+        self.setDaemon(True)
+
+    @conditional
+    def add(self, deadline):
+        """
+        Add a deadline.
+        :param deadline: A started deadline.
+        :type deadline: Deadline
+        """
+        self.n += 1
+        heappush(self.heap, (deadline.at, self.n, deadline))
+        self.__condition.notify()
+
+    @conditional
+    def next(self):
+        """
+        Wait for the next deadline to be reached.
+        Deadlines for completed calls are discarded.
+        :return: The reached deadline.
+        :rtype: Deadline
+        """
+        while True:
+            while self.heap and self.heap[0][2].done:
+                heappop(self.heap)
+            if self.heap:
+                delay = self.heap[0][0] - time()
+                if delay <= 0:
+                    return heappop(self.heap)[2]
+            else:
+                delay = None
+            self.__condition.wait(delay)
+
+    def run(self):
+        """
+        Expire deadlines as they are reached.
+        """
+        while not Thread.aborted():
+            deadline = self.next()
+            try:
+                deadline.expire()
+            except Exception:
+                log.exception('deadline: sn=%s', deadline.sn)
@@ -25,7 +25,9 @@ from gofer import NAME
 from gofer.common import Options, utf8, new
 from gofer.messaging import Document
 from gofer.pam import authenticate as pam_authenticate
-from gofer.rmi.model import ALL
+from gofer.rmi.deadline import Deadline
+from gofer.rmi.model import ALL, DIRECT
+from gofer.rmi.scope import ALL as SCOPES, REQUEST, POOLED, Pooled
 
 from logging import getLogger
 
@@ -318,71 +320,142 @@ class Request(Document):
     pass
 
 
+class Target(object):
+    """
+    A compiled RMI target.
+    Everything needed to dispatch a call that can be resolved when
+    the plugin is loaded rather than on each request.
+    :ivar name: The target name: <classname>.<method>.
+    :type name: str
+    :ivar owner: The cataloged class, module or object.
+    :type owner: (class|module|object)
+    :ivar method: The method name.
+    :type method: str
+    :ivar fninfo: The *gofer* metadata added by decorators.
+    :type fninfo: Options
+    :ivar security: The compiled security stack.
+    :type security: Security
+    :ivar model: The call model name.
+    :type model: str
+    :ivar timeout: The (optional) call timeout (seconds).
+    :type timeout: float
+    :ivar argspec: The function argument specification.
+    :type argspec: inspect.ArgSpec
+    :ivar implicit: The function is called with an implicit (self) argument
+        that is not known until the owner is instantiated.
+    :type implicit: bool
+    :ivar scope: The instance scope when the owner is a class.
+    :type scope: gofer.rmi.scope.Scope
+    """
+
+    def __init__(self, classname, owner, method, fn, fninfo, scope=None):
+        """
+        :param classname: The cataloged name.
+        :type classname: str
+        :param owner: The cataloged class, module or object.
+        :type owner: (class|module|object)
+        :param method: The method name.
+        :type method: str
+        :param fn: The method (as found on the owner).
+        :type fn: (method|function)
+        :param fninfo: The *gofer* metadata added by decorators.
+        :type fninfo: Options
+        :param scope: The instance scope when the owner is a class.
+        :type scope: gofer.rmi.scope.Scope
+        """
+        self.name = '.'.join((classname, method))
+        self.owner = owner
+        self.method = method
+        self.fninfo = fninfo
+        self.security = Security(self, fninfo)
+        self.model = fninfo.call.model
+        self.timeout = fninfo.call.timeout
+        self.argspec = inspect.getargspec(fn)
+        self.implicit = inspect.ismethod(fn) and fn.im_self is None
+        self.scope = scope
+        self.fn = fn
+
+    def instance(self, request):
+        """
+        Get the object on which the method is invoked.
+        Instances of cataloged classes are provided by the scope
+        using the (optional) constructor arguments in the request.
+        :param request: The request document.
+        :type request: Request
+        :return: The object.
+        :rtype: (object|module)
+        """
+        if self.scope is not None:
+            return self.scope.get(RMI.constructor(request))
+        else:
+            return self.owner
+
+    def release(self, request, inst):
+        """
+        Release the object returned by instance().
+        :param request: The request document.
+        :type request: Request
+        :param inst: The object returned by instance().
+        :type inst: (object|module)
+        """
+        if self.scope is not None:
+            self.scope.put(RMI.constructor(request), inst)
+
+    def bind(self, inst):
+        """
+        Get the method bound to the specified object.
+        :param inst: An object returned by instance().
+        :type inst: (object|module)
+        :return: The method.
+        :rtype: (method|function)
+        """
+        return getattr(inst, self.method)
+
+    def check(self, args, kwargs):
+        """
+        Validate the arguments against the argument specification.
+        :param args: The positional arguments.
+        :type args: list
+        :param kwargs: The keyword arguments.
+        :type kwargs: dict
+        :raise TypeError: When the arguments do not match.
+        """
+        if self.implicit:
+            args = [None] + list(args)
+        inspect.getcallargs(self.fn, *args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
 class RMI(object):
     """
     The RMI object performs the invocation.
+    :ivar name: The target name: <classname>.<method>.
+    :type name: str
     :ivar request: The request document.
     :type request: Request
-    :ivar catalog: A dict of class mappings.
-    :type catalog: dict
+    :ivar auth: Authentication properties.
+    :type auth: Options
+    :ivar target: The compiled target.
+    :type target: Target
     """
 
-    def __init__(self, request, auth, catalog):
+    def __init__(self, request, auth, target):
         """
         :param request: The request document.
         :type request: Request
         :param auth: Authentication properties.
         :type auth: Options
-        :param catalog: A dict of class mappings.
-        :type catalog: dict
+        :param target: The compiled target.
+        :type target: Target
         """
-        self.name = '.'.join((request.classname, request.method))
+        self.name = target.name
         self.request = request
         self.auth = auth
-        self.inst = self.find_class(request, catalog)
-        self.method = self.find_method(request, self.inst)
-        self.args = request.args
-        self.kwargs = request.kws
-
-    @staticmethod
-    def find_class(request, catalog):
-        """
-        Get an instance of the class or module specified in
-        the request using the catalog.
-        :param request: The request document.
-        :type request: Request
-        :param catalog: A dict of class mappings.
-        :type catalog: dict
-        :return: An instance.
-        :rtype: (class|module)
-        """
-        key = request.classname
-        inst = catalog.get(key, None)
-        if inst is None:
-            raise ClassNotFound(key)
-        if inspect.isclass(inst):
-            args, keywords = RMI.constructor(request)
-            return inst(*args, **keywords)
-        else:
-            return inst
-
-    @staticmethod
-    def find_method(request, inst):
-        """
-        Get method of the class specified in the request.
-        Ensures that remote invocation is permitted.
-        :param request: The request document.
-        :type request: Request
-        :param inst: A class or module object.
-        :type inst: (class|module)
-        :return: The requested method.
-        :rtype: (method|function)
-        """
-        cn, fn = (request.classname, request.method)
-        if hasattr(inst, fn):
-            return getattr(inst, fn)
-        else:
-            raise MethodNotFound(cn, fn)
+        self.target = target
+        self.args = request.args or []
+        self.kwargs = request.kws or {}
 
     @staticmethod
     def fn(method):
@@ -429,28 +502,36 @@ class RMI(object):
     def permitted(self):
         """
         Check whether remote invocation of the specified method is permitted.
-        Applies security model using Security.
+        Applies the compiled security model.
         """
-        fninfo = RMI.fninfo(self.method)
-        if fninfo is None:
-            raise NotPermitted(self)
-        security = Security(self, fninfo)
-        security.apply(self.auth)
+        self.target.security.apply(self.auth)
 
     def __call__(self):
         """
         Invoke the method.
+        The call is subject to the (optional) timeout.
         :return: The invocation result.
         :rtype: Return
         """
+        target = self.target
         try:
             self.permitted()
-            fninfo = RMI.fninfo(self.method)
-            model = ALL[fninfo.call.model](self.method, *self.args, **self.kwargs)
-            retval = model()
+            target.check(self.args, self.kwargs)
+            inst = target.instance(self.request)
+            try:
+                method = target.bind(inst)
+                model = ALL[target.model](method, *self.args, **self.kwargs)
+                deadline = Deadline(target.timeout, target.model == DIRECT)
+                deadline.start()
+                try:
+                    retval = model()
+                finally:
+                    deadline.stop()
+            finally:
+                target.release(self.request, inst)
             return Return.succeed(retval)
         except Exception:
-            log.exception(utf8(self.method))
+            log.exception(utf8(self.name))
             return Return.exception()
 
     def __unicode__(self):
@@ -478,7 +559,7 @@ class Security:
     def __init__(self, method, fninfo):
         """
         :param method: The method name.
-        :type method: RMI
+        :type method: Target
         :param fninfo: The decorated function info.
         :type fninfo: Options
         """
@@ -579,6 +660,11 @@ class Dispatcher:
     The remote invocation dispatcher.
     :ivar catalog: The (catalog) of target classes.
     :type catalog: dict
+    :ivar table: The compiled dispatch table.
+        Keyed by <classname>.<method>.
+    :type table: dict
+    :ivar scopes: Instance scopes keyed by: (class, name, size).
+    :type scopes: dict
     """
 
     @staticmethod
@@ -604,6 +690,87 @@ class Dispatcher:
         :type classes: list
         """
         self.catalog = dict([(c.__name__, c) for c in classes or []])
+        self.table = {}
+        self.scopes = {}
+        self.compile()
+
+    def compile(self):
+        """
+        Compile the dispatch table.
+        Every method (or function) decorated as *remote* in the
+        catalog is resolved and added to the table.
+        """
+        table = {}
+        for classname, owner in self.catalog.items():
+            for method, fn in inspect.getmembers(owner, inspect.isroutine):
+                fninfo = RMI.fninfo(fn)
+                if fninfo is None:
+                    continue
+                scope = self.scope(owner, fninfo)
+                target = Target(classname, owner, method, fn, fninfo, scope)
+                table[target.name] = target
+        self.table = table
+        log.debug('compiled: %d targets', len(table))
+
+    def scope(self, owner, fninfo):
+        """
+        Get the instance scope for a method.
+        Specified on the method (@remote) or the class (@scope).
+        Methods with the same scope specification share the scope.
+        :param owner: The cataloged class, module or object.
+        :type owner: (class|module|object)
+        :param fninfo: The *gofer* metadata added by decorators.
+        :type fninfo: Options
+        :return: The scope or None when the owner is not a class.
+        :rtype: gofer.rmi.scope.Scope
+        """
+        if not inspect.isclass(owner):
+            return
+        spec = fninfo.call.scope
+        if not spec:
+            spec = getattr(getattr(owner, NAME, None), 'scope', None)
+        if not spec:
+            spec = Options(name=REQUEST, size=1)
+        key = (owner, spec.name, spec.size)
+        try:
+            return self.scopes[key]
+        except KeyError:
+            if spec.name == POOLED:
+                scope = Pooled(owner, spec.size)
+            else:
+                scope = SCOPES[spec.name](owner)
+            self.scopes[key] = scope
+            return scope
+
+    def close(self):
+        """
+        Close instance scopes.
+        Instances are torn down.
+        """
+        for scope in self.scopes.values():
+            scope.close()
+
+    def find(self, request):
+        """
+        Find the compiled target for the request.
+        :param request: The request document.
+        :type request: Request
+        :return: The target.
+        :rtype: Target
+        :raise ClassNotFound: When the class is not cataloged.
+        :raise MethodNotFound: When the method is not defined.
+        :raise NotPermitted: When the method is not decorated as *remote*.
+        """
+        name = '.'.join((request.classname, request.method))
+        try:
+            return self.table[name]
+        except KeyError:
+            owner = self.catalog.get(request.classname)
+            if owner is None:
+                raise ClassNotFound(request.classname)
+            if not hasattr(owner, request.method):
+                raise MethodNotFound(request.classname, request.method)
+            raise NotPermitted(Options(name=name))
 
     def provides(self, name):
         """
@@ -628,7 +795,7 @@ class Dispatcher:
             auth = self.auth(document)
             request = Request(document.request)
             log.debug('request: %s', request)
-            method = RMI(request, auth, self.catalog)
+            method = RMI(request, auth, self.find(request))
             log.debug('method: %s', method)
             return method()
         except Exception:
@@ -638,10 +805,12 @@ class Dispatcher:
     def __iadd__(self, other):
         if isinstance(other, Dispatcher):
             self.catalog.update(other.catalog)
+            self.compile()
             return self
         if isinstance(other, list):
             other = dict([(c.__name__, c) for c in other])
             self.catalog.update(other)
+            self.compile()
             return self
         return self
 
@@ -650,6 +819,7 @@ class Dispatcher:
 
     def __setitem__(self, key, value):
         self.catalog[key] = value
+        self.compile()
 
     def __iter__(self):
         _list = []
@@ -661,4 +831,4 @@ class Dispatcher:
                 if RMI.fninfo(fn[1]):
                     _list.append(fn[1])
                 continue
-        return iter(_list)
\ No newline at end of file
+        return iter(_list)
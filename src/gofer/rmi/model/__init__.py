@@ -34,3 +34,12 @@ def valid_model(model):
         return model
     else:
         raise ValueError('model must be: %s' % '|'.join(ALL))
+
+
+def valid_timeout(timeout):
+    if timeout is None:
+        return timeout
+    if isinstance(timeout, (int, float)) and timeout > 0:
+        return timeout
+    else:
+        raise ValueError('timeout must be: > 0 (seconds)')
@@ -14,26 +14,75 @@
 #
 
 from logging import getLogger
+from types import MethodType
 
 from gofer import utf8
-from gofer.rmi.context import Context
+from gofer.rmi.context import Context, Reporter
 from gofer.rmi.model import protocol
 
 
 log = getLogger(__name__)
 
 
+# Results (pickled reply) larger than this (bytes)
+# are sent to the parent using shared memory.
+THRESHOLD = 0x80000
+
+# Progress is relayed to the parent at most this
+# often (seconds).  The parent applies the plugin
+# configured interval to the reports sent.
+INTERVAL = 0.1
+
+
+def reduce_method(method):
+    """
+    Reduce a method for pickling.
+    Methods are reduced to the object (or class) to which they are
+    bound and the method name.  The object is pickled by value.
+    :param method: A method.
+    :type method: instancemethod
+    :return: Tuple of: (owner, name).
+    :rtype: tuple
+    """
+    owner = method.im_self
+    if owner is None:
+        owner = method.im_class
+    return owner, method.im_func.__name__
+
+
 class Call(protocol.Call):
     """
     The child-side of the forked call.
+    Sent to pre-forked worker processes (pickled).  Methods are
+    reduced explicitly rather than registering a (global) reducer
+    for all methods.
+    :cvar segment: The shared memory segment allocated (by the parent)
+        for large results.
+    :type segment: protocol.Segment
     """
 
+    segment = None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        if isinstance(self.method, MethodType):
+            state['method'] = reduce_method(self.method)
+            state['bound'] = True
+        return state
+
+    def __setstate__(self, state):
+        if state.pop('bound', False):
+            owner, name = state['method']
+            state['method'] = getattr(owner, name)
+        self.__dict__.update(state)
+
     def __call__(self, pipe):
         """
         Perform RMI on the child-side of the forked call
         as follows:
           - Reset the RMI context.
           - Invoke the method
+          - Flush coalesced progress.
           - Send result: retval, progress, raised exception.
         All output is sent to the parent using the inter-process pipe.
         :param pipe: A message pipe.
@@ -43,45 +92,61 @@ class Call(protocol.Call):
             context = Context.current()
             context.cancelled = lambda: False
             context.progress = Progress(pipe)
-            result = self.method(*self.args, **self.kwargs)
-            reply = protocol.Result(result)
-            reply.send(pipe)
+            try:
+                result = self.method(*self.args, **self.kwargs)
+            finally:
+                context.progress.flush()
+            pipe.send_bytes(self.result(result))
         except Exception, e:
             log.exception(utf8(e))
             reply = protocol.Raised(e)
             reply.send(pipe)
 
+    def result(self, result):
+        """
+        Get the (pickled) reply used to send the result.
+        The result is pickled once.  Large results are written to
+        shared memory so that only the handle is sent through the pipe.
+        :param result: The value returned by the method.
+        :type result: object
+        :return: The pickled reply.
+        :rtype: str
+        """
+        data = protocol.Result(result).dump()
+        if len(data) > THRESHOLD:
+            segment = self.segment
+            if segment is None:
+                segment = protocol.Segment.allocate()
+            segment.write(data)
+            data = protocol.Shared(segment).dump()
+        return data
+
 
-class Progress(object):
+class Progress(Reporter):
     """
     Provides progress reporting to the parent through the pipe.
     :ivar pipe: A message pipe.
     :type pipe: multiprocessing.Connection
-    :ivar total: The total work units.
-    :type total: int
-    :ivar completed: The completed work units.
-    :type completed: int
-    :ivar details: The reported details.
-    :type details: object
     """
 
-    def __init__(self, pipe):
+    def __init__(self, pipe, interval=INTERVAL):
         """
         :param pipe: A message pipe.
         :type  pipe: multiprocessing.Connection
+        :param interval: The minimum interval (seconds) between reports.
+        :type interval: float
         """
+        super(Progress, self).__init__(interval)
         self.pipe = pipe
-        self.total = 0
-        self.completed = 0
-        self.details = {}
 
-    def report(self):
+    def send(self):
         """
-        Report progress.
+        Send the progress report to the parent.
         """
         payload = protocol.ProgressPayload(
             total=self.total,
             completed=self.completed,
-            details=self.details)
+            details=self.details,
+            appended=self.appended)
         reply = protocol.Progress(payload)
         reply.send(self.pipe)
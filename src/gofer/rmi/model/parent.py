@@ -13,10 +13,11 @@
 # Jeff Ortel <jortel@redhat.com>
 #
 
+from cPickle import PicklingError
+from errno import EINTR
 from logging import getLogger
 from multiprocessing import Process, Pipe
-from threading import Thread
-from time import sleep
+from select import select, error as SelectError
 
 from gofer.rmi.context import Context
 from gofer.rmi.model import protocol
@@ -26,9 +27,6 @@ from gofer.rmi.model.child import Call as Target
 log = getLogger(__file__)
 
 
-POLL = 0.10
-
-
 class Call(protocol.Call):
     """
     The parent-side of the RMI call invoked in a child process.
@@ -36,95 +34,169 @@ class Call(protocol.Call):
     back using the inter-process queue.
     """
 
+    @staticmethod
+    def watch(context):
+        """
+        Watch the RMI context for cancellation.
+        :param context: The RMI context.
+        :type context: Context
+        :return: A selectable watch or None when cancellation
+            cannot be watched.
+        :rtype: gofer.rmi.tracker.Watch
+        """
+        try:
+            return context.cancelled.watch()
+        except AttributeError:
+            return None
+
     def __call__(self):
+        """
+        Invoke the RMI in a pre-forked worker process when the
+        context provides a pool of workers.  Otherwise, fork.
+        :return: Whatever method returned.
+        """
+        context = Context.current()
+        workers = getattr(context, 'workers', None)
+        if workers is None:
+            return self.forked()
+        else:
+            return self.pooled(workers)
+
+    def pooled(self, workers):
+        """
+        Invoke the RMI as follows:
+          - Get a worker from the pool.
+          - Send the call to the worker.
+          - Read and dispatch reply messages.
+          - Return the worker to the pool.
+        Calls that cannot be pickled are invoked in a forked process.
+        :param workers: A pool of pre-forked workers.
+        :type workers: gofer.rmi.model.prefork.Pool
+        :return: Whatever method returned.
+        """
+        context = Context.current()
+        target = self.target()
+        worker = workers.get()
+        try:
+            worker.send(context.sn, target)
+        except (PicklingError, TypeError), e:
+            workers.put(worker)
+            log.debug('%s: not pickled: %s', self.method, e)
+            return self.forked()
+        watch = self.watch(context)
+        try:
+            retval = self.read(worker.pipe, watch, Cancel(worker))
+            return retval
+        finally:
+            if watch is not None:
+                watch.close()
+            target.segment.unlink()
+            workers.put(worker)
+
+    def forked(self):
         """
         Invoke the RMI as follows:
           - Fork
-          - Start the monitor.
           - Read and dispatch reply messages.
         :return: Whatever method returned.
         """
         inbound, outbound = Pipe()
-        target = Target(self.method, *self.args, **self.kwargs)
+        target = self.target()
         child = Process(target=target, args=(outbound,))
-        monitor = Monitor(Context.current(), child, outbound)
+        watch = self.watch(Context.current())
         try:
             child.start()
-            monitor.start()
-            retval = self.read(inbound)
+            retval = self.read(inbound, watch, Cancel(child, outbound))
             return retval
         finally:
+            if watch is not None:
+                watch.close()
             inbound.close()
             outbound.close()
-            monitor.stop()
             child.join()
+            target.segment.unlink()
+
+    def target(self):
+        """
+        Create the child-side of the call.
+        The shared memory segment used for large results is allocated
+        here so that it can be unlinked when the result is not read.
+        :return: The child-side call.
+        :rtype: Target
+        """
+        target = Target(self.method, *self.args, **self.kwargs)
+        target.segment = protocol.Segment.allocate()
+        return target
 
-    def read(self, pipe):
+    def read(self, pipe, watch=None, cancel=None):
         """
-        Read the reply queue and dispatch messages until *End* is raised..
+        Read the reply queue and dispatch messages until *End* is raised.
+        The pipe and the (optional) cancellation watch are waited on
+        together.  When cancelled, the child is terminated and the
+        pipe is read until *End*.
         :param pipe: A message queue.
         :type  pipe: multiprocessing.Connection
+        :param watch: An (optional) cancellation watch.
+        :type watch: gofer.rmi.tracker.Watch
+        :param cancel: Called to cancel the call.
+        :type cancel: Cancel
         """
         while True:
             try:
+                if watch is not None and self.cancelled(pipe, watch):
+                    cancel()
+                    watch = None
                 reply = protocol.Reply.read(pipe)
                 reply()
             except protocol.End, end:
                 return end.result
 
+    @staticmethod
+    def cancelled(pipe, watch):
+        """
+        Wait for the pipe to be readable or the call to be cancelled.
+        :param pipe: A message queue.
+        :type  pipe: multiprocessing.Connection
+        :param watch: A cancellation watch.
+        :type watch: gofer.rmi.tracker.Watch
+        :return: True if cancelled.
+        :rtype: bool
+        """
+        while True:
+            try:
+                readable, _, _ = select([pipe, watch], [], [])
+                return watch in readable
+            except SelectError, e:
+                if e.args[0] != EINTR:
+                    raise
+
 
-class Monitor(Thread):
+class Cancel(object):
     """
-    Provides monitoring of cancellation.
-    When cancel is detected, the child process is terminated.
-    :ivar context: The RMI context.
-    :type context: Context
-    :ivar child: The child process.
+    Cancels the call by terminating the child process.
+    :ivar child: The child process (or worker).
     :type child: Process
-    :ivar pipe: A message pipe.
+    :ivar pipe: An (optional) message pipe used to end reading.
     :type pipe: multiprocessing.Connection
-    :ivar poll: Main polling loop boolean.
-    :type poll: bool
     """
 
-    NAME = 'monitor'
-    POLL = 0.10
-
-    def __init__(self, context, child, pipe):
+    def __init__(self, child, pipe=None):
         """
-        :param context: The RMI context.
-        :type  context: Context
-        :param child: The child process.
+        :param child: The child process (or worker).
         :type  child: Process
-        :param pipe: A message pipe.
+        :param pipe: An (optional) message pipe used to end reading.
         :type  pipe: multiprocessing.Connection
         """
-        super(Monitor, self).__init__(name=Monitor.NAME)
-        self.context = context
         self.child = child
         self.pipe = pipe
-        self.poll = True
-        self.setDaemon(True)
 
-    def stop(self):
-        """
-        Stop the thread.
-        """
-        self.poll = False
-        self.join()
-
-    def run(self):
+    def __call__(self):
         """
-        Test for cancellation.
-        When cancel is detected, the child process is terminated.
+        Terminate the child process.
         """
-        while self.poll:
-            if self.context.cancelled():
-                self.pipe.send(0)
-                self.child.terminate()
-                break
-            else:
-                sleep(Monitor.POLL)
+        if self.pipe is not None:
+            self.pipe.send(0)
+        self.child.terminate()
 
 
 class Result(protocol.Result):
@@ -139,6 +211,20 @@ class Result(protocol.Result):
         raise protocol.End(self.payload)
 
 
+class Shared(protocol.Shared):
+    """
+    Called when a SHARED (memory) result message is received.
+    """
+
+    def __call__(self):
+        """
+        The (result) reply is read from shared memory and dispatched.
+        :raise End: always.
+        """
+        reply = self.payload.read()
+        reply()
+
+
 class Progress(protocol.Progress):
     """
     Called when a PROGRESS message is received.
@@ -147,10 +233,19 @@ class Progress(protocol.Progress):
     def __call__(self):
         """
         Relay to RMI context progress reporter.
+        Details reported (by the child) as chunks are relayed
+        as chunks so that none are lost when coalesced.
         """
         context = Context.current()
-        context.progress.__dict__.update(self.payload.__dict__)
-        context.progress.report()
+        progress = context.progress
+        payload = self.payload
+        progress.total = payload.total
+        progress.completed = payload.completed
+        if payload.appended:
+            progress.report(payload.details)
+        else:
+            progress.details = payload.details
+            progress.report()
 
 
 class Error(protocol.Error):
@@ -181,6 +276,7 @@ class Raised(protocol.Raised):
 
 # register reply message handling.
 protocol.Reply.register(Result.CODE, Result)
+protocol.Reply.register(Shared.CODE, Shared)
 protocol.Reply.register(Progress.CODE, Progress)
 protocol.Reply.register(Error.CODE, Error)
 protocol.Reply.register(Raised.CODE, Raised)
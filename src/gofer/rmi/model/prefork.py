@@ -0,0 +1,325 @@
+#
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+#
+# Jeff Ortel <jortel@redhat.com>
+#
+
+"""
+Pre-forked worker processes used by the fork call model.
+"""
+
+import os
+
+from logging import getLogger
+from multiprocessing import Process, Pipe
+from threading import Lock, RLock, Condition
+
+from gofer.common import conditional
+from gofer.metrics import Counter
+from gofer.rmi.context import Context
+
+
+log = getLogger(__name__)
+
+
+MB = 0x100000
+
+
+def serve(pipe):
+    """
+    The main loop of a worker process.
+    Calls are read from the pipe and invoked until None is read
+    or the pipe is closed by the parent.
+    :param pipe: The child end of the worker pipe.
+    :type  pipe: multiprocessing.Connection
+    """
+    while True:
+        try:
+            request = pipe.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        sn, target = request
+        Context.set(Context(sn, None, None))
+        target(pipe)
+        Context.set()
+
+
+class Worker(object):
+    """
+    A pre-forked worker process.
+    :cvar forking: Serializes forking workers so that the child end
+        of a pipe is never inherited by another worker.
+    :type forking: Lock
+    :ivar process: The worker process.
+    :type process: Process
+    :ivar pipe: The parent end of the worker pipe.
+    :type pipe: multiprocessing.Connection
+    :ivar calls: The number of calls sent to the worker.
+    :type calls: int
+    :ivar terminated: The worker process has been terminated.
+    :type terminated: bool
+    """
+
+    forking = Lock()
+
+    def __init__(self):
+        self.process = None
+        self.pipe = None
+        self.calls = 0
+        self.terminated = False
+
+    @property
+    def healthy(self):
+        """
+        The worker process is running and can be sent calls.
+        An idle worker has nothing to read so readable means the
+        pipe has been closed by the worker process.
+        :rtype: bool
+        """
+        if self.terminated:
+            return False
+        if not self.process.is_alive():
+            return False
+        return not self.pipe.poll()
+
+    @property
+    def rss(self):
+        """
+        The resident set size (MB) of the worker process.
+        :rtype: int
+        """
+        path = '/proc/%d/statm' % self.process.pid
+        try:
+            with open(path) as fp:
+                pages = int(fp.read().split()[1])
+            return pages * os.sysconf('SC_PAGE_SIZE') / MB
+        except (IOError, ValueError, IndexError):
+            return 0
+
+    def start(self):
+        """
+        Fork the worker process.
+        The parent closes the child end of the pipe so that the
+        parent end is closed (EOF) when the worker is terminated.
+        """
+        Worker.forking.acquire()
+        try:
+            self.pipe, child = Pipe()
+            self.process = Process(target=serve, args=(child,))
+            self.process.daemon = True
+            self.process.start()
+            child.close()
+        finally:
+            Worker.forking.release()
+
+    def send(self, sn, target):
+        """
+        Send a call to the worker process.
+        :param sn: The request serial number.
+        :type sn: str
+        :param target: The child-side of the call.
+        :type target: gofer.rmi.model.child.Call
+        :raise PicklingError: the call cannot be pickled.
+        """
+        self.pipe.send((sn, target))
+        self.calls += 1
+
+    def stop(self):
+        """
+        Stop the worker process.
+        """
+        try:
+            self.pipe.send(None)
+        except (IOError, OSError):
+            # already terminated
+            pass
+        self.close()
+
+    def terminate(self):
+        """
+        Terminate the worker process.
+        The parent end of the pipe is closed (EOF).
+        """
+        self.terminated = True
+        self.process.terminate()
+
+    def close(self):
+        """
+        Close the pipe and wait for the worker process to exit.
+        """
+        self.pipe.close()
+        self.process.join()
+
+
+class Pool(object):
+    """
+    A pool of pre-forked worker processes.
+    Workers are forked as needed (up to capacity) and reused for
+    subsequent calls.  Workers are recycled (replaced) after a number
+    of calls or when the RSS limit is exceeded.  Workers terminated
+    (by cancellation) or that have died are discarded.
+    :ivar capacity: The max number of workers.
+    :type capacity: int
+    :ivar calls: The number of calls after which workers are recycled.  0=unlimited.
+    :type calls: int
+    :ivar rss: The RSS (MB) above which workers are recycled.  0=unlimited.
+    :type rss: int
+    :ivar idle: Idle workers.
+    :type idle: list
+    :ivar workers: All workers.
+    :type workers: set
+    :ivar forking: The number of workers being forked.
+    :type forking: int
+    :ivar recycled: The number of workers recycled.
+    :type recycled: Counter
+    """
+
+    def __init__(self, capacity, calls=0, rss=0):
+        """
+        :param capacity: The max number of workers.
+        :type capacity: int
+        :param calls: The number of calls after which workers are recycled.
+        :type calls: int
+        :param rss: The RSS (MB) above which workers are recycled.
+        :type rss: int
+        """
+        self.__mutex = RLock()
+        self.__condition = Condition(self.__mutex)
+        self.capacity = max(1, capacity)
+        self.calls = calls
+        self.rss = rss
+        self.idle = []
+        self.workers = set()
+        self.forking = 0
+        self.recycled = Counter()
+
+    def get(self):
+        """
+        Get an idle worker.
+        A worker is forked when none are idle and the pool is below
+        capacity.  Otherwise, blocks until a worker is returned.
+        Workers are forked without holding the pool lock.
+        :return: A worker.
+        :rtype: Worker
+        """
+        worker = self._reserve()
+        if worker is not None:
+            return worker
+        worker = Worker()
+        try:
+            worker.start()
+        except Exception:
+            self._forked(None)
+            raise
+        self._forked(worker)
+        log.debug('worker: %d forked', worker.process.pid)
+        return worker
+
+    @conditional
+    def _reserve(self):
+        """
+        Get an idle worker or reserve capacity to fork one.
+        Blocks until a worker is returned when at capacity.
+        :return: An idle worker.  None when one needs to be forked.
+        :rtype: Worker
+        """
+        while not self.idle and len(self.workers) + self.forking >= self.capacity:
+            self.__condition.wait(10)
+        if self.idle:
+            return self.idle.pop()
+        self.forking += 1
+
+    @conditional
+    def _forked(self, worker):
+        """
+        A worker has been forked using reserved capacity.
+        :param worker: The forked worker.  None when the fork failed.
+        :type worker: Worker
+        """
+        self.forking -= 1
+        if worker is not None:
+            self.workers.add(worker)
+        self.__condition.notify()
+
+    @conditional
+    def put(self, worker):
+        """
+        Return a worker to the pool.
+        Workers that have died (or been terminated) are discarded.
+        Workers that have reached the call or RSS limit are recycled.
+        :param worker: The worker to return.
+        :type worker: Worker
+        """
+        try:
+            if worker not in self.workers:
+                # shutdown
+                worker.close()
+                return
+            if not worker.healthy:
+                self.discard(worker)
+                worker.terminate()
+                worker.close()
+                log.info('worker: %d terminated', worker.process.pid)
+                return
+            if self.expired(worker):
+                self.discard(worker)
+                worker.stop()
+                self.recycled.increment()
+                log.info('worker: %d recycled', worker.process.pid)
+                return
+            self.idle.append(worker)
+        finally:
+            self.__condition.notify()
+
+    def discard(self, worker):
+        """
+        Discard the worker.
+        :param worker: The worker to discard.
+        :type worker: Worker
+        """
+        self.workers.discard(worker)
+        if worker in self.idle:
+            self.idle.remove(worker)
+
+    def expired(self, worker):
+        """
+        Get whether the worker has reached the call or RSS limit.
+        :param worker: A worker.
+        :type worker: Worker
+        :rtype: bool
+        """
+        if self.calls and worker.calls >= self.calls:
+            return True
+        if self.rss and worker.rss > self.rss:
+            return True
+        return False
+
+    @conditional
+    def shutdown(self):
+        """
+        Shutdown the pool.
+        Idle workers are stopped and busy workers are terminated.
+        """
+        for worker in self.workers:
+            if worker in self.idle:
+                worker.stop()
+            else:
+                # closed when returned
+                worker.terminate()
+        self.workers = set()
+        self.idle = []
+        self.__condition.notify_all()
+
+    def __len__(self):
+        return len(self.workers)
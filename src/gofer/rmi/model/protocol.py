@@ -13,7 +13,13 @@
 # Jeff Ortel <jortel@redhat.com>
 #
 
+import os
+import errno
+
+from cPickle import load, dumps, HIGHEST_PROTOCOL
 from logging import getLogger
+from tempfile import gettempdir
+from uuid import uuid4
 
 
 log = getLogger(__file__)
@@ -83,6 +89,16 @@ class Message(object):
         pipe.send(self)
         log.debug('Sent: %s', self)
 
+    def dump(self):
+        """
+        Pickle (self) as sent through the pipe.
+        Pickled messages are sent using send_bytes() and
+        read using Message.read().
+        :return: The pickled message.
+        :rtype: str
+        """
+        return dumps(self, HIGHEST_PROTOCOL)
+
     def __str__(self):
         return ':'.join((self.__class__.__name__, str(self.__dict__)))
 
@@ -148,8 +164,10 @@ class ProgressPayload(object):
     :type completed: int
     :ivar details: The reported details.
     :type details: object
+    :ivar appended: The details are a chunk.
+    :type appended: bool
     """
-    def __init__(self, total, completed, details):
+    def __init__(self, total, completed, details, appended=False):
         """
         :ivar total: The total work units.
         :type total: int
@@ -157,10 +175,13 @@ class ProgressPayload(object):
         :type completed: int
         :ivar details: The reported details.
         :type details: object
+        :ivar appended: The details are a chunk.
+        :type appended: bool
         """
         self.total = total
         self.completed = completed
         self.details = details
+        self.appended = appended
 
 
 class Progress(Reply):
@@ -221,3 +242,133 @@ class Raised(Reply):
         :type payload: object
         """
         super(Raised, self).__init__(self.CODE, payload)
+
+
+class Shared(Reply):
+    """
+    A SHARED (memory) result reporting event.
+    Used for large results.
+    """
+
+    CODE = 'SHARED'
+
+    def __init__(self, payload):
+        """
+        :param payload: The shared memory segment containing the result.
+        :type payload: Segment
+        """
+        super(Shared, self).__init__(self.CODE, payload)
+
+
+class Segment(object):
+    """
+    A shared memory segment containing a pickled reply.
+    The segment is passed between processes by handle (path).  The
+    path is allocated by the parent and the segment is written by the
+    child.  It is unlinked when read.  Segments that are never read
+    (cancelled calls) are unlinked by the parent.
+    :cvar ROOT: The directory in which segments are created.
+    :type ROOT: str
+    :cvar PREFIX: The segment file name prefix.
+    :type PREFIX: str
+    :ivar path: The absolute path to the segment.
+    :type path: str
+    """
+
+    ROOT = '/dev/shm'
+    PREFIX = 'gofer-'
+
+    @staticmethod
+    def root():
+        """
+        The directory in which segments are created.
+        :return: The directory path.
+        :rtype: str
+        """
+        root = Segment.ROOT
+        if not os.path.isdir(root):
+            root = gettempdir()
+        return root
+
+    @staticmethod
+    def allocate():
+        """
+        Allocate a new (unwritten) segment.
+        The file name contains the pid of the allocating (parent)
+        process and is used to purge segments orphaned when
+        the process terminated.
+        :return: The segment.
+        :rtype: Segment
+        """
+        name = '%s%d-%s' % (Segment.PREFIX, os.getpid(), uuid4().hex)
+        return Segment(os.path.join(Segment.root(), name))
+
+    @staticmethod
+    def purge():
+        """
+        Unlink segments allocated by processes that no longer exist.
+        :return: The number of segments unlinked.
+        :rtype: int
+        """
+        count = 0
+        root = Segment.root()
+        for name in os.listdir(root):
+            if not name.startswith(Segment.PREFIX):
+                continue
+            try:
+                pid = int(name[len(Segment.PREFIX):].split('-')[0])
+            except ValueError:
+                continue
+            try:
+                os.kill(pid, 0)
+                continue
+            except OSError, e:
+                if e.errno != errno.ESRCH:
+                    continue
+            segment = Segment(os.path.join(root, name))
+            segment.unlink()
+            count += 1
+        return count
+
+    def __init__(self, path):
+        """
+        :param path: The absolute path to the segment.
+        :type path: str
+        """
+        self.path = path
+
+    def write(self, data):
+        """
+        Write pickled data to the segment.
+        :param data: The pickled reply.
+        :type data: str
+        """
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0600)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+        except Exception:
+            self.unlink()
+            raise
+
+    def read(self):
+        """
+        Read (unpickle) the reply and unlink the segment.
+        The reply is unpickled directly from the file.
+        :return: The reply.
+        :rtype: Reply
+        """
+        with open(self.path, 'rb') as fp:
+            self.unlink()
+            return load(fp)
+
+    def unlink(self):
+        """
+        Unlink the segment.
+        Segments not written (or already read) are ignored.
+        """
+        try:
+            os.unlink(self.path)
+        except OSError, e:
+            if e.errno != errno.ENOENT:
+                raise
@@ -17,6 +17,7 @@
 Contains request delivery policies.
 """
 
+from time import time
 from logging import getLogger
 from uuid import uuid4
 
@@ -184,6 +185,25 @@ class Policy(object):
     def exchange(self):
         return self.options.exchange
 
+    @property
+    def notify(self):
+        """
+        The status notifications subscribed to.
+        Unless specified, asynchronous callers (reply or exchange specified)
+        are subscribed to all.  Otherwise, only *progress* is subscribed to
+        and only when a progress callback is specified.
+        :return: The list of statuses.  None=all.
+        :rtype: list
+        """
+        if self.options.notify is not None:
+            return list(self.options.notify)
+        if self.reply or self.exchange:
+            return None
+        if callable(self.progress):
+            return ['progress']
+        else:
+            return []
+
     def get_reply(self, sn, reader):
         """
         Get the reply matched by serial number.
@@ -311,6 +331,24 @@ class Trigger:
     def sn(self):
         return self._sn
 
+    def _deadline(self, synchronous):
+        """
+        Get the absolute time after which the caller is no longer
+        interested in the request.  Bounded by the TTL and, for
+        synchronous calls, how long the caller will wait.
+        :param synchronous: The caller is waiting for the reply.
+        :type synchronous: bool
+        :return: The deadline (epoch seconds) or None.
+        :rtype: float
+        """
+        bounds = []
+        if self._policy.ttl:
+            bounds.append(self._policy.ttl)
+        if synchronous:
+            bounds.append(self._policy.wait)
+        if bounds:
+            return time() + min(bounds)
+
     def _send(self, reply=None, queue=None):
         """
         Send the request using the specified policy
@@ -330,7 +368,9 @@ class Trigger:
                 self._policy.ttl,
                 # body
                 sn=self.sn,
+                deadline=self._deadline(queue is not None),
                 replyto=reply,
+                notify=self._policy.notify,
                 request=self._request,
                 secret=self._policy.secret,
                 pam=self._policy.pam,
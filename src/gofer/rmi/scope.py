@@ -0,0 +1,285 @@
+#
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+#
+# Jeff Ortel <jortel@redhat.com>
+#
+
+"""
+Instance lifecycle scopes for remote classes.
+Instances are keyed by constructor arguments.
+"""
+
+import json
+
+from logging import getLogger
+from threading import RLock, Condition
+
+from gofer.common import synchronized, conditional, utf8
+
+
+log = getLogger(__name__)
+
+
+# scopes
+REQUEST = 'request'
+SINGLETON = 'singleton'
+POOLED = 'pooled'
+
+
+def valid_scope(scope):
+    if scope in ALL:
+        return scope
+    else:
+        raise ValueError('scope must be: %s' % '|'.join(sorted(ALL)))
+
+
+def valid_size(size):
+    if isinstance(size, int) and size > 0:
+        return size
+    else:
+        raise ValueError('size must be: > 0')
+
+
+def key(cntr):
+    """
+    Get the instance key for constructor arguments.
+    :param cntr: The constructor arguments: ([],{})
+    :type cntr: tuple
+    :return: The key.
+    :rtype: str
+    """
+    return json.dumps(cntr, sort_keys=True)
+
+
+def teardown(inst):
+    """
+    Teardown an instance.
+    The close() method is called when defined.
+    :param inst: An instance.
+    :type inst: object
+    """
+    close = getattr(inst, 'close', None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except Exception:
+        log.exception(utf8(inst))
+
+
+class Scope(object):
+    """
+    Instance lifecycle scope.
+    Instances are created by the scope as needed and
+    returned after each call.
+    :ivar owner: The class.
+    :type owner: class
+    """
+
+    def __init__(self, owner):
+        """
+        :param owner: The class.
+        :type owner: class
+        """
+        self.owner = owner
+
+    def get(self, cntr):
+        """
+        Get an instance.
+        :param cntr: The constructor arguments: ([],{})
+        :type cntr: tuple
+        :return: An instance.
+        :rtype: object
+        """
+        raise NotImplementedError()
+
+    def put(self, cntr, inst):
+        """
+        Return an instance.
+        :param cntr: The constructor arguments: ([],{})
+        :type cntr: tuple
+        :param inst: An instance returned by get().
+        :type inst: object
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Teardown all instances.
+        """
+        raise NotImplementedError()
+
+    def new(self, cntr):
+        """
+        Create an instance.
+        :param cntr: The constructor arguments: ([],{})
+        :type cntr: tuple
+        :return: The created instance.
+        :rtype: object
+        """
+        args, keywords = cntr
+        return self.owner(*args, **keywords)
+
+
+class Request(Scope):
+    """
+    Created for each request.
+    """
+
+    def get(self, cntr):
+        return self.new(cntr)
+
+    def put(self, cntr, inst):
+        pass
+
+    def close(self):
+        pass
+
+
+class Singleton(Scope):
+    """
+    Created once for each set of constructor arguments
+    and shared by all requests.
+    :ivar instances: Instances by key.
+    :type instances: dict
+    """
+
+    def __init__(self, owner):
+        """
+        :param owner: The class.
+        :type owner: class
+        """
+        super(Singleton, self).__init__(owner)
+        self.__mutex = RLock()
+        self.instances = {}
+
+    @synchronized
+    def get(self, cntr):
+        _key = key(cntr)
+        try:
+            return self.instances[_key]
+        except KeyError:
+            inst = self.new(cntr)
+            self.instances[_key] = inst
+            return inst
+
+    def put(self, cntr, inst):
+        pass
+
+    @synchronized
+    def close(self):
+        instances = self.instances.values()
+        self.instances = {}
+        for inst in instances:
+            teardown(inst)
+
+
+class Pooled(Scope):
+    """
+    Pooled by constructor arguments.
+    Each instance is used by one request at a time.
+    Requests wait when all of the instances are busy.
+    :ivar size: The max number of instances for each key.
+    :type size: int
+    :ivar idle: Idle instances by key.
+    :type idle: dict
+    :ivar created: The number of instances by key.
+    :type created: dict
+    :ivar closed: The scope has been closed.
+    :type closed: bool
+    """
+
+    def __init__(self, owner, size=1):
+        """
+        :param owner: The class.
+        :type owner: class
+        :param size: The max number of instances for each key.
+        :type size: int
+        """
+        super(Pooled, self).__init__(owner)
+        self.__condition = Condition()
+        self.size = size
+        self.idle = {}
+        self.created = {}
+        self.closed = False
+
+    def get(self, cntr):
+        _key = key(cntr)
+        inst = self._get(_key)
+        if inst is not None:
+            return inst
+        try:
+            return self.new(cntr)
+        except Exception:
+            self._discard(_key)
+            raise
+
+    @conditional
+    def put(self, cntr, inst):
+        _key = key(cntr)
+        if self.closed:
+            teardown(inst)
+            return
+        self.idle.setdefault(_key, []).append(inst)
+        self.__condition.notify_all()
+
+    @conditional
+    def close(self):
+        self.closed = True
+        idle = self.idle
+        self.idle = {}
+        self.created = {}
+        for _list in idle.values():
+            for inst in _list:
+                teardown(inst)
+        self.__condition.notify_all()
+
+    @conditional
+    def _get(self, _key):
+        """
+        Get an idle instance.
+        Waits until one is available or may be created.
+        :param _key: The instance key.
+        :type _key: str
+        :return: An idle instance or None when one needs to be created.
+        :rtype: object
+        :raise ValueError: When the scope has been closed.
+        """
+        while True:
+            if self.closed:
+                raise ValueError('scope closed')
+            idle = self.idle.get(_key)
+            if idle:
+                return idle.pop()
+            created = self.created.get(_key, 0)
+            if created < self.size:
+                self.created[_key] = created + 1
+                return
+            self.__condition.wait()
+
+    @conditional
+    def _discard(self, _key):
+        """
+        An instance could not be created.
+        :param _key: The instance key.
+        :type _key: str
+        """
+        if _key in self.created:
+            self.created[_key] -= 1
+        self.__condition.notify_all()
+
+
+ALL = {
+    REQUEST: Request,
+    SINGLETON: Singleton,
+    POOLED: Pooled,
+}
@@ -13,76 +13,291 @@
 # Jeff Ortel <jortel@redhat.com>
 #
 
+from errno import EINTR
+from logging import getLogger
+from os import read
+from select import select, error as SelectError
 from subprocess import Popen, PIPE
+from tempfile import TemporaryFile
 
 from gofer import utf8
 from gofer.rmi.context import Context
 
 
+log = getLogger(__name__)
+
+
 STDOUT = 'stdout'
 STDERR = 'stderr'
 
+# The output (bytes) of each stream buffered in memory.
+LIMIT = 0x100000
+
+# The output (bytes) of each stream returned.  Spilled
+# output above this is discarded and a marker appended.
+MAXIMUM = 0x1000000
+
+# Appended to (spilled) output that has been truncated.
+TRUNCATED = '\n[truncated: %d bytes discarded]\n'
+
+# The number of bytes read at once.
+BUFSIZE = 0x10000
+
+# Cancellation is checked at least this often (seconds)
+# when it cannot be watched.
+POLL = 0.5
+
+
+class Output(object):
+    """
+    Buffered command output.
+    Output above the limit is spilled to a temporary file or discarded.
+    Spilled output above the maximum is discarded.
+    :ivar limit: The max number of bytes buffered in memory.
+    :type limit: int
+    :ivar spill: Spill output above the limit to a temporary file.
+    :type spill: bool
+    :ivar maximum: The max number of bytes spilled (and returned).
+    :type maximum: int
+    :ivar buffer: Output buffered in memory.
+    :type buffer: list
+    :ivar size: The number of bytes buffered in memory.
+    :type size: int
+    :ivar file: The (spill) file.
+    :type file: file
+    :ivar spilled: The number of bytes spilled.
+    :type spilled: int
+    :ivar truncated: Output has been discarded.
+    :type truncated: bool
+    :ivar discarded: The number of bytes discarded.
+    :type discarded: int
+    """
+
+    def __init__(self, limit=LIMIT, spill=True, maximum=MAXIMUM):
+        """
+        :param limit: The max number of bytes buffered in memory.
+        :type limit: int
+        :param spill: Spill output above the limit to a temporary file.
+        :type spill: bool
+        :param maximum: The max number of bytes spilled (and returned).
+        :type maximum: int
+        """
+        self.limit = limit
+        self.spill = spill
+        self.maximum = max(limit, maximum)
+        self.buffer = []
+        self.size = 0
+        self.file = None
+        self.spilled = 0
+        self.truncated = False
+        self.discarded = 0
+
+    def write(self, data):
+        """
+        Write output.
+        :param data: The output read.
+        :type data: str
+        """
+        if self.file is not None:
+            self._spill(data)
+            return
+        if self.size + len(data) <= self.limit:
+            self.buffer.append(data)
+            self.size += len(data)
+            return
+        if self.spill:
+            self.file = TemporaryFile()
+            self._spill(''.join(self.buffer))
+            self._spill(data)
+            self.buffer = []
+            self.size = 0
+        else:
+            n = self.limit - self.size
+            self.buffer.append(data[:n])
+            self.size += n
+            self.truncated = True
+            self.discarded += len(data) - n
+
+    def _spill(self, data):
+        """
+        Write output to the spill file.
+        Output above the maximum is discarded.
+        :param data: The output read.
+        :type data: str
+        """
+        n = self.maximum - self.spilled
+        if len(data) > n:
+            self.truncated = True
+            self.discarded += len(data) - n
+            data = data[:n]
+        self.file.write(data)
+        self.spilled += len(data)
+
+    def getvalue(self):
+        """
+        Get the output.
+        Truncated spilled output is marked.
+        :return: The output.
+        :rtype: str
+        """
+        if self.file is None:
+            return ''.join(self.buffer)
+        self.file.seek(0)
+        data = self.file.read()
+        if self.truncated:
+            data += TRUNCATED % self.discarded
+        return data
+
+    def close(self):
+        """
+        Close (and delete) the spill file.
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
 
 class Shell(object):
     """
     Shell used to execute commands.
     :ivar progress_reported: Enables progress reporting.
     :type progress_reported: bool
+    :ivar limit: The max output (bytes) of each stream buffered in memory.
+    :type limit: int
+    :ivar spill: Spill output above the limit to a temporary file.
+        Otherwise, the output is truncated.
+    :type spill: bool
+    :ivar maximum: The max output (bytes) of each stream spilled (and returned).
+        Spilled output above the maximum is truncated.
+    :type maximum: int
     """
 
-    def __init__(self):
+    def __init__(self, limit=LIMIT, spill=True, maximum=MAXIMUM):
+        """
+        :param limit: The max output (bytes) of each stream buffered in memory.
+        :type limit: int
+        :param spill: Spill output above the limit to a temporary file.
+        :type spill: bool
+        :param maximum: The max output (bytes) of each stream spilled (and returned).
+        :type maximum: int
+        """
         self.progress_reported = True
+        self.limit = limit
+        self.spill = spill
+        self.maximum = maximum
 
     def report(self, details):
         """
         Report progress.
-        :param details: The details to report.
+        The details are a chunk of output (read since last reported).
+        Chunks are appended by the progress reporter until sent.
+        :param details: The output to report.
         :type details: dict
         """
         if not self.progress_reported:
             # not enabled
             return
         context = Context.current()
-        context.progress.details = details
-        context.progress.report()
+        context.progress.report(details)
 
     def run(self, *command):
         """
         Run the specified command.
+        Both stdout and stderr are read as output becomes available
+        until both are closed (EOF) or the call is cancelled.  Output
+        read is reported as progress.
         :param command: A command and parameters.
         :type command: tuple
         :return: (status, {stdout:<str>, stderr:<str>})
         :rtype: tuple
         """
-        details = {
-            STDOUT: '',
-            STDERR: '',
-        }
-        result = {
-            STDOUT: '',
-            STDERR: '',
+        output = {
+            STDOUT: Output(self.limit, self.spill, self.maximum),
+            STDERR: Output(self.limit, self.spill, self.maximum),
         }
         context = Context.current()
-        p = Popen(command, stdout=PIPE, stderr=PIPE)
+        watch = None
         try:
-            while True:
-                n_read = 0
+            p = Popen(command, stdout=PIPE, stderr=PIPE)
+            watch = self.watch(context)
+            streams = {
+                p.stdout.fileno(): STDOUT,
+                p.stderr.fileno(): STDERR,
+            }
+            while streams:
                 if context.cancelled():
                     p.terminate()
                     break
-                for fp, key in ((p.stdout, STDOUT), (p.stderr, STDERR)):
-                    line = fp.readline()
-                    if line:
-                        n_read += len(line)
-                        details[key] = line
-                        result[key] += line
-                        self.report(details)
-                if not n_read:
-                    #  EOF
-                    break
+                details = {
+                    STDOUT: '',
+                    STDERR: '',
+                }
+                for fd in self.select(streams, watch):
+                    key = streams[fd]
+                    data = read(fd, BUFSIZE)
+                    if not data:
+                        # EOF
+                        del streams[fd]
+                        continue
+                    output[key].write(data)
+                    details[key] += data
+                if details[STDOUT] or details[STDERR]:
+                    self.report(details)
             p.stdout.close()
             p.stderr.close()
             status = p.wait()
+            result = {}
+            for key, stream in output.items():
+                if stream.truncated:
+                    log.warn('%s: %s truncated: %d bytes discarded', command[0], key, stream.discarded)
+                result[key] = stream.getvalue()
             return status, result
         except OSError, e:
             return -1, utf8(e)
+        finally:
+            if watch is not None:
+                watch.close()
+            for stream in output.values():
+                stream.close()
+
+    @staticmethod
+    def watch(context):
+        """
+        Watch the RMI context for cancellation.
+        :param context: The RMI context.
+        :type context: Context
+        :return: A selectable watch or None when cancellation
+            cannot be watched.
+        :rtype: gofer.rmi.tracker.Watch
+        """
+        try:
+            return context.cancelled.watch()
+        except AttributeError:
+            return None
+
+    @staticmethod
+    def select(streams, watch):
+        """
+        Wait for output to be readable or the call to be cancelled.
+        When cancellation cannot be watched, waiting is limited so
+        that cancellation is checked periodically.
+        :param streams: The open streams.  Keyed by file descriptor.
+        :type streams: dict
+        :param watch: A cancellation watch.  May be None.
+        :type watch: gofer.rmi.tracker.Watch
+        :return: The readable file descriptors.
+        :rtype: list
+        """
+        fds = list(streams)
+        if watch is None:
+            timeout = POLL
+        else:
+            fds.append(watch)
+            timeout = None
+        while True:
+            try:
+                readable, _, _ = select(fds, [], [], timeout)
+                return [fd for fd in readable if fd in streams]
+            except SelectError, e:
+                if e.args[0] != EINTR:
+                    raise
@@ -21,9 +21,11 @@ import os
 
 from time import sleep, time
 from logging import getLogger
-from Queue import Queue, Empty
+from threading import Condition, Event
+from collections import deque
+from Queue import Empty
 
-from gofer import NAME, Thread
+from gofer import NAME, Thread, conditional
 from gofer.common import mkdir, rmdir, unlink
 from gofer.messaging import Document
 from gofer.rmi.tracker import Tracker
@@ -35,31 +37,34 @@ log = getLogger(__name__)
 class Pending(object):
     """
     Persistent store and queuing for pending requests.
+    Requests are recorded in an append-only journal.  Only a (small) window
+    of requests is held in memory.  The rest are spilled and read back from
+    the journal as needed.
+    :cvar WINDOW: The max number of requests held in memory.
+    :ivar stream: The stream name.
+    :type stream: str
+    :ivar window: Requests held in memory (oldest first).
+    :type window: deque
+    :ivar backlog: Spilled requests (oldest first) as: (sn, ts).
+    :type backlog: deque
+    :ivar opened: Set when the journal is open for writing.
+    :type opened: Event
+    :ivar journal: The journal.
+    :type journal: Journal
+    :ivar thread: The open (replay) thread.
+    :type thread: Thread
+    :ivar adopted: The serial numbers of requests adopted from another
+        instance (reload) and not to be restored.
+    :type adopted: set
     """
 
     PENDING = '/var/lib/%s/messaging/pending' % NAME
-
-    @staticmethod
-    def _write(request, path):
-        """
-        Write a request to the journal.
-        :param request: An AMQP request.
-        :type request: Document
-        :param path: The destination path.
-        :type path: str
-        """
-        fp = open(path, 'w+')
-        try:
-            body = request.dump()
-            fp.write(body)
-            log.debug('wrote [%s]: %s', path, body)
-        finally:
-            fp.close()
+    WINDOW = 100
 
     @staticmethod
     def _read(path):
         """
-        Read a request.
+        Read a (legacy) journal file.
         :param path: The path to the journal file.
         :type path: str
         :return: The read request.
@@ -81,12 +86,14 @@ class Pending(object):
 
     def _list(self):
         """
-        Directory listing sorted by when it was created.
+        Directory listing of (legacy) journal files sorted by when
+        they were created.  Before the journal was introduced, each request
+        was written to a separate (.json) file.
         :return: A sorted directory listing (absolute paths).
         :rtype: list
         """
         path = os.path.join(Pending.PENDING, self.stream)
-        paths = [os.path.join(path, name) for name in os.listdir(path)]
+        paths = [os.path.join(path, name) for name in os.listdir(path) if name.endswith('.json')]
         return sorted(paths)
 
     def __init__(self, stream):
@@ -94,11 +101,13 @@ class Pending(object):
         :param stream: The stream name.
         :type stream: str
         """
+        self.__condition = Condition()
         self.stream = stream
-        self.queue = Queue(maxsize=100)
-        self.is_open = False
-        self.sequential = Sequential()
-        self.journal = {}
+        self.window = deque()
+        self.backlog = deque()
+        self.adopted = set()
+        self.opened = Event()
+        self.journal = Journal(os.path.join(Pending.PENDING, stream))
         self.thread = Thread(target=self._open)
         self.thread.setDaemon(True)
         self.thread.start()
@@ -106,35 +115,44 @@ class Pending(object):
     def _open(self):
         """
         Open for operations.
-        Load journal(ed) requests. These are requests were in the queuing pipeline
-        when the process was terminated. put() is blocked until this has completed.
+        The journal is opened and put() is unblocked.  Then, journal(ed) requests
+        are restored.  These are requests were in the queuing pipeline when the
+        process was terminated.  Restored requests are spilled and read back
+        from the journal when dispatched ahead of requests queued during the
+        replay.  Requests found in (legacy) journal files are migrated to
+        the journal.
         """
         path = os.path.join(Pending.PENDING, self.stream)
         mkdir(path)
         log.info('Using: %s', path)
+        self.journal.open()
+        self.opened.set()
+        restored = self.journal.replay()
+        for sn, data in restored:
+            log.info('Restoring: %s', sn)
+        self._restore(restored)
         for path in self._list():
-            log.info('Restoring: %s', path)
+            if Thread.aborted():
+                break
+            log.info('Migrating: %s', path)
             request = Pending._read(path)
             if not request:
                 # read failed
                 continue
-            self._put(request, path)
-        self.is_open = True
+            self.journal.put(request)
+            unlink(path)
+            self._put(request)
 
     def put(self, request):
         """
         Enqueue a pending request.
-        This is blocked until the _open() has re-queued journal(ed) entries.
+        This is blocked until the journal has been opened.
         :param request: An AMQP request.
         :type request: Document
         """
-        while not self.is_open:
-            # block until opened
-            sleep(1)
-        fn = self.sequential.next()
-        path = os.path.join(Pending.PENDING, self.stream, fn)
-        Pending._write(request, path)
-        self._put(request, path)
+        self.opened.wait()
+        self.journal.put(request)
+        self._put(request)
 
     def get(self):
         """
@@ -145,94 +163,730 @@ class Pending(object):
         :raise Empty: on thread aborted.
         """
         while not Thread.aborted():
-            try:
-                return self.queue.get(timeout=10)
-            except Empty:
-                pass
+            request = self._next()
+            if request is not None:
+                return request
         # aborted
         raise Empty()
 
     def commit(self, sn):
         """
         The request referenced by the serial number has been completely
-        processed and can be deleted from the journal.
+        processed and can be committed in the journal.
         :param sn: A request serial number.
         :param sn: str
         """
-        try:
-            path = self.journal.pop(sn)
-            unlink(path)
+        if self.journal.commit(sn):
             log.debug('%s committed', sn)
-        except KeyError:
+        else:
             log.warn('%s not found for commit', sn)
 
+    def adopt(self, sn):
+        """
+        Adopt a request already scheduled by another instance on
+        the same stream (plugin reload).  The request is committed
+        using this instance and is not restored (dispatched again).
+        :param sn: A request serial number.
+        :param sn: str
+        """
+        self._adopt(sn)
+        log.debug('%s adopted', sn)
+
+    def close(self):
+        """
+        Drain the queue and close the journal.
+        Queued requests remain in the journal and are restored
+        when opened again.
+        """
+        self.thread.abort()
+        self.thread.join()
+        self._drain()
+        self.journal.close()
+        log.info('%s, closed', self.stream)
+
     def delete(self):
         """
         Drain the queue and delete the store.
         """
-        self.is_open = False
+        self.opened.clear()
         self.thread.abort()
         self.thread.join()
         self._drain()
+        self.journal.delete()
         path = os.path.join(Pending.PENDING, self.stream)
         rmdir(path)
         log.info('%s, deleted', path)
 
+    @conditional
     def _drain(self):
         """
         Drain the queue.
         """
-        self.is_open = False
-        while not Thread.aborted():
-            try:
-                request = self.queue.get(timeout=1)
-                self.commit(request.sn)
-            except Empty:
-                break
+        self.window.clear()
+        self.backlog.clear()
 
-    def _put(self, request, jnl_path):
+    @conditional
+    def _put(self, request):
         """
         Enqueue the request.
+        The request is spilled when the window is full or requests
+        have already been spilled.
         :param request: An AMQP request.
         :type request: Document
-        :param jnl_path: Path to the associated journal file.
-        :type jnl_path: str
         """
         request.ts = time()
         tracker = Tracker()
         tracker.add(request.sn, request.data)
-        self.journal[request.sn] = jnl_path
-        self.queue.put(request)
+        if self.backlog or len(self.window) >= Pending.WINDOW:
+            self.backlog.append((request.sn, request.ts))
+        else:
+            self.window.append(request)
+        self.__condition.notify()
+
+    @conditional
+    def _restore(self, restored):
+        """
+        Enqueue (spilled) requests restored from the journal.
+        Restored requests are queued ahead of requests queued since
+        the journal was opened.  Those are spilled so that the backlog
+        is drained before requests are accepted into the window.
+        :param restored: The restored requests as: (sn, data).
+        :type restored: list
+        """
+        tracker = Tracker()
+        queued = [(r.sn, r.ts) for r in self.window]
+        queued.extend(self.backlog)
+        self.window.clear()
+        self.backlog.clear()
+        now = time()
+        for sn, data in restored:
+            if sn in self.adopted:
+                continue
+            tracker.add(sn, data)
+            self.backlog.append((sn, now))
+        self.backlog.extend(queued)
+        self.__condition.notify_all()
+
+    @conditional
+    def _adopt(self, sn):
+        """
+        Adopt a request.
+        Restored requests are dequeued.
+        :param sn: A request serial number.
+        :param sn: str
+        """
+        self.adopted.add(sn)
+        self.window = deque([r for r in self.window if r.sn != sn])
+        self.backlog = deque([q for q in self.backlog if q[0] != sn])
+
+    def _next(self):
+        """
+        Get the next request.
+        Spilled requests are read from the journal (outside of the lock).
+        Waits (10 seconds) for a request to be queued.
+        :return: The next request or None.
+        :rtype: Document
+        """
+        request, spilled = self._pop()
+        if spilled is not None:
+            sn, ts = spilled
+            request = self.journal.read(sn)
+            if request is None:
+                log.warn('%s not found in journal (discarded)', sn)
+                return
+            request.ts = ts
+        return request
+
+    @conditional
+    def _pop(self):
+        """
+        Pop the next request.
+        Waits (10 seconds) for a request to be queued.
+        :return: A tuple of: (request, spilled).  The spilled
+            request is: (sn, ts).  Both are None when timed out.
+        :rtype: tuple
+        """
+        if not (self.window or self.backlog):
+            self.__condition.wait(10)
+        if self.window:
+            return self.window.popleft(), None
+        if self.backlog:
+            return None, self.backlog.popleft()
+        return None, None
 
 
-class Sequential(object):
+class Journal(object):
     """
-    Generate unique, sequential file names for journal entries.
-    :ivar n: Appended to the new in the unlikely that subsequent calls
-        to time() returns the same value.
-    :type n: int
-    :ivar last: The last time() value.
-    :type last: float
+    A segmented, append-only (write-ahead) journal.
+    Each request is appended as a PUT record.  When processed, a COMMIT
+    marker is appended.  Concurrent writers are grouped so that a single
+    fsync() covers all of the records written since the last one.  The active
+    segment is sealed when it reaches SEGMENT_SIZE and sealed segments are
+    compacted in the background.
+    :cvar FSYNC: The fsync policy (always|interval|never).
+    :cvar FSYNC_INTERVAL: The housekeeping (and fsync) interval (seconds).
+    :cvar SEGMENT_SIZE: The size (bytes) at which the active segment is sealed.
+    :cvar COMPACT: The live ratio at which a sealed segment is compacted.
+    :cvar SEGMENTS: The number of sealed segments retained regardless of live ratio.
+    :ivar root: The absolute path to the journal directory.
+    :type root: str
+    :ivar segments: The list of segments (oldest first).  The last is active.
+    :type segments: list
+    :ivar index: The segment containing each uncommitted request by serial number.
+    :type index: dict
+    :ivar recovered: The segments found when opened that have not been replayed.
+    :type recovered: list
+    :ivar written: The number of records written.
+    :type written: int
+    :ivar synced: The number of records flushed to disk.
+    :type synced: int
+    :ivar syncing: An fsync() is in progress.
+    :type syncing: bool
+    :ivar thread: The housekeeping thread.
+    :type thread: Thread
     """
 
-    FORMAT = '%f-%04d.json'
+    PUT = '+'
+    COMMIT = '-'
+
+    ALWAYS = 'always'
+    INTERVAL = 'interval'
+    NEVER = 'never'
 
-    def __init__(self):
-        self.n = 0
-        self.last = 0.0
+    FSYNC = ALWAYS
+    FSYNC_INTERVAL = 1.0
+    SEGMENT_SIZE = 0x100000
+    COMPACT = 0.5
+    SEGMENTS = 16
 
-    def next(self):
+    @staticmethod
+    def _requests(segment):
         """
-        Get next (sequential) name to be used for the next journal file.
-        :return: The next (sequential) name.
-        :rtype: str
+        Read the requests (PUT records) written to a segment.
+        :param segment: A segment.
+        :type segment: Segment
+        :return: A generator of: (offset, code, request|sn).
+        :rtype: generator
         """
-        now = time()
-        if now > self.last:
-            self.n = 0
+        for offset, code, payload in segment.read():
+            if code == Journal.PUT:
+                try:
+                    request = Document()
+                    request.load(payload)
+                    yield offset, code, request
+                except ValueError:
+                    log.error('%s corrupt record (discarded)', segment.path)
+                continue
+            if code == Journal.COMMIT:
+                yield offset, code, payload
+                continue
+            log.error('%s unknown record (discarded)', segment.path)
+
+    def __init__(self, root):
+        """
+        :param root: The absolute path to the journal directory.
+        :type root: str
+        """
+        self.__condition = Condition()
+        self.root = root
+        self.segments = []
+        self.index = {}
+        self.recovered = []
+        self.written = 0
+        self.synced = 0
+        self.syncing = False
+        self.thread = None
+
+    def _list(self):
+        """
+        Directory listing of segments sorted by segment number.
+        :return: A sorted list of: Segment.
+        :rtype: list
+        """
+        listing = []
+        for name in os.listdir(self.root):
+            if not name.endswith(Segment.SUFFIX):
+                continue
+            try:
+                n = int(name[:-len(Segment.SUFFIX)])
+                listing.append(Segment(self.root, n))
+            except ValueError:
+                continue
+        listing.sort(key=lambda s: s.n)
+        return listing
+
+    @conditional
+    def open(self):
+        """
+        Open the journal for writing.
+        A new (active) segment is started.  Existing segments must be
+        replayed before they are compacted.
+        """
+        mkdir(self.root)
+        self.recovered = self._list()
+        self.segments.extend(self.recovered)
+        self._roll()
+
+    def replay(self):
+        """
+        Replay the segments found when opened.
+        Only the location of uncommitted requests is retained.  Requests may be
+        written concurrently.  Housekeeping (compaction) is started when completed.
+        :return: The uncommitted requests in the order written as: (sn, data).
+        :rtype: list
+        """
+        ordered = []
+        pending = {}
+        for segment in self.recovered:
+            for offset, code, thing in Journal._requests(segment):
+                if code == Journal.PUT:
+                    segment.written += 1
+                    relocated = pending.get(thing.sn)
+                    if relocated and relocated[0] is not segment:
+                        segment.refs.add(relocated[0].n)
+                    pending[thing.sn] = (segment, offset, thing.data)
+                    ordered.append(thing.sn)
+                    continue
+                try:
+                    committed = pending.pop(thing)[0]
+                    if committed is not segment:
+                        segment.refs.add(committed.n)
+                except KeyError:
+                    continue
+        restored = self._restore(ordered, pending)
+        self.recovered = []
+        self.thread = Thread(target=self._housekeeping, name='journal')
+        self.thread.setDaemon(True)
+        self.thread.start()
+        return restored
+
+    @conditional
+    def read(self, sn):
+        """
+        Read an uncommitted request.
+        :param sn: A request serial number.
+        :param sn: str
+        :return: The request.  None when not found.
+        :rtype: Document
+        """
+        try:
+            segment = self.index[sn]
+            offset = segment.live[sn]
+        except KeyError:
+            return None
+        code, payload = segment.readline(offset)
+        try:
+            request = Document()
+            request.load(payload)
+            if code == Journal.PUT and request.sn == sn:
+                return request
+        except ValueError:
+            pass
+        log.error('%s corrupt record at: %d', segment.path, offset)
+
+    def put(self, request):
+        """
+        Append a request.
+        :param request: An AMQP request.
+        :type request: Document
+        """
+        record = ''.join((Journal.PUT, request.dump(), '\n'))
+        ticket = self._put(request.sn, record)
+        if Journal.FSYNC == Journal.ALWAYS:
+            self.sync(ticket)
+
+    def commit(self, sn):
+        """
+        Append a commit marker.
+        :param sn: A request serial number.
+        :param sn: str
+        :return: True if committed. False when not found.
+        :rtype: bool
+        """
+        ticket = self._commit(sn)
+        if not ticket:
+            return False
+        if Journal.FSYNC == Journal.ALWAYS:
+            self.sync(ticket)
+        return True
+
+    def sync(self, ticket=None):
+        """
+        Group commit.
+        Block until records (through ticket) have been flushed to disk.  Writers
+        that arrive during an fsync() wait and are covered by the next one.
+        :param ticket: A record number.  Default: all written.
+        :type ticket: int
+        """
+        condition = self.__condition
+        condition.acquire()
+        try:
+            if ticket is None:
+                ticket = self.written
+            while self.synced < ticket:
+                if self.syncing:
+                    condition.wait()
+                    continue
+                self.syncing = True
+                target = self.written
+                segment = self.segments[-1]
+                condition.release()
+                try:
+                    segment.sync()
+                finally:
+                    condition.acquire()
+                    self.syncing = False
+                    condition.notifyAll()
+                self.synced = max(self.synced, target)
+        finally:
+            condition.release()
+
+    def compact(self):
+        """
+        Compact sealed segments (oldest first).
+        A sealed segment with a live ratio at or below COMPACT has the live
+        (uncommitted) requests relocated to the active segment.  So that segments
+        pinned by long running requests don't accumulate, the oldest are compacted
+        regardless of live ratio while there are more than SEGMENTS.  A sealed segment
+        is deleted when it has no live requests and none of the segments
+        referenced by its commit markers remain.  Only segments sealed when
+        compaction started are considered.
+        """
+        sealed = self._sealed()
+        for n, segment in enumerate(sealed):
+            live = self._live(segment)
+            forced = len(sealed) - n > Journal.SEGMENTS
+            if live and (forced or len(live) <= segment.written * Journal.COMPACT):
+                relocated = []
+                for offset, code, thing in Journal._requests(segment):
+                    if code == Journal.PUT and thing.sn in live:
+                        relocated.append(thing)
+                ticket = self._relocate(segment, relocated)
+                self.sync(ticket)
+            self._collect(segment)
+
+    def close(self):
+        """
+        Close the journal.
+        """
+        if self.thread:
+            self.thread.abort()
+            self.thread.join()
+            self.thread = None
+        self._close()
+
+    def delete(self):
+        """
+        Close the journal and delete all segments.
+        """
+        self.close()
+        self._purge()
+
+    def _housekeeping(self):
+        """
+        Housekeeping thread main.
+        Periodic fsync (as needed) and compaction.
+        """
+        while not Thread.aborted():
+            sleep(Journal.FSYNC_INTERVAL)
+            try:
+                if Journal.FSYNC == Journal.INTERVAL:
+                    self.sync()
+                self.compact()
+            except Exception:
+                log.exception(self.root)
+
+    @conditional
+    def _put(self, sn, record):
+        """
+        Append a PUT record to the active segment.
+        :param sn: A request serial number.
+        :param sn: str
+        :param record: The record.
+        :type record: str
+        :return: The record number (ticket).
+        :rtype: int
+        """
+        segment = self.segments[-1]
+        segment.live[sn] = segment.size
+        segment.written += 1
+        self.index[sn] = segment
+        return self._append(record)
+
+    @conditional
+    def _commit(self, sn):
+        """
+        Append a COMMIT record to the active segment.
+        :param sn: A request serial number.
+        :param sn: str
+        :return: The record number (ticket).  0 = not found.
+        :rtype: int
+        """
+        try:
+            segment = self.index.pop(sn)
+            del segment.live[sn]
+        except KeyError:
+            return 0
+        active = self.segments[-1]
+        if segment is not active:
+            active.refs.add(segment.n)
+        record = ''.join((Journal.COMMIT, sn, '\n'))
+        return self._append(record)
+
+    @conditional
+    def _append(self, record):
+        """
+        Append a record to the active segment.
+        The segment is sealed when full.
+        :param record: The record.
+        :type record: str
+        :return: The record number (ticket).
+        :rtype: int
+        """
+        segment = self.segments[-1]
+        segment.append(record)
+        self.written += 1
+        ticket = self.written
+        if segment.size >= Journal.SEGMENT_SIZE:
+            self._roll()
+        return ticket
+
+    @conditional
+    def _roll(self):
+        """
+        Seal the active segment and start a new one.
+        """
+        while self.syncing:
+            self.__condition.wait()
+        if self.segments:
+            segment = self.segments[-1]
+            segment.close()
+            n = segment.n + 1
         else:
-            self.n += 1
-        self.last = now
-        val = Sequential.FORMAT % (now, self.n)
-        val = val.replace('.', '-', 1)
-        return val
+            n = 0
+        self.synced = self.written
+        segment = Segment(self.root, n)
+        segment.open()
+        self.segments.append(segment)
+        log.debug('%s, opened', segment.path)
+
+    @conditional
+    def _restore(self, ordered, pending):
+        """
+        Index replayed (uncommitted) requests.
+        :param ordered: The serial numbers of requests in the order written.
+        :type ordered: list
+        :param pending: Uncommitted requests (segment, offset, data) by serial number.
+        :type pending: dict
+        :return: The uncommitted requests in the order written as: (sn, data).
+        :rtype: list
+        """
+        restored = []
+        for sn in ordered:
+            try:
+                segment, offset, data = pending.pop(sn)
+            except KeyError:
+                # committed or relocated
+                continue
+            segment.live[sn] = offset
+            self.index[sn] = segment
+            restored.append((sn, data))
+        return restored
+
+    @conditional
+    def _sealed(self):
+        """
+        Get the sealed segments.
+        :return: List of: Segment (oldest first).
+        :rtype: list
+        """
+        return self.segments[:-1]
+
+    @conditional
+    def _live(self, segment):
+        """
+        Get the live requests written to a segment.
+        :param segment: A segment.
+        :type segment: Segment
+        :return: The set of serial numbers.
+        :rtype: set
+        """
+        return set(segment.live)
+
+    @conditional
+    def _relocate(self, segment, requests):
+        """
+        Relocate live requests to the active segment.
+        The segment written is made to reference the sealed segment so
+        that it is not deleted while the original PUT record remains.
+        :param segment: A sealed segment.
+        :type segment: Segment
+        :param requests: The requests to relocate.
+        :type requests: list
+        :return: The record number (ticket) of the last relocated request.
+        :rtype: int
+        """
+        for request in requests:
+            if self.index.get(request.sn) is not segment:
+                # committed
+                continue
+            del segment.live[request.sn]
+            self.segments[-1].refs.add(segment.n)
+            record = ''.join((Journal.PUT, request.dump(), '\n'))
+            self._put(request.sn, record)
+        return self.written
+
+    @conditional
+    def _collect(self, segment):
+        """
+        Delete a sealed segment when no longer needed.
+        :param segment: A sealed segment.
+        :type segment: Segment
+        """
+        if segment.live:
+            return
+        numbers = set([s.n for s in self.segments])
+        if segment.refs & numbers:
+            return
+        self.segments.remove(segment)
+        segment.unlink()
+        log.debug('%s, deleted', segment.path)
+
+    @conditional
+    def _close(self):
+        """
+        Close all segments.
+        """
+        while self.syncing:
+            self.__condition.wait()
+        for segment in self.segments:
+            segment.close()
+        self.synced = self.written
+
+    @conditional
+    def _purge(self):
+        """
+        Delete all segments.
+        """
+        for segment in self.segments:
+            segment.unlink()
+        self.segments = []
+        self.index = {}
+
+
+class Segment(object):
+    """
+    A journal segment (file).
+    Records are newline terminated and prefixed with a single character code.
+    :ivar n: The segment number.
+    :type n: int
+    :ivar path: The absolute path to the segment file.
+    :type path: str
+    :ivar live: The offsets of live (uncommitted) requests written to
+        the segment by serial number.
+    :type live: dict
+    :ivar written: The number of requests written to the segment.
+    :type written: int
+    :ivar refs: The numbers of the segments containing requests committed
+        by markers or relocated by records written to this segment.
+    :type refs: set
+    :ivar size: The segment size (bytes).
+    :type size: int
+    :ivar fp: The open file (active segment only).
+    :type fp: file
+    """
+
+    SUFFIX = '.jnl'
+    FORMAT = '%010d' + SUFFIX
+
+    def __init__(self, root, n):
+        """
+        :param root: The absolute path to the journal directory.
+        :type root: str
+        :param n: The segment number.
+        :type n: int
+        """
+        self.n = n
+        self.path = os.path.join(root, Segment.FORMAT % n)
+        self.live = {}
+        self.written = 0
+        self.refs = set()
+        self.size = 0
+        self.fp = None
+
+    def open(self):
+        """
+        Open for append.
+        """
+        self.fp = open(self.path, 'a')
+
+    def append(self, record):
+        """
+        Append (and flush) a record.
+        :param record: A record.
+        :type record: str
+        """
+        self.fp.write(record)
+        self.fp.flush()
+        self.size += len(record)
+
+    def sync(self):
+        """
+        Flush the segment to disk.
+        """
+        if self.fp:
+            os.fsync(self.fp.fileno())
+
+    def read(self):
+        """
+        Read records.
+        A truncated (last) record is discarded.
+        :return: A generator of: (offset, code, payload).
+        :rtype: generator
+        """
+        offset = 0
+        fp = open(self.path)
+        try:
+            for line in fp:
+                if not line.endswith('\n'):
+                    log.error('%s truncated record (discarded)', self.path)
+                    break
+                yield offset, line[0], line[1:-1]
+                offset += len(line)
+        finally:
+            fp.close()
+
+    def readline(self, offset):
+        """
+        Read the record at the specified offset.
+        :param offset: The record offset.
+        :type offset: int
+        :return: The record as: (code, payload).
+        :rtype: tuple
+        """
+        fp = open(self.path)
+        try:
+            fp.seek(offset)
+            line = fp.readline()
+            return line[:1], line[1:-1]
+        finally:
+            fp.close()
+
+    def close(self):
+        """
+        Flush and close.
+        """
+        if not self.fp:
+            return
+        try:
+            self.sync()
+        finally:
+            self.fp.close()
+            self.fp = None
+
+    def unlink(self):
+        """
+        Close and delete.
+        """
+        self.close()
+        unlink(self.path)
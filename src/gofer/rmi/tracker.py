@@ -28,6 +28,8 @@ class Tracker:
     :type __all: dict
     :ivar __cancelled: Cancelled requests.
     :type __cancelled: Canceled
+    :ivar __watched: Cancellation watches by serial number.
+    :type __watched: dict
     :ivar __mutex: The object mutex.
     :type __mutex: RLock
     """
@@ -37,6 +39,7 @@ class Tracker:
     def __init__(self):
         self.__all = dict()
         self.__cancelled = Canceled()
+        self.__watched = dict()
         self.__mutex = RLock()
 
     @synchronized
@@ -78,6 +81,8 @@ class Tracker:
         if sn in self.__all:
             if sn not in self.__cancelled:
                 self.__cancelled.add(sn)
+                for watch in self.__watched.get(sn, []):
+                    watch.signal()
                 return sn
         else:
             raise Exception('serial number (%s), not-found' % sn)
@@ -93,6 +98,35 @@ class Tracker:
         """
         return sn in self.__cancelled
 
+    @synchronized
+    def watch(self, sn):
+        """
+        Watch for cancellation of an RMI request.
+        The watch becomes readable when the request is cancelled.
+        :param sn: An RMI serial number.
+        :type sn: str
+        :return: The watch.  Must be closed.
+        :rtype: Watch
+        """
+        watch = Watch(self, sn)
+        self.__watched.setdefault(sn, []).append(watch)
+        if sn in self.__cancelled:
+            watch.signal()
+        return watch
+
+    @synchronized
+    def unwatch(self, watch):
+        """
+        Discontinue watching for cancellation.
+        :param watch: A watch returned by watch().
+        :type watch: Watch
+        """
+        watched = self.__watched.get(watch.sn, [])
+        if watch in watched:
+            watched.remove(watch)
+        if not watched:
+            self.__watched.pop(watch.sn, None)
+
     @synchronized
     def remove(self, sn):
         """
@@ -104,6 +138,48 @@ class Tracker:
         self.__cancelled.delete(sn)
 
 
+class Watch(object):
+    """
+    A selectable cancellation signal.
+    The read end of a pipe that becomes readable when the
+    watched RMI request is cancelled.
+    :ivar tracker: The tracker.
+    :type tracker: Tracker
+    :ivar sn: The watched RMI serial number.
+    :type sn: str
+    :ivar pipe: The pipe file descriptors (read, write).
+    :type pipe: tuple
+    """
+
+    def __init__(self, tracker, sn):
+        """
+        :param tracker: The tracker.
+        :type tracker: Tracker
+        :param sn: The watched RMI serial number.
+        :type sn: str
+        """
+        self.tracker = tracker
+        self.sn = sn
+        self.pipe = os.pipe()
+
+    def fileno(self):
+        return self.pipe[0]
+
+    def signal(self):
+        """
+        Signal (make readable).
+        """
+        os.write(self.pipe[1], '0')
+
+    def close(self):
+        """
+        Discontinue watching and close the pipe.
+        """
+        self.tracker.unwatch(self)
+        for fd in self.pipe:
+            os.close(fd)
+
+
 class Canceled(object):
     """
     Persistent collection of canceled requests by serial number.
@@ -17,11 +17,15 @@
 Thread Pool classes.
 """
 
+from time import time
 from uuid import uuid4
-from Queue import Queue, Empty
+from collections import deque
+from threading import RLock, Condition
+from Queue import Empty
 from logging import getLogger
 
-from gofer.common import Thread, released, utf8
+from gofer.common import Thread, released, synchronized, utf8
+from gofer.metrics import Counter
 
 
 log = getLogger(__name__)
@@ -30,22 +34,21 @@ log = getLogger(__name__)
 class Worker(Thread):
     """
     Pool (worker) thread.
-    The *busy* marker is queued to ensure that the backlog
-    for busy workers is longer which supports better work distribution.
-    :ivar queue: A thread pool worker.
-    :type queue: Queue
+    Calls are read from the queue shared by all of the workers in the pool.
+    :ivar pool: The pool.
+    :type pool: ThreadPool
     """
     
-    def __init__(self, worker_id, backlog=100):
+    def __init__(self, worker_id, pool):
         """
         :param worker_id: The worker id in the pool.
         :type worker_id: int
-        :param backlog: Limits the number of calls queued.
-        :type backlog: int
+        :param pool: The pool.
+        :type pool: ThreadPool
         """
         name = 'worker-%d' % worker_id
         Thread.__init__(self, name=name)
-        self.queue = Queue(backlog)
+        self.pool = pool
         self.setDaemon(True)
 
     @released
@@ -54,51 +57,119 @@ class Worker(Thread):
         Main run loop; processes input queue.
         """
         while not Thread.aborted():
-            call = self.queue.get()
-            if call == 1:
-                # # busy
-                continue
+            call = self.pool.get(self)
             if not call:
-                # termination requested
+                # terminated or retired
                 return
             try:
                 call()
             except Exception:
                 log.exception(utf8(call))
 
+
+class Queue(object):
+    """
+    The (shared) queue of calls to be executed by the pool workers.
+    :ivar calls: The queued calls (oldest first).
+    :type calls: deque
+    :ivar backlog: Limits the number of calls queued.
+    :type backlog: int
+    :ivar closed: The queue has been closed.
+    :type closed: bool
+    :ivar waiting: The number of (idle) workers waiting for calls.
+    :type waiting: int
+    """
+
+    def __init__(self, backlog=100):
+        """
+        :param backlog: Limits the number of calls queued.
+        :type backlog: int
+        """
+        self.__mutex = RLock()
+        self.__not_empty = Condition(self.__mutex)
+        self.__not_full = Condition(self.__mutex)
+        self.calls = deque()
+        self.backlog = backlog
+        self.closed = False
+        self.waiting = 0
+
+    @synchronized
     def put(self, call):
         """
         Enqueue a call.
+        Blocks while the backlog is full.
         :param call: A call to queue.
         :type call: Call
         """
-        self.queue.put(call)
-        self.queue.put(1)  # busy
+        while len(self.calls) >= self.backlog and not self.closed:
+            self.__not_full.wait()
+        self.calls.append(call)
+        self.__not_empty.notify()
+
+    @synchronized
+    def get(self, timeout=None):
+        """
+        Dequeue the next call.
+        Blocks until a call has been queued or the queue is closed.
+        :param timeout: The (optional) seconds to wait for a call.
+        :type timeout: float
+        :return: The next call.  None when closed.
+        :rtype: Call
+        :raise Empty: on timeout.
+        """
+        if timeout is not None:
+            deadline = time() + timeout
+        self.waiting += 1
+        try:
+            while not self.calls and not self.closed:
+                if timeout is None:
+                    self.__not_empty.wait()
+                    continue
+                remaining = deadline - time()
+                if remaining <= 0:
+                    raise Empty()
+                self.__not_empty.wait(remaining)
+        finally:
+            self.waiting -= 1
+        if self.closed:
+            return None
+        call = self.calls.popleft()
+        self.__not_full.notify()
+        return call
 
+    @synchronized
+    def saturated(self):
+        """
+        Get whether every waiting (idle) worker already has a call queued.
+        :return: True if an additional call would wait.
+        :rtype: bool
+        """
+        return len(self.calls) >= self.waiting
+
+    @synchronized
+    def close(self):
+        """
+        Close the queue.
+        Blocked workers are released.
+        """
+        self.closed = True
+        self.__not_empty.notifyAll()
+        self.__not_full.notifyAll()
+
+    @synchronized
     def drain(self):
         """
         Drain pending calls.
         :return: A list of: Call.
         :rtype: list
         """
-        pending = []
-        while True:
-            try:
-                call = self.queue.get(block=False)
-                if not isinstance(call, Call):
-                    continue
-                pending.append(call)
-            except Empty:
-                break
+        pending = list(self.calls)
+        self.calls.clear()
+        self.__not_full.notifyAll()
         return pending
 
-    def backlog(self):
-        """
-        Get the number of call already queued to this worker.
-        :return: The number of queued calls.
-        :rtype: int
-        """
-        return self.queue.qsize()
+    def __len__(self):
+        return len(self.calls)
 
 
 class Call:
@@ -154,22 +225,98 @@ class Call:
         return utf8(self)
 
 
+class Budget(object):
+    """
+    The (agent-wide) thread budget shared by all thread pools.
+    Threads needed for the pool capacity are reserved and always granted.
+    Threads added above the capacity are granted only while
+    threads remain in the budget.
+    :ivar limit: The max # of threads.  0=unlimited.
+    :type limit: int
+    :ivar used: The # of threads granted.
+    :type used: int
+    """
+
+    def __init__(self, limit=0):
+        """
+        :param limit: The max # of threads.  0=unlimited.
+        :type limit: int
+        """
+        self.__mutex = RLock()
+        self.limit = limit
+        self.used = 0
+
+    @synchronized
+    def acquire(self, reserved=False):
+        """
+        Acquire a thread from the budget.
+        :param reserved: The thread is reserved (always granted).
+        :type reserved: bool
+        :return: True if granted.
+        :rtype: bool
+        """
+        if self.limit and self.used >= self.limit:
+            if not reserved:
+                return False
+            log.warn('thread budget: %d, exceeded', self.limit)
+        self.used += 1
+        return True
+
+    @synchronized
+    def release(self, n=1):
+        """
+        Release threads back to the budget.
+        :param n: The number of threads.
+        :type n: int
+        """
+        self.used = max(0, self.used - n)
+
+
 class ThreadPool:
     """
-    A load distributed thread pool.
+    A load distributed (elastic) thread pool.
+    Calls are queued to a single (shared) queue and executed
+    by the next available worker.  Workers are added (up to the limit)
+    when calls are scheduled and no idle worker is available.  Workers
+    above the capacity are retired after being idle for IDLE seconds.
+    :cvar IDLE: Seconds a surplus worker is idle before retired.
+    :cvar budget: The thread budget shared by all pools.
     :ivar capacity: The min # of workers.
     :type capacity: int
+    :ivar limit: The max # of workers.
+    :type limit: int
+    :ivar queue: The pool queue.
+    :type queue: Queue
     :ivar threads: List of: Worker
     :type threads: list
+    :ivar added: The number of workers added (total).
+    :type added: Counter
+    :ivar retired: The number of workers retired (total).
+    :type retired: Counter
+    :ivar replaced: The number of (hung) workers replaced (total).
+    :type replaced: Counter
     """
 
-    def __init__(self, capacity=1):
+    IDLE = 60
+    budget = Budget()
+
+    def __init__(self, capacity=1, backlog=100, limit=None):
         """
-        :param capacity: The # of workers.
+        :param capacity: The min # of workers.
         :type capacity: int
+        :param backlog: Limits the number of calls queued.
+        :type backlog: int
+        :param limit: The max # of workers.  Default: capacity.
+        :type limit: int
         """
+        self.__mutex = RLock()
         self.capacity = capacity
+        self.limit = max(capacity, limit or capacity)
+        self.queue = Queue(backlog)
         self.threads = []
+        self.added = Counter()
+        self.retired = Counter()
+        self.replaced = Counter()
         for x in range(capacity):
             self.__add()
         
@@ -193,15 +340,57 @@ class ThreadPool:
     def schedule(self, call):
         """
         Schedule a call.
+        A worker is added when no idle worker is available.
         :param call: A call to schedule for execution.
         :param call: Call
         :return: The call ID.
         :rtype: str
         """
-        pool = [(t.backlog(), t) for t in self.threads]
-        pool.sort()
-        backlog, worker = pool[0]
-        worker.put(call)
+        if self.queue.saturated():
+            self.__grow()
+        self.queue.put(call)
+        self.__ensure()
+        return call.id
+
+    def get(self, worker):
+        """
+        Get the next call to be executed by a worker.
+        Surplus workers are retired when idle.
+        :param worker: The requesting worker.
+        :type worker: Worker
+        :return: The next call.  None when terminated or retired.
+        :rtype: Call
+        """
+        while True:
+            if len(self.threads) > self.capacity:
+                timeout = ThreadPool.IDLE
+            else:
+                timeout = None
+            try:
+                return self.queue.get(timeout)
+            except Empty:
+                if self.__retire(worker):
+                    return None
+
+    @synchronized
+    def replace(self, worker):
+        """
+        Replace a (hung) worker.
+        The worker is aborted and exits when the current call returns.
+        :param worker: The worker to be replaced.
+        :type worker: Worker
+        :return: The replacement worker.  None when not a worker in the pool.
+        :rtype: Worker
+        """
+        if worker not in self.threads:
+            return None
+        self.threads.remove(worker)
+        worker.abort()
+        ThreadPool.budget.release()
+        thread = self.__add()
+        self.replaced.increment()
+        log.warn('pool: %s replaced by: %s', worker.name, thread.name)
+        return thread
 
     def shutdown(self):
         """
@@ -210,33 +399,106 @@ class ThreadPool:
         :return: List of orphaned calls.  List of: Call.
         :rtype: list
         """
-        orphans = []
-        for t in self.threads:
+        threads = self.__threads()
+        for t in threads:
             t.abort()
-            t.put(0)
-        for t in self.threads:
+        self.queue.close()
+        for t in threads:
             t.join()
-        for t in self.threads:
-            orphans += t.drain()
-        return orphans
+        self.__release()
+        return self.queue.drain()
 
-    def __add(self):
+    @synchronized
+    def __add(self, reserved=True):
         """
         Add a thread to the pool.
+        :param reserved: The thread is reserved in the budget.
+        :type reserved: bool
+        :return: The added thread.  None when the budget is exhausted.
+        :rtype: Worker
         """
-        n = len(self.threads)
-        thread = Worker(n)
+        if not ThreadPool.budget.acquire(reserved):
+            return None
+        n = self.added.increment()
+        thread = Worker(n, self)
         self.threads.append(thread)
         thread.start()
+        return thread
+
+    @synchronized
+    def __grow(self):
+        """
+        Add a worker when below the limit.
+        """
+        if self.queue.closed:
+            return
+        if len(self.threads) >= self.limit:
+            return
+        thread = self.__add(False)
+        if not thread:
+            log.debug('pool: thread budget exhausted')
+            return
+        log.info('pool: %s added, workers=%d/%d', thread.name, len(self.threads), self.limit)
+
+    @synchronized
+    def __ensure(self):
+        """
+        Ensure that queued calls have a worker.
+        A pool without workers (capacity=0) is granted a (reserved) worker
+        when the thread budget is exhausted or the last worker retired while
+        the call was being queued.
+        """
+        if self.threads or self.queue.closed or not len(self.queue):
+            return
+        thread = self.__add()
+        log.info('pool: %s added, workers=%d/%d', thread.name, len(self.threads), self.limit)
+
+    @synchronized
+    def __retire(self, worker):
+        """
+        Retire a (surplus) worker.
+        Not retired when a call was queued after the wait timed out.
+        :param worker: An idle worker.
+        :type worker: Worker
+        :return: True if retired.
+        :rtype: bool
+        """
+        if len(self.threads) <= self.capacity:
+            return False
+        if len(self.queue):
+            return False
+        self.threads.remove(worker)
+        self.retired.increment()
+        ThreadPool.budget.release()
+        log.info('pool: %s retired, workers=%d/%d', worker.name, len(self.threads), self.limit)
+        return True
+
+    @synchronized
+    def __release(self):
+        """
+        Release all threads back to the budget.
+        """
+        ThreadPool.budget.release(len(self.threads))
+        self.threads = []
+
+    @synchronized
+    def __threads(self):
+        """
+        Get a snapshot of the workers.
+        :return: List of: Worker
+        :rtype: list
+        """
+        return list(self.threads)
 
     def __len__(self):
         return len(self.threads)
 
     def __repr__(self):
         s = list()
-        s.append('pool: capacity=%d' % self.capacity)
-        for t in self.threads:
-            s.append('worker: %s backlog: %d' % (t.name, t.backlog()))
+        s.append('pool: capacity=%d limit=%d' % (self.capacity, self.limit))
+        s.append('backlog: %d' % len(self.queue))
+        for t in self.__threads():
+            s.append('worker: %s' % t.name)
         return '\n'.join(s)
 
 
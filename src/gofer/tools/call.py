@@ -23,6 +23,7 @@ from gofer.messaging import Connection
 from gofer.messaging.adapter.model import DEFAULT_URL
 from gofer.messaging.model import json
 from gofer.proxy import Agent
+from gofer.rmi.context import NOTIFY
 
 
 USAGE = '[options] [<argument>... [<keyword>=<value>...]'
@@ -37,6 +38,7 @@ parser.add_option('-i', '--input', help='RMI input (json) document')
 parser.add_option('-w', '--wait', help='seconds to wait for a synchronous reply')
 parser.add_option('-p', '--progress', help='progress prefix')
 parser.add_option('-d', '--data', help='user (json) data')
+parser.add_option('-n', '--notify', help='status notifications (accepted,started,progress)')
 parser.add_option('-S', '--secret', help='shared secret')
 parser.add_option('-T', '--ttl', help='shared secret')
 parser.add_option('-A', '--authenticator', help='authenticator python package')
@@ -97,6 +99,12 @@ def validate(options):
             print 'Wait must be <int>'
             parser.print_help()
             sys.exit(1)
+    if options.notify:
+        for status in options.notify.split(','):
+            if status not in NOTIFY:
+                print 'Notify must be: %s' % ','.join(NOTIFY)
+                parser.print_help()
+                sys.exit(1)
     if options.data:
         try:
             json.loads(options.data)
@@ -152,6 +160,8 @@ def main():
         g_opt['password'] = options.password
     if options.reply:
         g_opt['reply'] = options.reply
+    if options.notify:
+        g_opt['notify'] = options.notify.split(',')
     if options.input:
         document = json.loads(options.input)
         arguments = tuple(document[0])
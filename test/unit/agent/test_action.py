@@ -33,6 +33,7 @@ class TestAction(TestCase):
         self.assertEqual(action.target, target)
         self.assertEqual(action.interval, delta.return_value)
         self.assertEqual(action.last, dt.return_value)
+        self.assertFalse(action.running)
 
     @patch('gofer.agent.action.inspect.ismethod')
     def test_name(self, is_method):
@@ -83,21 +84,26 @@ class TestAction(TestCase):
         target.assert_called_once_with()
         self.assertEqual(action.last, now)
 
-    @patch('gofer.agent.action.dt')
-    @patch('gofer.agent.action.timedelta', Mock())
-    def test_not_called(self, dt):
-        now = 3
-        dt.utcnow.return_value = now
-        target = Mock()
+    def test_running(self):
+        target = Mock(side_effect=ValueError)
         action = Action(target, seconds=10)
-        action.last = 1
-        action.interval = 2
+        action.name = Mock(return_value='')
+        action.running = True
 
         # test
         action()
 
         # validation
-        self.assertFalse(target.called)
+        target.assert_called_once_with()
+        self.assertFalse(action.running)
+
+    def test_seconds(self):
+        action = Action(Mock(), minutes=2)
+        self.assertEqual(action.seconds, 120)
+
+    def test_seconds_days(self):
+        action = Action(Mock(), days=1, seconds=1, milliseconds=500)
+        self.assertEqual(action.seconds, 86401.5)
 
     def test_unicode(self):
         action = Action(Mock(), hours=24)
@@ -51,6 +51,14 @@ class TestAdmin(TestCase):
         admin = Admin(container)
         self.assertEqual(admin.hello(), 'Hello, I am gofer agent')
 
+    @patch('gofer.agent.builtin.Cache')
+    def test_flush(self, cache):
+        container = Mock()
+        admin = Admin(container)
+        flushed = admin.flush()
+        cache.return_value.flush.assert_called_once_with()
+        self.assertEqual(flushed, cache.return_value.flush.return_value)
+
     def test_echo(self):
         text = 'hello'
         container = Mock()
@@ -74,6 +82,12 @@ class TestAdmin(TestCase):
 
 class TestBuiltin(TestCase):
 
+    def setUp(self):
+        Builtin._Builtin__pool = None
+
+    def tearDown(self):
+        Builtin._Builtin__pool = None
+
     @patch('gofer.agent.builtin.Admin')
     @patch('gofer.agent.builtin.Dispatcher')
     @patch('gofer.agent.builtin.ThreadPool')
@@ -81,7 +95,7 @@ class TestBuiltin(TestCase):
         dispatcher.__iadd__ = Mock()
         plugin = Mock(container=Mock())
         builtin = Builtin(plugin)
-        pool.assert_called_once_with(3)
+        pool.assert_called_once_with(1, limit=Builtin.THREADS)
         dispatcher.assert_called_once_with()
         dispatcher.return_value.__iadd__.assert_called_once_with([admin.return_value])
         admin.assert_called_once_with(plugin.container)
@@ -120,13 +134,31 @@ class TestBuiltin(TestCase):
         dispatcher.__iadd__ = Mock()
         plugin = Mock()
         builtin = Builtin(plugin)
-        result = builtin.dispatch(request)
+        result = builtin.dispatch(request, Mock())
         builtin.dispatcher.dispatch.assert_called_once_with(request)
         self.assertEqual(result, builtin.dispatcher.dispatch.return_value)
 
+    @patch('gofer.agent.builtin.ThreadPool')
+    def test_shared_pool(self, pool):
+        plugin = Mock(container=Mock())
+        builtin = Builtin(plugin)
+        builtin2 = Builtin(plugin)
+        pool.assert_called_once_with(1, limit=Builtin.THREADS)
+        self.assertEqual(builtin.pool, builtin2.pool)
+
     @patch('gofer.agent.builtin.ThreadPool')
     def test_shutdown(self, pool):
         plugin = Mock(container=Mock())
         builtin = Builtin(plugin)
         builtin.shutdown()
+        self.assertFalse(pool.return_value.shutdown.called)
+
+    @patch('gofer.agent.builtin.ThreadPool')
+    def test_terminate(self, pool):
+        plugin = Mock(container=Mock())
+        Builtin(plugin)
+        orphans = Builtin.terminate()
         pool.return_value.shutdown.assert_called_once_with()
+        self.assertEqual(orphans, pool.return_value.shutdown.return_value)
+        self.assertEqual(Builtin._Builtin__pool, None)
+        self.assertEqual(Builtin.terminate(), [])
@@ -74,14 +74,33 @@ class TestActions(TestCase):
 
 class TestDelegate(TestCase):
 
+    def tearDown(self):
+        Delegate.clear()
+
     def test_init(self):
         Delegate.load.append(1)
         Delegate.unload.append(2)
         d = Delegate()
+        self.assertEqual(Delegate.load, [1])
+        self.assertEqual(Delegate.unload, [2])
+        self.assertEqual(d.load, [])
+        self.assertEqual(d.unload, [])
+
+    def test_clear(self):
+        Delegate.load.append(1)
+        Delegate.unload.append(2)
+        Delegate.clear()
         self.assertEqual(Delegate.load, [])
         self.assertEqual(Delegate.unload, [])
+
+    def test_collated(self):
+        Delegate.load.append(1)
+        Delegate.unload.append(2)
+        d = Delegate.collated()
         self.assertEqual(d.load, [1])
         self.assertEqual(d.unload, [2])
+        self.assertFalse(d.load is Delegate.load)
+        self.assertFalse(d.unload is Delegate.unload)
 
     def test_loaded(self):
         d = Delegate()
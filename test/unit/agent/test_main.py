@@ -11,6 +11,232 @@
 
 from unittest import TestCase
 
+from mock import patch, Mock
+
+from gofer.agent.main import ActionThread, Agent
+
+
+MODULE = 'gofer.agent.main'
+
 
 class Test(TestCase):
-    pass
\ No newline at end of file
+    pass
+
+
+class TestActionThread(TestCase):
+
+    @patch(MODULE + '.ThreadPool')
+    def test_init(self, pool):
+        thread = ActionThread()
+        pool.assert_called_once_with(1, limit=ActionThread.THREADS)
+        self.assertEqual(thread.pool, pool.return_value)
+        self.assertEqual(thread.heap, [])
+        self.assertEqual(thread.scheduled, {})
+        self.assertTrue(thread.isDaemon())
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    @patch(MODULE + '.Plugin')
+    def test_scan(self, plugin):
+        added = Mock()
+        kept = Mock()
+        removed = Mock()
+        plugins = [Mock(actions=[added]), Mock(actions=[kept])]
+        plugin.all.return_value = plugins
+        thread = ActionThread()
+        thread.scheduled = {kept: (100, 1), removed: (100, 2)}
+
+        # test
+        thread.scan(150)
+
+        # validation
+        self.assertEqual(thread.plugins, {added: plugins[0], kept: plugins[1]})
+        self.assertEqual(thread.scheduled[added], (150, 1))
+        self.assertEqual(thread.scheduled[kept], (100, 1))
+        self.assertFalse(removed in thread.scheduled)
+        self.assertEqual(thread.heap, [(150, 1, added)])
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    @patch(MODULE + '.uniform')
+    @patch(MODULE + '.ActionThread.JITTER', 10)
+    def test_schedule_jitter(self, uniform):
+        uniform.return_value = 4
+        action = Mock()
+        thread = ActionThread()
+
+        # test
+        thread.schedule(action, 100)
+
+        # validation
+        uniform.assert_called_once_with(0, 10)
+        self.assertEqual(thread.scheduled[action], (100, 1))
+        self.assertEqual(thread.heap, [(104, 1, action)])
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    def test_fire(self):
+        action = Mock(running=False, seconds=60)
+        thread = ActionThread()
+        thread.schedule(action, 100)
+        thread.heap = []
+
+        # test
+        thread.fire(action, 1, 101)
+
+        # validation
+        thread.pool.run.assert_called_once_with(action)
+        self.assertTrue(action.running)
+        self.assertEqual(thread.scheduled[action], (160, 2))
+        self.assertEqual(thread.heap, [(160, 2, action)])
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    def test_fire_plugin(self):
+        action = Mock(running=False, seconds=60)
+        plugin = Mock()
+        thread = ActionThread()
+        thread.plugins[action] = plugin
+        thread.schedule(action, 100)
+
+        # test
+        thread.fire(action, 1, 101)
+
+        # validation
+        thread.pool.run.assert_called_once_with(thread.perform, plugin, action)
+        self.assertTrue(action.running)
+
+    def test_perform(self):
+        action = Mock(side_effect=ValueError)
+        plugin = Mock()
+        plugin.hold.return_value = True
+
+        # test
+        self.assertRaises(ValueError, ActionThread.perform, plugin, action)
+
+        # validation
+        plugin.hold.assert_called_once_with()
+        action.assert_called_once_with()
+        plugin.unhold.assert_called_once_with()
+
+    def test_perform_not_active(self):
+        action = Mock(running=True)
+        plugin = Mock()
+        plugin.hold.return_value = False
+
+        # test
+        ActionThread.perform(plugin, action)
+
+        # validation
+        self.assertFalse(action.called)
+        self.assertFalse(action.running)
+        self.assertFalse(plugin.unhold.called)
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    def test_fire_running(self):
+        action = Mock(running=True, seconds=60)
+        thread = ActionThread()
+        thread.schedule(action, 100)
+        thread.heap = []
+
+        # test
+        thread.fire(action, 1, 101)
+
+        # validation
+        self.assertFalse(thread.pool.run.called)
+        self.assertEqual(thread.heap, [(160, 2, action)])
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    def test_fire_missed(self):
+        action = Mock(running=False, seconds=60)
+        thread = ActionThread()
+        thread.schedule(action, 100)
+        thread.heap = []
+
+        # test
+        thread.fire(action, 1, 1000)
+
+        # validation
+        self.assertEqual(thread.heap, [(1000, 2, action)])
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    def test_fire_unscheduled(self):
+        action = Mock(running=False, seconds=60)
+        thread = ActionThread()
+        thread.schedule(action, 100)
+        thread.heap = []
+
+        # test
+        thread.fire(action, 18, 101)
+        thread.fire(Mock(), 1, 101)
+
+        # validation
+        self.assertFalse(thread.pool.run.called)
+        self.assertEqual(thread.heap, [])
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    def test_fire_failed(self):
+        action = Mock(running=False, seconds=60)
+        thread = ActionThread()
+        thread.pool.run.side_effect = ValueError
+        thread.schedule(action, 100)
+
+        # test
+        thread.fire(action, 1, 101)
+
+        # validation
+        self.assertFalse(action.running)
+
+    @patch(MODULE + '.ThreadPool', Mock())
+    @patch(MODULE + '.sleep')
+    @patch(MODULE + '.time')
+    @patch(MODULE + '.Thread.aborted')
+    @patch(MODULE + '.Plugin')
+    def test_run(self, plugin, aborted, time, sleep):
+        action = Mock(running=False, seconds=30)
+        plugin.all.return_value = [Mock(actions=[action])]
+        aborted.side_effect = [False, False, True]
+        time.side_effect = [100, 105]
+        thread = ActionThread()
+
+        # test
+        thread.run()
+
+        # validation
+        thread.pool.run.assert_called_once_with(
+            thread.perform, plugin.all.return_value[0], action)
+        self.assertEqual(plugin.all.call_count, 1)
+        self.assertEqual(sleep.call_args_list[0][0][0], 10)
+        self.assertEqual(sleep.call_args_list[1][0][0], 5)
+
+
+class TestAgent(TestCase):
+
+    @patch(MODULE + '.ActionThread')
+    @patch(MODULE + '.AgentConfig')
+    @patch(MODULE + '.PluginLoader')
+    @patch(MODULE + '.Segment')
+    def test_start(self, segment, loader, config, actions):
+        config.return_value.management.enabled = '0'
+        agent = object.__new__(Agent)
+
+        # test
+        agent.start(False)
+
+        # validation
+        segment.purge.assert_called_once_with()
+        loader.start_all.assert_called_once_with()
+        actions.return_value.start.assert_called_once_with()
+        self.assertFalse(actions.return_value.join.called)
+
+    @patch(MODULE + '.Builtin')
+    @patch(MODULE + '.Plugin')
+    def test_shutdown(self, plugin, builtin):
+        plugins = [Mock(), Mock()]
+        plugins[0].shutdown.side_effect = ValueError
+        plugin.all.return_value = plugins
+        agent = object.__new__(Agent)
+
+        # test
+        agent.shutdown()
+
+        # validation
+        for p in plugins:
+            p.shutdown.assert_called_once_with(False)
+        builtin.terminate.assert_called_once_with()
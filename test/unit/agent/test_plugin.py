@@ -9,13 +9,18 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import sys
+
 from unittest import TestCase
 
 from mock import patch, Mock, ANY
 
+from gofer.messaging import Document
 from gofer.common import Singleton
+from gofer.agent.decorator import Delegate
 from gofer.agent.plugin import attach
-from gofer.agent.plugin import Container, Plugin
+from gofer.agent.plugin import Container, Plugin, PluginLoader
+from gofer.agent.rmi import Task
 
 
 class TestAttach(TestCase):
@@ -111,6 +116,92 @@ class TestContainer(TestCase):
         plugins = cnt.all()
         self.assertEqual(plugins, [1, 2])
 
+    def plugin(self, name, classes, forward='', accept=''):
+        plugin = Mock(
+            path='/%s.conf' % name,
+            forward=set(forward.split(',')),
+            accept=set(accept.split(',')))
+        plugin.name = name
+        plugin.dispatcher.catalog = dict((c, c) for c in classes)
+        plugin.provides.side_effect = plugin.dispatcher.catalog.__contains__
+        return plugin
+
+    def test_route(self):
+        a = self.plugin('A', ['Dog'], forward='B,C')
+        b = self.plugin('B', ['Cat'], accept='A')
+        c = self.plugin('C', ['Fish'], accept='*')
+        d = self.plugin('D', ['Bird'], forward='*')
+        cnt = Container()
+        for plugin in (a, b, c, d):
+            cnt.add(plugin)
+
+        # test
+        self.assertEqual(cnt.route(a, 'Cat'), b)
+        self.assertEqual(cnt.route(a, 'Fish'), c)
+        self.assertEqual(cnt.route(a, 'Bird'), None)
+        self.assertEqual(cnt.route(d, 'Fish'), c)
+        self.assertEqual(cnt.route(d, 'Cat'), None)
+        self.assertEqual(cnt.route(b, 'Dog'), None)
+        self.assertEqual(cnt.route(Mock(), 'Dog'), None)
+
+        # validation
+        self.assertEqual(cnt.routes[a], {'Cat': b, 'Fish': c})
+
+    def test_inactive(self):
+        a = self.plugin('A', ['Dog'], forward='B,C,D')
+        b = self.plugin('B', [], accept='A')
+        c = self.plugin('C', [], accept='*')
+        d = self.plugin('D', [], accept='')
+        e = self.plugin('E', [], accept='*')
+        for plugin in (a, b, c, d, e):
+            plugin.lazy = True
+            plugin.impl = None
+        c.impl = Mock()
+        cnt = Container()
+        for plugin in (a, b, c, d, e):
+            cnt.add(plugin)
+
+        # test
+        inactive = cnt.inactive(a)
+
+        # validation
+        self.assertEqual(inactive, [b])
+
+    def test_route_cached(self):
+        a = self.plugin('A', ['Dog'], forward='*')
+        b = self.plugin('B', ['Cat'], accept='*')
+        cnt = Container()
+        cnt.add(a)
+        cnt.add(b)
+        cnt.route(a, 'Cat')
+        routes = cnt.routes
+
+        # test
+        self.assertEqual(cnt.route(a, 'Cat'), b)
+
+        # validation
+        self.assertTrue(cnt.routes is routes)
+
+    def test_route_invalidated(self):
+        a = self.plugin('A', ['Dog'], forward='*')
+        b = self.plugin('B', ['Cat'], accept='*')
+        cnt = Container()
+        cnt.add(a)
+        cnt.add(b)
+        self.assertEqual(cnt.route(a, 'Cat'), b)
+        # deleted
+        cnt.delete(b)
+        self.assertEqual(cnt.routes, None)
+        self.assertEqual(cnt.route(a, 'Cat'), None)
+        # added
+        cnt.add(b)
+        self.assertEqual(cnt.routes, None)
+        self.assertEqual(cnt.route(a, 'Cat'), b)
+        # classes changed
+        b.dispatcher.catalog['Fish'] = 'Fish'
+        cnt.invalidate()
+        self.assertEqual(cnt.route(a, 'Fish'), b)
+
 
 class TestPlugin(TestCase):
 
@@ -128,21 +219,60 @@ class TestPlugin(TestCase):
         plugin = Plugin(descriptor, path)
 
         # validation
-        pool.assert_called_once_with(threads)
+        self.assertFalse(pool.called)
+        self.assertFalse(scheduler.called)
         dispatcher.assert_called_once_with()
-        scheduler.assert_called_once_with(plugin)
         delegate.assert_called_once_with()
         self.assertEqual(plugin.descriptor, descriptor)
         self.assertEqual(plugin.path, path)
-        self.assertEqual(plugin.pool, pool.return_value)
+        self.assertEqual(plugin.pool, None)
         self.assertEqual(plugin.impl, None)
         self.assertEqual(plugin.actions, [])
         self.assertEqual(plugin.dispatcher, dispatcher.return_value)
         self.assertEqual(plugin.whiteboard, whiteboard.return_value)
-        self.assertEqual(plugin.scheduler, scheduler.return_value)
+        self.assertEqual(plugin.scheduler, None)
         self.assertEqual(plugin.delegate, delegate.return_value)
         self.assertEqual(plugin.authenticator, None)
-        self.assertEqual(plugin.consumer, None)
+        self.assertEqual(plugin.consumers, [])
+        self.assertFalse(plugin.is_started)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_init_delegate(self):
+        hook = Mock()
+        Delegate.load.append(hook)
+        try:
+            # test
+            plugin = Plugin(Mock(), '')
+            # validation
+            self.assertEqual(plugin.delegate.load, [])
+            self.assertEqual(Delegate.load, [hook])
+        finally:
+            Delegate.clear()
+
+    @patch('gofer.agent.plugin.Scheduler')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.ThreadPool')
+    def test_allocate(self, pool, scheduler):
+        descriptor = Mock(main=Mock(threads='2:4', lazy='0'))
+        plugin = Plugin(descriptor, '')
+
+        # test
+        plugin._allocate()
+        plugin._allocate()
+
+        # validation
+        pool.assert_called_once_with(2, limit=4)
+        scheduler.assert_called_once_with(plugin)
+        self.assertEqual(plugin.pool, pool.return_value)
+        self.assertEqual(plugin.scheduler, scheduler.return_value)
+
+    def test_threads(self):
+        descriptor = Mock(main=Mock(threads=None))
+        self.assertEqual(Plugin._threads(descriptor), (1, 1))
+        descriptor = Mock(main=Mock(threads='4'))
+        self.assertEqual(Plugin._threads(descriptor), (4, 4))
+        descriptor = Mock(main=Mock(threads='2:10'))
+        self.assertEqual(Plugin._threads(descriptor), (2, 10))
 
     @patch('gofer.agent.plugin.BrokerModel')
     @patch('gofer.agent.plugin.Connector')
@@ -154,7 +284,9 @@ class TestPlugin(TestCase):
             main=Mock(
                 enabled='1',
                 threads=4,
+                consumers='3',
                 latency=0.5,
+                progress=2.0,
                 forward='a, b, c',
                 accept='d, e, f'),
             messaging=Mock(
@@ -171,6 +303,10 @@ class TestPlugin(TestCase):
         self.assertEqual(plugin.uuid, descriptor.messaging.uuid)
         # latency
         self.assertEqual(plugin.latency, descriptor.main.latency)
+        # progress
+        self.assertEqual(plugin.progress, descriptor.main.progress)
+        # n_consumers
+        self.assertEqual(plugin.n_consumers, 3)
         # url
         self.assertEqual(plugin.url, descriptor.messaging.url)
         # enabled
@@ -194,11 +330,45 @@ class TestPlugin(TestCase):
         # is_started
         self.assertEqual(plugin.is_started, plugin.scheduler.isAlive.return_value)
 
+    @patch('gofer.agent.plugin.Pool')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.ThreadPool', Mock())
+    def test_workers(self, pool):
+        descriptor = Mock(
+            main=Mock(threads=4, lazy='0'),
+            fork=Mock(processes='3', max_calls='100', max_rss='200'))
+
+        # test
+        plugin = Plugin(descriptor, '')
+        workers = plugin.workers
+
+        # validation
+        pool.assert_called_once_with(3, calls=100, rss=200)
+        self.assertEqual(workers, pool.return_value)
+        self.assertEqual(plugin.workers, workers)
+        self.assertEqual(pool.call_count, 1)
+
+    @patch('gofer.agent.plugin.Pool')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.ThreadPool', Mock())
+    def test_workers_not_configured(self, pool):
+        descriptor = Mock(main=Mock(threads=4), fork=Mock(processes='0'))
+
+        # test
+        plugin = Plugin(descriptor, '')
+        workers = plugin.workers
+
+        # validation
+        self.assertEqual(workers, None)
+        self.assertFalse(pool.called)
+
     @patch('gofer.agent.plugin.Scheduler')
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     @patch('gofer.agent.plugin.ThreadPool', Mock())
     def test_start(self, scheduler):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
         scheduler.return_value.isAlive.return_value = False
 
         # test
@@ -207,6 +377,7 @@ class TestPlugin(TestCase):
         plugin.start()
 
         # validation
+        scheduler.assert_called_once_with(plugin)
         plugin.attach.assert_called_once_with()
         scheduler.return_value.start.assert_called_once_with()
 
@@ -214,11 +385,12 @@ class TestPlugin(TestCase):
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     @patch('gofer.agent.plugin.ThreadPool', Mock())
     def test_start_already_started(self, scheduler):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
         scheduler.return_value.isAlive.return_value = True
 
         # test
         plugin = Plugin(descriptor, '')
+        plugin._allocate()
         plugin.attach = Mock()
         plugin.start()
 
@@ -230,11 +402,12 @@ class TestPlugin(TestCase):
     @patch('gofer.agent.plugin.ThreadPool')
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_shutdown(self, pool, scheduler):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
         scheduler.return_value.isAlive.return_value = True
 
         # test
         plugin = Plugin(descriptor, '')
+        plugin._allocate()
         plugin.detach = Mock()
         plugin.shutdown(False)
 
@@ -244,11 +417,31 @@ class TestPlugin(TestCase):
         scheduler.return_value.join.assert_called_once_with()
         pool.return_value.shutdown.assert_called_once_with()
 
+    @patch('gofer.agent.plugin.Pool')
+    @patch('gofer.agent.plugin.Scheduler')
+    @patch('gofer.agent.plugin.ThreadPool', Mock())
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_shutdown_workers(self, scheduler, pool):
+        descriptor = Mock(
+            main=Mock(threads=4, lazy='0'),
+            fork=Mock(processes='2', max_calls='0', max_rss='0'))
+        scheduler.return_value.isAlive.return_value = True
+
+        # test
+        plugin = Plugin(descriptor, '')
+        plugin._allocate()
+        plugin.detach = Mock()
+        plugin.workers
+        plugin.shutdown(False)
+
+        # validation
+        pool.return_value.shutdown.assert_called_once_with()
+
     @patch('gofer.agent.plugin.Scheduler')
     @patch('gofer.agent.plugin.ThreadPool')
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_shutdown_not_running(self, pool, scheduler):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
         scheduler.return_value.isAlive.return_value = False
 
         # test
@@ -302,12 +495,13 @@ class TestPlugin(TestCase):
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_attach(self, pool, model, consumer, node):
         queue = 'test'
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, consumers=None, lazy='0'))
         pool.return_value.run.side_effect = lambda fn: fn()
         model.return_value.queue = queue
 
         # test
         plugin = Plugin(descriptor, '')
+        plugin._allocate()
         plugin.authenticator = Mock()
         plugin.detach = Mock()
         plugin.refresh = Mock()
@@ -322,19 +516,50 @@ class TestPlugin(TestCase):
         consumer = consumer.return_value
         consumer.start.assert_called_once_with()
         self.assertEqual(consumer.authenticator, plugin.authenticator)
-        self.assertEqual(plugin.consumer, consumer)
+        self.assertEqual(plugin.consumers, [consumer])
+
+    @patch('gofer.agent.plugin.Node')
+    @patch('gofer.agent.plugin.RequestConsumer')
+    @patch('gofer.agent.plugin.BrokerModel')
+    @patch('gofer.agent.plugin.ThreadPool')
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_attach_consumers(self, pool, model, consumer, node):
+        descriptor = Mock(main=Mock(threads=4, consumers='3', lazy='0'))
+        pool.return_value.run.side_effect = lambda fn: fn()
+        consumers = [Mock(), Mock(), Mock()]
+        consumer.side_effect = consumers
+
+        # test
+        plugin = Plugin(descriptor, '')
+        plugin._allocate()
+        plugin.detach = Mock()
+        plugin.refresh = Mock()
+        plugin.attach()
+
+        # validation
+        self.assertEqual(
+            consumer.call_args_list,
+            [
+                ((node.return_value, plugin), {}),
+                ((node.return_value, plugin), {}),
+                ((node.return_value, plugin), {}),
+            ])
+        for c in consumers:
+            c.start.assert_called_once_with()
+        self.assertEqual(plugin.consumers, consumers)
 
     @patch('gofer.agent.plugin.BrokerModel')
     @patch('gofer.agent.plugin.ThreadPool', Mock())
     @patch('gofer.agent.plugin.Scheduler', Mock())
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_detach(self, model):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
         consumer = Mock()
 
         # test
         plugin = Plugin(descriptor, '')
-        plugin.consumer = consumer
+        plugin.consumers = [consumer]
         plugin.detach()
 
         # validation
@@ -343,14 +568,14 @@ class TestPlugin(TestCase):
         model.assert_called_with(plugin)
         model = model.return_value
         model.teardown.assert_called_once_with()
-        self.assertEqual(plugin.consumer, None)
+        self.assertEqual(plugin.consumers, [])
 
     @patch('gofer.agent.plugin.BrokerModel')
     @patch('gofer.agent.plugin.ThreadPool', Mock())
     @patch('gofer.agent.plugin.Scheduler', Mock())
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_detach_not_attached(self, model):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
 
         # test
         plugin = Plugin(descriptor, '')
@@ -364,25 +589,25 @@ class TestPlugin(TestCase):
     @patch('gofer.agent.plugin.Scheduler', Mock())
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_detach_no_teardown(self, model):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
         consumer = Mock()
 
         # test
         plugin = Plugin(descriptor, '')
-        plugin.consumer = consumer
+        plugin.consumers = [consumer]
         plugin.detach(teardown=False)
 
         # validation
         consumer.shutdown.assert_called_once_with()
         consumer.join.assert_called_once_with()
         self.assertFalse(model.teardown.called)
-        self.assertEqual(plugin.consumer, None)
+        self.assertEqual(plugin.consumers, [])
 
     @patch('gofer.agent.plugin.ThreadPool', Mock())
     @patch('gofer.agent.plugin.Scheduler', Mock())
     @patch('gofer.agent.plugin.Whiteboard', Mock())
     def test_provides(self):
-        descriptor = Mock(main=Mock(threads=4))
+        descriptor = Mock(main=Mock(threads=4, lazy='0'))
 
         # test
         plugin = Plugin(descriptor, '')
@@ -391,3 +616,530 @@ class TestPlugin(TestCase):
 
         # validation
         self.assertEqual(provides, plugin.dispatcher.provides.return_value)
+
+    @patch('gofer.agent.plugin.ThreadPool', Mock())
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Plugin.container')
+    def test_dispatch(self, container):
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(Mock(main=Mock(threads=4, lazy='0')), '')
+        plugin.dispatcher = Mock()
+        plugin.dispatcher.provides.return_value = True
+
+        # test
+        result = plugin.dispatch(request, Document(classname='Dog'))
+
+        # validation
+        plugin.dispatcher.dispatch.assert_called_once_with(request)
+        self.assertEqual(result, plugin.dispatcher.dispatch.return_value)
+        self.assertFalse(container.route.called)
+
+    @patch('gofer.agent.plugin.ThreadPool', Mock())
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Plugin.container')
+    def test_dispatch_forwarded(self, container):
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(Mock(main=Mock(threads=4, lazy='0')), '')
+        plugin.dispatcher = Mock()
+        plugin.dispatcher.provides.return_value = False
+        target = container.route.return_value
+
+        # test
+        result = plugin.dispatch(request, Document(classname='Dog'))
+
+        # validation
+        container.route.assert_called_once_with(plugin, 'Dog')
+        target.forwarded.assert_called_once_with(request)
+        self.assertEqual(result, target.forwarded.return_value)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_forwarded(self):
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(Mock(main=Mock(threads=4, lazy='0')), '')
+        plugin.activate = Mock()
+        plugin.dispatcher = Mock()
+
+        # test
+        result = plugin.forwarded(request)
+
+        # validation
+        plugin.dispatcher.dispatch.assert_called_once_with(request)
+        self.assertEqual(result, plugin.dispatcher.dispatch.return_value)
+        self.assertFalse(plugin.activate.called)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_forwarded_lazy(self):
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(Mock(main=Mock(threads=4, lazy='1')), '')
+        plugin.activate = Mock()
+        plugin.release = Mock()
+        plugin.dispatcher = Mock()
+        plugin.dispatcher.dispatch.side_effect = ValueError
+
+        # test
+        self.assertRaises(ValueError, plugin.forwarded, request)
+
+        # validation
+        plugin.activate.assert_called_once_with()
+        plugin.release.assert_called_once_with()
+
+    @patch('gofer.agent.plugin.ThreadPool', Mock())
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Plugin.container')
+    def test_dispatch_not_routed(self, container):
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(Mock(main=Mock(threads=4, lazy='0')), '')
+        plugin.dispatcher = Mock()
+        plugin.dispatcher.provides.return_value = False
+        container.route.return_value = None
+        container.inactive.return_value = []
+
+        # test
+        plugin.dispatch(request, Document(classname='Dog'))
+
+        # validation
+        plugin.dispatcher.dispatch.assert_called_once_with(request)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Plugin.container')
+    def test_route(self, container):
+        plugin = Plugin(Mock(main=Mock(lazy='0')), '')
+
+        # test
+        routed = plugin.route('Dog')
+
+        # validation
+        container.route.assert_called_once_with(plugin, 'Dog')
+        self.assertEqual(routed, container.route.return_value)
+        self.assertFalse(container.inactive.called)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Plugin.container')
+    def test_route_activated(self, container):
+        plugin = Plugin(Mock(main=Mock(lazy='0')), '')
+        inactive = [Mock(), Mock(), Mock()]
+        container.inactive.return_value = inactive
+        container.route.side_effect = [None, None, inactive[1]]
+
+        # test
+        routed = plugin.route('Dog')
+
+        # validation
+        container.inactive.assert_called_once_with(plugin)
+        self.assertEqual(routed, inactive[1])
+        for target in inactive[:2]:
+            target.activate.assert_called_once_with()
+            target.release.assert_called_once_with()
+        self.assertFalse(inactive[2].activate.called)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.Plugin.container')
+    def test_route_not_found(self, container):
+        plugin = Plugin(Mock(main=Mock(lazy='0')), '')
+        inactive = [Mock()]
+        container.inactive.return_value = inactive
+        container.route.return_value = None
+
+        # test
+        routed = plugin.route('Dog')
+
+        # validation
+        self.assertEqual(routed, None)
+        inactive[0].activate.assert_called_once_with()
+        inactive[0].release.assert_called_once_with()
+
+
+    @patch('gofer.agent.plugin.Scheduler', Mock())
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    @patch('gofer.agent.plugin.ThreadPool')
+    def test_allocate_lazy(self, pool):
+        descriptor = Mock(main=Mock(threads='2:4', lazy='1'))
+        plugin = Plugin(descriptor, '')
+
+        # test
+        plugin._allocate()
+
+        # validation
+        pool.assert_called_once_with(0, limit=4)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_dispatch_lazy(self):
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(Mock(main=Mock(threads=4, lazy='1')), '')
+        plugin.activate = Mock()
+        plugin.release = Mock()
+        plugin.dispatcher = Mock()
+        plugin.dispatcher.provides.return_value = True
+
+        # test
+        result = plugin.dispatch(request, Document(classname='Dog'))
+
+        # validation
+        plugin.activate.assert_called_once_with()
+        plugin.release.assert_called_once_with()
+        self.assertEqual(result, plugin.dispatcher.dispatch.return_value)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_dispatch_lazy_failed(self):
+        request = Mock(request={'classname': 'Dog'})
+        plugin = Plugin(Mock(main=Mock(threads=4, lazy='1')), '')
+        plugin.activate = Mock()
+        plugin.release = Mock()
+        plugin.dispatcher = Mock()
+        plugin.dispatcher.dispatch.side_effect = ValueError
+
+        # test
+        self.assertRaises(ValueError, plugin.dispatch, request, Document(classname='Dog'))
+
+        # validation
+        plugin.release.assert_called_once_with()
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_hold(self):
+        plugin = Plugin(Mock(main=Mock(lazy='1', idle='10')), '')
+        plugin.impl = Mock()
+
+        # test
+        held = plugin.hold()
+
+        # validation
+        self.assertTrue(held)
+        self.assertEqual(plugin.calls, 1)
+        self.assertEqual(plugin.used, 0)
+        self.assertEqual(plugin.evict(), 0)
+        plugin.unhold()
+        self.assertEqual(plugin.calls, 0)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_hold_not_active(self):
+        plugin = Plugin(Mock(main=Mock(lazy='1', idle='10')), '')
+
+        # test
+        held = plugin.hold()
+
+        # validation
+        self.assertFalse(held)
+        self.assertEqual(plugin.calls, 0)
+
+    @patch('gofer.agent.plugin.Janitor')
+    @patch('gofer.agent.plugin.PluginLoader._import')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_activate(self, _import, janitor):
+        plugin = Plugin(Mock(main=Mock(lazy='1', idle='10')), '')
+        plugin.delegate = Mock()
+
+        def imported(p):
+            p.impl = Mock()
+
+        _import.side_effect = imported
+
+        # test
+        plugin.activate()
+        plugin.activate()
+
+        # validation
+        _import.assert_called_once_with(plugin)
+        plugin.delegate.loaded.assert_called_once_with()
+        janitor.instance.return_value.add.assert_called_once_with(plugin)
+        self.assertEqual(plugin.calls, 2)
+        self.assertTrue(plugin.used > 0)
+
+    @patch('gofer.agent.plugin.Janitor')
+    @patch('gofer.agent.plugin.PluginLoader._import')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_activate_failed(self, _import, janitor):
+        plugin = Plugin(Mock(main=Mock(lazy='1', idle='10')), '')
+        plugin.delegate = Mock()
+        plugin.delegate.loaded.side_effect = ValueError
+
+        def imported(p):
+            p.impl = Mock()
+
+        _import.side_effect = imported
+
+        # test
+        self.assertRaises(ValueError, plugin.activate)
+
+        # validation
+        self.assertEqual(plugin.impl, None)
+        self.assertEqual(plugin.calls, 0)
+        self.assertFalse(janitor.called)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_release(self):
+        plugin = Plugin(Mock(), '')
+        plugin.calls = 2
+
+        # test
+        plugin.release()
+
+        # validation
+        self.assertEqual(plugin.calls, 1)
+        self.assertTrue(plugin.used > 0)
+
+    @patch('gofer.agent.plugin.time')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_evict(self, time):
+        time.return_value = 100
+        plugin = Plugin(Mock(main=Mock(idle='10')), '')
+        plugin.deactivate = Mock()
+        plugin.impl = Mock()
+        plugin.used = 80
+
+        # test
+        evicted = plugin.evict()
+
+        # validation
+        plugin.deactivate.assert_called_once_with()
+        self.assertEqual(evicted, 1)
+
+    @patch('gofer.agent.plugin.time')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_evict_not_idle(self, time):
+        time.return_value = 100
+        plugin = Plugin(Mock(main=Mock(idle='10')), '')
+        plugin.deactivate = Mock()
+        plugin.impl = Mock()
+        plugin.used = 95
+
+        # test
+        evicted = plugin.evict()
+
+        # validation
+        self.assertFalse(plugin.deactivate.called)
+        self.assertEqual(evicted, 0)
+
+    @patch('gofer.agent.plugin.time')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_evict_busy(self, time):
+        time.return_value = 100
+        plugin = Plugin(Mock(main=Mock(idle='10')), '')
+        plugin.deactivate = Mock()
+        plugin.impl = Mock()
+        plugin.calls = 1
+
+        # test
+        evicted = plugin.evict()
+
+        # validation
+        self.assertFalse(plugin.deactivate.called)
+        self.assertEqual(evicted, 0)
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_evict_not_active(self):
+        plugin = Plugin(Mock(main=Mock(idle='10')), '')
+        plugin.deactivate = Mock()
+
+        # test
+        evicted = plugin.evict()
+
+        # validation
+        self.assertFalse(plugin.deactivate.called)
+        self.assertEqual(evicted, 0)
+
+    @patch('gofer.agent.plugin.Plugin.container')
+    @patch('gofer.agent.plugin.Janitor')
+    @patch('gofer.agent.plugin.Dispatcher')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_deactivate(self, dispatcher, janitor, container):
+        plugin = Plugin(Mock(main=Mock(idle='10')), '')
+        plugin.impl = Mock(__name__='test.deactivated')
+        plugin.actions = [Mock()]
+        plugin.delegate = Mock()
+        plugin._Plugin__workers = Mock()
+        _dispatcher = plugin.dispatcher
+        _delegate = plugin.delegate
+        workers = plugin._Plugin__workers
+        sys.modules[plugin.impl.__name__] = plugin.impl
+
+        # test
+        plugin.deactivate()
+
+        # validation
+        janitor.instance.return_value.remove.assert_called_once_with(plugin)
+        _dispatcher.close.assert_called_once_with()
+        _delegate.unloaded.assert_called_once_with()
+        workers.shutdown.assert_called_once_with()
+        container.invalidate.assert_called_once_with()
+        self.assertFalse('test.deactivated' in sys.modules)
+        self.assertEqual(plugin.dispatcher, dispatcher.return_value)
+        self.assertEqual(plugin._Plugin__workers, None)
+        self.assertEqual(plugin.actions, [])
+        self.assertEqual(plugin.impl, None)
+
+    @patch('gofer.agent.plugin.Janitor')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_deactivate_not_active(self, janitor):
+        plugin = Plugin(Mock(main=Mock(idle='10')), '')
+        plugin.dispatcher = Mock()
+
+        # test
+        plugin.deactivate()
+
+        # validation
+        self.assertFalse(janitor.called)
+        self.assertFalse(plugin.dispatcher.close.called)
+
+    @patch('gofer.agent.plugin.Plugin.delete')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_unload_lazy(self, delete):
+        plugin = Plugin(Mock(main=Mock(lazy='1')), '')
+        plugin.shutdown = Mock()
+        plugin.deactivate = Mock()
+        plugin.dispatcher = Mock()
+
+        # test
+        plugin.unload()
+
+        # validation
+        delete.assert_called_once_with(plugin)
+        plugin.shutdown.assert_called_once_with()
+        plugin.deactivate.assert_called_once_with()
+        self.assertFalse(plugin.dispatcher.close.called)
+
+    @patch('gofer.agent.plugin.PluginLoader.load')
+    @patch('gofer.agent.plugin.Plugin.delete')
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_reload(self, delete, load):
+        plugin = Plugin(Mock(main=Mock(lazy='0')), '/tmp/plugin.conf')
+        task = Task(Mock())
+        calls = [Mock(fn=task), Mock(fn=Mock())]
+        plugin.shutdown = Mock(return_value=calls)
+        plugin.dispatcher = Mock()
+        plugin.delegate = Mock()
+        reloaded = load.return_value
+        pending = reloaded.scheduler.pending
+
+        # test
+        plugin.reload()
+
+        # validation
+        delete.assert_called_once_with(plugin)
+        plugin.shutdown.assert_called_once_with(False)
+        load.assert_called_once_with(plugin.path)
+        self.assertEqual(task.transaction.plugin, reloaded)
+        self.assertEqual(task.transaction.pending, pending)
+        pending.adopt.assert_called_once_with(task.transaction.id)
+        self.assertEqual(
+            reloaded.pool.schedule.call_args_list,
+            [((c,), {}) for c in calls])
+        reloaded.start.assert_called_once_with()
+
+
+class TestPluginLoader(TestCase):
+
+    @staticmethod
+    def plugin(name, *requires):
+        plugin = Mock(requires=set(requires), enabled=True)
+        plugin.name = name
+        return plugin
+
+    @patch('gofer.agent.plugin.Whiteboard', Mock())
+    def test_requires(self):
+        plugin = Plugin(Mock(main=Mock(requires=' a, b ,')), '')
+        self.assertEqual(plugin.requires, set(['a', 'b']))
+        plugin = Plugin(Mock(main=Mock(requires=None)), '')
+        self.assertEqual(plugin.requires, set())
+
+    def test_ordered(self):
+        a = self.plugin('a', 'b', 'c')
+        b = self.plugin('b', 'c')
+        c = self.plugin('c')
+        d = self.plugin('d', 'x')
+        e = self.plugin('e', 'c')
+
+        # test
+        waves = PluginLoader.ordered([a, b, c, d, e])
+
+        # validation
+        self.assertEqual(waves, [[c, d], [b, e], [a]])
+
+    def test_concurrently(self):
+        plugins = [self.plugin('a'), self.plugin('b'), self.plugin('c')]
+
+        def fn(plugin):
+            if plugin.name == 'b':
+                raise ValueError()
+            return plugin.name
+
+        # test
+        returned = PluginLoader.concurrently(fn, plugins)
+
+        # validation
+        self.assertEqual(returned, ['a', None, 'c'])
+
+    @patch('gofer.agent.plugin.PluginLoader._load')
+    @patch('gofer.agent.plugin.PluginLoader._read')
+    @patch('gofer.agent.plugin.os.listdir')
+    @patch('gofer.agent.plugin.mkdir', Mock())
+    def test_load_all(self, listdir, read, load):
+        a = self.plugin('a')
+        b = self.plugin('b', 'a')
+        c = self.plugin('c', 'x')
+        d = self.plugin('d', 'c')
+        e = self.plugin('e')
+        e.enabled = False
+        f = self.plugin('f')
+        g = self.plugin('g', 'f')
+        plugins = dict(('%s.conf' % p.name, p) for p in (a, b, c, d, e, f, g))
+        listdir.return_value = sorted(plugins) + ['x.txt']
+        read.side_effect = lambda path: plugins[path.split('/')[-1]]
+        load.side_effect = lambda p: p if p != f else None
+
+        # test
+        loaded = PluginLoader.load_all()
+
+        # validation
+        self.assertEqual(loaded, [a, b])
+        self.assertEqual(
+            sorted([c[0][0].name for c in load.call_args_list]),
+            ['a', 'b', 'f'])
+
+    @patch('gofer.agent.plugin.Plugin.all')
+    def test_start_all(self, _all):
+        started = []
+        a = self.plugin('a')
+        a.start.side_effect = lambda: started.append(a)
+        b = self.plugin('b', 'a')
+        b.start.side_effect = lambda: started.append(b)
+        _all.return_value = [b, a]
+
+        # test
+        PluginLoader.start_all()
+
+        # validation
+        self.assertEqual(started, [a, b])
+
+    @patch('gofer.agent.plugin.PluginLoader._import')
+    @patch('gofer.agent.plugin.Plugin.add')
+    def test_load_lazy(self, add, _import):
+        plugin = self.plugin('a')
+        plugin.lazy = True
+
+        # test
+        loaded = PluginLoader._load(plugin)
+
+        # validation
+        add.assert_called_once_with(plugin)
+        plugin.load.assert_called_once_with()
+        self.assertFalse(_import.called)
+        self.assertEqual(loaded, plugin)
+
+    @patch('gofer.agent.plugin.PluginLoader._import')
+    @patch('gofer.agent.plugin.Plugin.delete')
+    def test_load_failed(self, delete, _import):
+        _import.side_effect = ValueError
+        plugin = self.plugin('a')
+        plugin.lazy = False
+
+        # test
+        loaded = PluginLoader._load(plugin)
+
+        # validation
+        _import.assert_called_once_with(plugin)
+        delete.assert_called_once_with(plugin)
+        self.assertFalse(plugin.load.called)
+        self.assertEqual(loaded, None)
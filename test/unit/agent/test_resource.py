@@ -0,0 +1,239 @@
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+
+from threading import Thread
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from gofer.agent.resource import close, Lease, ResourcePool, Janitor
+
+
+MODULE = 'gofer.agent.resource'
+
+
+class Connection(object):
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestClose(TestCase):
+
+    def test_close(self):
+        resource = Connection()
+        close(resource)
+        self.assertTrue(resource.closed)
+
+    def test_not_closable(self):
+        close(object())
+
+    def test_failed(self):
+        resource = Mock()
+        resource.close.side_effect = ValueError
+        close(resource)
+        resource.close.assert_called_once_with()
+
+
+class TestLease(TestCase):
+
+    def test_with(self):
+        pool = Mock()
+        lease = Lease(pool)
+        with lease as resource:
+            self.assertEqual(resource, pool.get.return_value)
+        pool.put.assert_called_once_with(pool.get.return_value)
+        self.assertEqual(lease.resource, None)
+
+    def test_with_raised(self):
+        pool = Mock()
+        try:
+            with Lease(pool):
+                raise ValueError()
+        except ValueError:
+            pass
+        pool.put.assert_called_once_with(pool.get.return_value)
+
+
+class TestResourcePool(TestCase):
+
+    def setUp(self):
+        patcher = patch(MODULE + '.Janitor')
+        self.janitor = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_init(self):
+        factory = Mock()
+        validate = Mock()
+        pool = ResourcePool(factory, limit=3, idle=10, validate=validate)
+        self.assertEqual(pool.factory, factory)
+        self.assertEqual(pool.limit, 3)
+        self.assertEqual(pool.idle, 10)
+        self.assertEqual(pool.validate, validate)
+        self.assertEqual(pool.resources, [])
+        self.assertEqual(pool.created, 0)
+        self.assertFalse(pool.closed)
+        self.janitor.instance.return_value.add.assert_called_once_with(pool)
+
+    def test_init_not_evicted(self):
+        ResourcePool(Mock(), idle=0)
+        self.assertFalse(self.janitor.instance.called)
+
+    def test_get(self):
+        pool = ResourcePool(Connection, limit=2)
+        resource = pool.get()
+        resource2 = pool.get()
+        self.assertTrue(isinstance(resource, Connection))
+        self.assertNotEqual(resource, resource2)
+        self.assertEqual(pool.created, 2)
+
+    def test_get_reused(self):
+        pool = ResourcePool(Connection)
+        resource = pool.get()
+        pool.put(resource)
+        self.assertEqual(pool.get(), resource)
+        self.assertEqual(pool.created, 1)
+        self.assertEqual(pool.resources, [])
+
+    def test_get_not_healthy(self):
+        validate = Mock(return_value=False)
+        pool = ResourcePool(Connection, validate=validate)
+        resource = pool.get()
+        pool.put(resource)
+
+        # test
+        resource2 = pool.get()
+
+        # validation
+        validate.assert_called_once_with(resource)
+        self.assertTrue(resource.closed)
+        self.assertNotEqual(resource2, resource)
+        self.assertEqual(pool.created, 1)
+
+    def test_get_validate_failed(self):
+        pool = ResourcePool(Connection, validate=Mock(side_effect=ValueError))
+        self.assertFalse(pool.healthy(Connection()))
+
+    def test_get_create_failed(self):
+        pool = ResourcePool(Mock(side_effect=ValueError))
+        self.assertRaises(ValueError, pool.get)
+        self.assertEqual(pool.created, 0)
+
+    def test_get_wait(self):
+        pool = ResourcePool(Connection)
+        resource = pool.get()
+        got = []
+        thread = Thread(target=lambda: got.append(pool.get()))
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+
+        # test
+        pool.put(resource)
+
+        # validation
+        thread.join(5)
+        self.assertEqual(got, [resource])
+
+    def test_get_closed(self):
+        pool = ResourcePool(Connection)
+        pool.close()
+        self.assertRaises(ValueError, pool.get)
+
+    @patch(MODULE + '.time')
+    def test_evict(self, time):
+        time.side_effect = [100, 200, 300]
+        pool = ResourcePool(Connection, limit=2, idle=150)
+        resources = [pool.get(), pool.get()]
+        for resource in resources:
+            pool.put(resource)
+
+        # test
+        evicted = pool.evict()
+
+        # validation
+        self.assertEqual(evicted, 1)
+        self.assertTrue(resources[0].closed)
+        self.assertFalse(resources[1].closed)
+        self.assertEqual(pool.resources, [(resources[1], 200)])
+        self.assertEqual(pool.created, 1)
+
+    def test_evict_never(self):
+        pool = ResourcePool(Connection, idle=0)
+        pool.put(pool.get())
+        self.assertEqual(pool.evict(), 0)
+
+    def test_close(self):
+        pool = ResourcePool(Connection, limit=2)
+        idle = pool.get()
+        busy = pool.get()
+        pool.put(idle)
+
+        # test
+        pool.close()
+        self.assertTrue(idle.closed)
+        self.assertFalse(busy.closed)
+        pool.put(busy)
+
+        # validation
+        self.janitor.instance.return_value.remove.assert_called_once_with(pool)
+        self.assertTrue(busy.closed)
+        self.assertTrue(pool.closed)
+        self.assertEqual(pool.resources, [])
+
+    def test_call(self):
+        pool = ResourcePool(Connection)
+        with pool() as resource:
+            self.assertTrue(isinstance(resource, Connection))
+        self.assertEqual(pool.resources[0][0], resource)
+
+
+class TestJanitor(TestCase):
+
+    @patch(MODULE + '.Janitor.start')
+    def test_instance(self, start):
+        try:
+            janitor = Janitor.instance()
+            self.assertTrue(isinstance(janitor, Janitor))
+            self.assertEqual(Janitor.instance(), janitor)
+            start.assert_called_once_with()
+        finally:
+            Janitor._Janitor__inst = None
+
+    def test_add(self):
+        pool = Mock()
+        janitor = Janitor()
+        janitor.add(pool)
+        self.assertEqual(janitor.registered(), [pool])
+        janitor.remove(pool)
+        janitor.remove(pool)
+        self.assertEqual(janitor.registered(), [])
+
+    @patch(MODULE + '.sleep')
+    @patch(MODULE + '.Thread.aborted')
+    def test_run(self, aborted, sleep):
+        aborted.side_effect = [False, True]
+        pools = [Mock(), Mock()]
+        pools[0].evict.side_effect = ValueError
+        janitor = Janitor()
+        for pool in pools:
+            janitor.add(pool)
+
+        # test
+        janitor.run()
+
+        # validation
+        sleep.assert_called_once_with(Janitor.INTERVAL)
+        for pool in pools:
+            pool.evict.assert_called_once_with()
@@ -9,6 +9,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+from time import time
 from unittest import TestCase
 
 from mock import patch, Mock
@@ -47,12 +48,12 @@ class TestScheduler(TestCase):
             Mock(name='task-2'),
         ]
         tx_list = [
-            Mock(name='tx-1'),
-            Mock(name='tx-2'),
+            Mock(name='tx-1', expired=False),
+            Mock(name='tx-2', expired=False),
         ]
         request_list = [
-            Document(sn=1),
-            Document(sn=2),
+            Document(sn=1, request={'classname': 'A'}),
+            Document(sn=2, request={'classname': 'B'}),
         ]
         task.side_effect = task_list
         tx.side_effect = tx_list
@@ -68,17 +69,13 @@ class TestScheduler(TestCase):
         # validation
         builtin.return_value.pool.run.assert_called_once_with(task_list[0])
         plugin.pool.run.assert_called_once_with(task_list[1])
-        self.assertEqual(
-            select_plugin.call_args_list,
-            [
-                ((request_list[0],), {}),
-                ((request_list[1],), {}),
-            ])
+        call_list = [c[0][0] for c in select_plugin.call_args_list]
+        self.assertEqual([c.classname for c in call_list], ['A', 'B'])
         self.assertEqual(
             tx.call_args_list,
             [
-                ((builtin.return_value, pending.return_value, request_list[0]), {}),
-                ((plugin, pending.return_value, request_list[1]), {})
+                ((builtin.return_value, pending.return_value, request_list[0], call_list[0]), {}),
+                ((plugin, pending.return_value, request_list[1], call_list[1]), {})
             ])
         self.assertEqual(
             task.call_args_list,
@@ -87,6 +84,29 @@ class TestScheduler(TestCase):
                 ((tx_list[1],), {}),
             ])
 
+    @patch('gofer.common.Thread.aborted')
+    @patch('gofer.agent.rmi.Transaction')
+    @patch('gofer.agent.rmi.Scheduler.select_plugin')
+    @patch('gofer.agent.rmi.Task')
+    @patch('gofer.agent.rmi.Pending')
+    @patch('gofer.agent.rmi.Builtin', Mock())
+    @patch('threading.Thread.setDaemon', Mock())
+    def test_run_expired(self, pending, task, select_plugin, tx, aborted):
+        plugin = Mock()
+        aborted.side_effect = [False, True]
+        pending.return_value.get.return_value = Document(sn=1, request={})
+        select_plugin.return_value = plugin
+        tx.return_value.expired = True
+
+        # test
+        scheduler = Scheduler(plugin)
+        scheduler.run()
+
+        # validation
+        tx.return_value.skip.assert_called_once_with()
+        self.assertFalse(task.called)
+        self.assertFalse(plugin.pool.run.called)
+
     @patch('gofer.agent.rmi.Pending')
     @patch('gofer.agent.rmi.Scheduler.select_plugin')
     @patch('gofer.common.Thread.aborted')
@@ -96,7 +116,7 @@ class TestScheduler(TestCase):
     def test_run_raised(self, aborted, select_plugin, pending):
         plugin = Mock()
         sn = 1234
-        pending.return_value.get.return_value = Document(sn=sn)
+        pending.return_value.get.return_value = Document(sn=sn, request={})
         select_plugin.side_effect = ValueError
         aborted.side_effect = [False, True]
 
@@ -112,15 +132,15 @@ class TestScheduler(TestCase):
     @patch('gofer.agent.rmi.Builtin')
     def test_select_plugin(self, builtin):
         plugin = Mock()
-        request = Document(request={'classname': 'A'})
+        call = Document(classname='A')
         scheduler = Scheduler(plugin)
         # find builtin
         builtin.return_value.provides.return_value = True
-        selected = scheduler.select_plugin(request)
+        selected = scheduler.select_plugin(call)
         self.assertEqual(selected, builtin.return_value)
         # find plugin
         builtin.return_value.provides.return_value = False
-        selected = scheduler.select_plugin(request)
+        selected = scheduler.select_plugin(call)
         self.assertEqual(selected, plugin)
         self.assertEqual(
             builtin.return_value.provides.call_args_list,
@@ -140,15 +160,29 @@ class TestScheduler(TestCase):
         pending.return_value.put.assert_called_once_with(request)
 
     @patch('gofer.common.Thread.abort')
-    @patch('gofer.agent.rmi.Pending', Mock())
+    @patch('gofer.agent.rmi.Pending')
     @patch('threading.Thread.setDaemon', Mock())
     @patch('gofer.agent.rmi.Builtin')
-    def test_shutdown(self, builtin, abort):
+    def test_shutdown(self, builtin, pending, abort):
         plugin = Mock()
         scheduler = Scheduler(plugin)
         scheduler.shutdown()
         builtin.return_value.shutdown.assert_called_once_with()
         abort.assert_called_once_with()
+        pending.return_value.close.assert_called_once_with()
+
+    @patch('gofer.common.Thread.abort', Mock())
+    @patch('gofer.agent.rmi.Pending')
+    @patch('threading.Thread.setDaemon', Mock())
+    @patch('gofer.agent.rmi.Builtin', Mock())
+    def test_shutdown_joined(self, pending):
+        plugin = Mock()
+        scheduler = Scheduler(plugin)
+        scheduler.isAlive = Mock(return_value=True)
+        scheduler.join = Mock()
+        scheduler.shutdown()
+        scheduler.join.assert_called_once_with()
+        pending.return_value.close.assert_called_once_with()
 
 
 class TestTransaction(TestCase):
@@ -157,17 +191,19 @@ class TestTransaction(TestCase):
         plugin = Mock()
         pending = Mock()
         request = Mock()
-        tx = Transaction(plugin, pending, request)
+        call = Mock()
+        tx = Transaction(plugin, pending, request, call)
         self.assertEqual(tx.plugin, plugin)
         self.assertEqual(tx.pending, pending)
         self.assertEqual(tx.request, request)
+        self.assertEqual(tx.call, call)
 
     def test_id(self):
         sn = 1234
         plugin = Mock()
         pending = Mock()
         request = Mock(sn=sn)
-        tx = Transaction(plugin, pending, request)
+        tx = Transaction(plugin, pending, request, Mock())
         self.assertEqual(tx.id, sn)
 
     def test_commit(self):
@@ -175,18 +211,52 @@ class TestTransaction(TestCase):
         plugin = Mock()
         pending = Mock()
         request = Mock(sn=sn)
-        tx = Transaction(plugin, pending, request)
+        tx = Transaction(plugin, pending, request, Mock())
         tx.commit()
         pending.commit.assert_called_once_with(sn)
 
-    def test_discard(self):
+    @patch('gofer.agent.rmi.Tracker')
+    def test_discard(self, tracker):
         sn = 1234
         plugin = Mock()
         pending = Mock()
         request = Mock(sn=sn)
-        tx = Transaction(plugin, pending, request)
+        tx = Transaction(plugin, pending, request, Mock())
         tx.discard()
         pending.commit.assert_called_once_with(sn)
+        tracker.return_value.remove.assert_called_once_with(sn)
+
+    @patch('gofer.agent.rmi.Tracker')
+    def test_untrack(self, tracker):
+        sn = 1234
+        tracker.return_value.remove.side_effect = KeyError
+        tx = Transaction(Mock(), Mock(), Mock(sn=sn), Mock())
+        tx.untrack()
+        tracker.return_value.remove.assert_called_once_with(sn)
+
+    def test_expired(self):
+        plugin = Mock()
+        pending = Mock()
+        tx = Transaction(plugin, pending, Document(sn=1), Mock())
+        self.assertFalse(tx.expired)
+        tx = Transaction(plugin, pending, Document(sn=1, deadline=time() + 60), Mock())
+        self.assertFalse(tx.expired)
+        tx = Transaction(plugin, pending, Document(sn=1, deadline=time() - 60), Mock())
+        self.assertTrue(tx.expired)
+
+    @patch('gofer.agent.rmi.Tracker')
+    def test_skip(self, tracker):
+        sn = 1234
+        plugin = Mock()
+        pending = Mock()
+        request = Mock(sn=sn)
+        plugin.skipped.increment.return_value = 1
+        tracker.return_value.remove.side_effect = KeyError
+        tx = Transaction(plugin, pending, request, Mock())
+        tx.skip()
+        pending.commit.assert_called_once_with(sn)
+        tracker.return_value.remove.assert_called_once_with(sn)
+        plugin.skipped.increment.assert_called_once_with()
 
 
 class TestContext(TestCase):
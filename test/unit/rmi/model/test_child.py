@@ -1,8 +1,13 @@
+import os
+
+from cPickle import dumps, loads
+from shutil import rmtree
+from tempfile import mkdtemp
 from unittest import TestCase
 
 from mock import patch, Mock
 
-from gofer.rmi.model.child import Progress, Call
+from gofer.rmi.model.child import Progress, Call, reduce_method
 from gofer.rmi.model import protocol
 
 
@@ -17,10 +22,32 @@ class Pipe(object):
     def send(self, thing):
         self.pipe.append(thing)
 
+    def send_bytes(self, data):
+        self.pipe.append(loads(data))
+
     def recv(self):
         return self.pipe.pop()
 
 
+class Dog(object):
+
+    def __init__(self, name):
+        self.name = name
+
+    def bark(self):
+        return self.name
+
+
+class TestReduce(TestCase):
+
+    def test_bound(self):
+        dog = Dog('max')
+        self.assertEqual(reduce_method(dog.bark), (dog, 'bark'))
+
+    def test_unbound(self):
+        self.assertEqual(reduce_method(Dog.bark), (Dog, 'bark'))
+
+
 class TestProgress(TestCase):
 
     def test_report(self):
@@ -39,10 +66,61 @@ class TestProgress(TestCase):
         self.assertEqual(reply.payload.total, p.total)
         self.assertEqual(reply.payload.completed, p.completed)
         self.assertEqual(reply.payload.details, p.details)
+        self.assertFalse(reply.payload.appended)
+
+    def test_report_appended(self):
+        pipe = Pipe()
+        p = Progress(pipe)
+
+        # test
+        p.report({'stdout': 'hello'})
+
+        # validation
+        reply = protocol.Reply.read(pipe)
+        self.assertEqual(reply.payload.details, {'stdout': 'hello'})
+        self.assertTrue(reply.payload.appended)
+        self.assertEqual(p.details, {})
+
+    def test_report_coalesced(self):
+        pipe = Pipe()
+        p = Progress(pipe, 10)
+
+        # test
+        p.report()
+        p.completed = 2
+        p.report()
+        p.completed = 3
+        p.report()
+
+        # validation
+        self.assertEqual(len(pipe.pipe), 1)
+        p.flush()
+        reply = protocol.Reply.read(pipe)
+        self.assertEqual(reply.payload.completed, 3)
+        self.assertEqual(len(pipe.pipe), 1)
 
 
 class TestCall(TestCase):
 
+    def setUp(self):
+        self.root = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.root)
+
+    def test_pickle(self):
+        call = Call(Dog('max').bark, 1, a=2)
+        call = loads(dumps(call))
+        self.assertEqual(call.method(), 'max')
+        self.assertEqual(call.args, (1,))
+        self.assertEqual(call.kwargs, {'a': 2})
+        self.assertFalse('bound' in call.__dict__)
+
+    def test_pickle_function(self):
+        call = Call(dumps, 1)
+        call = loads(dumps(call))
+        self.assertEqual(call.method, dumps)
+
     @patch(MODULE + '.Context.current')
     def test_call(self, context):
         method = Mock(return_value=18)
@@ -58,6 +136,30 @@ class TestCall(TestCase):
         self.assertEqual(reply.code, protocol.Result.CODE)
         self.assertEqual(reply.payload, method.return_value)
 
+    @patch(MODULE + '.Context.current')
+    def test_call_flushed(self, context):
+        def method():
+            progress = context.return_value.progress
+            progress.interval = 10
+            progress.report()
+            progress.report()
+            return 18
+        pipe = Pipe()
+        call = Call(method)
+
+        # test
+        call(pipe)
+
+        # validation
+        codes = [r.code for r in pipe.pipe]
+        self.assertEqual(
+            codes,
+            [
+                protocol.Progress.CODE,
+                protocol.Progress.CODE,
+                protocol.Result.CODE
+            ])
+
     def test_call_exception(self):
         method = Mock(side_effect=ValueError)
         pipe = Pipe()
@@ -69,3 +171,47 @@ class TestCall(TestCase):
 
         # validation
         self.assertEqual(reply.code, protocol.Raised.CODE)
+
+    @patch(MODULE + '.Context.current', Mock())
+    @patch(MODULE + '.THRESHOLD', 100)
+    def test_call_shared(self):
+        method = Mock(return_value='x' * 200)
+        pipe = Pipe()
+        call = Call(method)
+        call.segment = protocol.Segment(os.path.join(self.root, 'test'))
+
+        # test
+        call(pipe)
+
+        # validation
+        reply = protocol.Reply.read(pipe)
+        self.assertEqual(reply.code, protocol.Shared.CODE)
+        self.assertEqual(reply.payload.path, call.segment.path)
+        reply = reply.payload.read()
+        self.assertEqual(reply.code, protocol.Result.CODE)
+        self.assertEqual(reply.payload, method.return_value)
+
+    @patch(MODULE + '.protocol.Segment')
+    @patch(MODULE + '.THRESHOLD', 100)
+    def test_result(self, segment):
+        call = Call(Mock())
+        reply = loads(call.result('x' * 10))
+        self.assertEqual(reply.code, protocol.Result.CODE)
+        self.assertEqual(reply.payload, 'x' * 10)
+        self.assertFalse(segment.allocate.called)
+
+    @patch(MODULE + '.protocol.Segment.allocate')
+    @patch(MODULE + '.THRESHOLD', 100)
+    def test_result_not_allocated(self, allocate):
+        path = os.path.join(self.root, 'test')
+        allocate.return_value = protocol.Segment(path)
+        call = Call(Mock())
+
+        # test
+        reply = loads(call.result('x' * 200))
+
+        # validation
+        allocate.assert_called_once_with()
+        self.assertEqual(reply.code, protocol.Shared.CODE)
+        self.assertEqual(reply.payload.path, path)
+        self.assertTrue(os.path.isfile(path))
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from gofer.rmi.model import ALL, valid_model
+from gofer.rmi.model import ALL, valid_model, valid_timeout
 
 
 class TestModel(TestCase):
@@ -11,3 +11,12 @@ class TestModel(TestCase):
             self.assertTrue(valid_model(model))
         # invalid
         self.assertRaises(ValueError, valid_model, 1234)
+
+    def test_valid_timeout(self):
+        self.assertEqual(valid_timeout(None), None)
+        self.assertEqual(valid_timeout(10), 10)
+        self.assertEqual(valid_timeout(0.5), 0.5)
+        # invalid
+        self.assertRaises(ValueError, valid_timeout, 0)
+        self.assertRaises(ValueError, valid_timeout, -1)
+        self.assertRaises(ValueError, valid_timeout, '10')
@@ -1,46 +1,43 @@
+import os
+
+from errno import EINTR
+from select import error as SelectError
 from unittest import TestCase
 
 from mock import call, patch, Mock
 
+from gofer.rmi import context
 from gofer.rmi.model import protocol
-from gofer.rmi.model.parent import Monitor, Call
-from gofer.rmi.model.parent import Result, Progress, Error, Raised
+from gofer.rmi.model.parent import Cancel, Call
+from gofer.rmi.model.parent import Result, Shared, Progress, Error, Raised
 
 
 MODULE = 'gofer.rmi.model.parent'
 
 
-class TestMonitor(TestCase):
+class TestCancel(TestCase):
 
-    @patch(MODULE + '.sleep')
-    def test_run(self, sleep):
-        context = Mock()
-        context.cancelled.side_effect = [False, True]
+    def test_call(self):
         child = Mock()
         pipe = Mock()
 
         # test
-        m = Monitor(context, child, pipe)
-        m.run()
+        cancel = Cancel(child, pipe)
+        cancel()
 
         # validation
         pipe.send.assert_called_once_with(0)
         child.terminate.assert_called_once_with()
-        sleep.assert_called_once_with(0.10)
 
-    @patch(MODULE + '.Monitor.join')
-    def test_stop(self, join):
-        context = Mock()
+    def test_call_no_pipe(self):
         child = Mock()
-        pipe = Mock()
 
         # test
-        m = Monitor(context, child, pipe)
-        m.stop()
+        cancel = Cancel(child)
+        cancel()
 
         # validation
-        self.assertEqual(m.poll, False)
-        join.assert_called_once_with()
+        child.terminate.assert_called_once_with()
 
 
 class TestReplies(TestCase):
@@ -56,6 +53,18 @@ class TestReplies(TestCase):
         except protocol.End, end:
             self.assertEqual(end.result, payload)
 
+    def test_shared(self):
+        payload = Mock()
+        payload.read.return_value = protocol.Result('done')
+        reply = Shared(payload)
+
+        # test
+        try:
+            reply()
+            self.fail(msg='End not raised')
+        except protocol.End, end:
+            self.assertEqual(end.result, 'done')
+
     @patch(MODULE + '.Context.current')
     def test_progress(self, current):
         class P(object):
@@ -70,7 +79,41 @@ class TestReplies(TestCase):
         reply()
 
         context.progress.report.assert_called_once_with()
-        self.assertEqual(context.progress.__dict__, payload.__dict__)
+        self.assertEqual(context.progress.total, 1)
+        self.assertEqual(context.progress.completed, 2)
+        self.assertEqual(context.progress.details, 3)
+
+    @patch('gofer.rmi.context.time')
+    @patch(MODULE + '.Context.current')
+    def test_progress_appended(self, current, time):
+        sent = []
+
+        class Reporter(context.Reporter):
+            def send(self):
+                sent.append(self.details)
+
+        time.return_value = 100
+        progress = Reporter(1)
+        progress.sent = 100
+        progress.close = Mock()
+        progress._schedule = Mock()
+        current.return_value = Mock(progress=progress)
+
+        # test
+        for n in range(10):
+            payload = protocol.ProgressPayload(10, n, {'stdout': 'line%d\n' % n}, True)
+            reply = Progress(payload)
+            reply()
+        progress.flush()
+
+        # validation
+        self.assertEqual(
+            sent,
+            [
+                {'stdout': ''.join(['line%d\n' % n for n in range(10)])}
+            ])
+        self.assertEqual(progress.completed, 9)
+        self.assertEqual(progress.details, {})
 
     def test_error(self):
         payload = 18
@@ -91,16 +134,19 @@ class TestReplies(TestCase):
 
 class TestCall(TestCase):
 
+    @patch(MODULE + '.protocol.Segment')
+    @patch(MODULE + '.Cancel')
     @patch(MODULE + '.Call.read')
     @patch(MODULE + '.Target')
     @patch(MODULE + '.Context')
     @patch(MODULE + '.Process')
     @patch(MODULE + '.Pipe')
-    @patch(MODULE + '.Monitor')
-    def test_call(self, monitor, pipe, process, context, target, read):
+    def test_call(self, pipe, process, context, target, read, cancel, segment):
         inbound = Mock()
         outbound = Mock()
         pipe.return_value = inbound, outbound
+        context.current.return_value.workers = None
+        watch = context.current.return_value.cancelled.watch.return_value
 
         # test
         _call = Call(Mock(), 1, 2, a=1, b=2)
@@ -110,12 +156,95 @@ class TestCall(TestCase):
         pipe.assert_called_once_with()
         target.assert_called_once_with(_call.method, *_call.args, **_call.kwargs)
         process.assert_called_once_with(target=target.return_value, args=(outbound,))
-        monitor.assert_called_once_with(
-                context.current.return_value, process.return_value, outbound)
-        monitor.return_value.start.assert_called_once_with()
-        read.assert_called_once_with(inbound)
-        monitor.return_value.stop.assert_called_once_with()
+        cancel.assert_called_once_with(process.return_value, outbound)
+        read.assert_called_once_with(inbound, watch, cancel.return_value)
+        watch.close.assert_called_once_with()
         process.return_value.join.assert_called_once_with()
+        self.assertEqual(target.return_value.segment, segment.allocate.return_value)
+        segment.allocate.return_value.unlink.assert_called_once_with()
+
+    @patch(MODULE + '.Call.pooled')
+    @patch(MODULE + '.Context')
+    def test_call_pooled(self, context, pooled):
+        workers = Mock()
+        context.current.return_value.workers = workers
+
+        # test
+        _call = Call(Mock())
+        retval = _call()
+
+        # validation
+        pooled.assert_called_once_with(workers)
+        self.assertEqual(retval, pooled.return_value)
+
+    @patch(MODULE + '.protocol.Segment')
+    @patch(MODULE + '.Cancel')
+    @patch(MODULE + '.Call.read')
+    @patch(MODULE + '.Target')
+    @patch(MODULE + '.Context')
+    def test_pooled(self, context, target, read, cancel, segment):
+        workers = Mock()
+        worker = workers.get.return_value
+        watch = context.current.return_value.cancelled.watch.return_value
+
+        # test
+        _call = Call(Mock(), 1, 2, a=1, b=2)
+        retval = _call.pooled(workers)
+
+        # validation
+        target.assert_called_once_with(_call.method, *_call.args, **_call.kwargs)
+        worker.send.assert_called_once_with(
+            context.current.return_value.sn, target.return_value)
+        cancel.assert_called_once_with(worker)
+        read.assert_called_once_with(worker.pipe, watch, cancel.return_value)
+        watch.close.assert_called_once_with()
+        workers.put.assert_called_once_with(worker)
+        segment.allocate.return_value.unlink.assert_called_once_with()
+        self.assertEqual(retval, read.return_value)
+
+    @patch(MODULE + '.protocol.Segment')
+    @patch(MODULE + '.Target')
+    def test_target(self, target, segment):
+        _call = Call(Mock(), 1, 2, a=1, b=2)
+
+        # test
+        _target = _call.target()
+
+        # validation
+        target.assert_called_once_with(_call.method, *_call.args, **_call.kwargs)
+        segment.allocate.assert_called_once_with()
+        self.assertEqual(_target, target.return_value)
+        self.assertEqual(_target.segment, segment.allocate.return_value)
+
+    @patch(MODULE + '.Call.forked')
+    @patch(MODULE + '.Call.read')
+    @patch(MODULE + '.Target')
+    @patch(MODULE + '.Context')
+    def test_pooled_not_pickled(self, context, target, read, forked):
+        workers = Mock()
+        worker = workers.get.return_value
+        worker.send.side_effect = TypeError
+
+        # test
+        _call = Call(Mock())
+        retval = _call.pooled(workers)
+
+        # validation
+        workers.put.assert_called_once_with(worker)
+        forked.assert_called_once_with()
+        self.assertFalse(context.current.return_value.cancelled.watch.called)
+        self.assertFalse(read.called)
+        self.assertEqual(retval, forked.return_value)
+
+    def test_watch(self):
+        context = Mock()
+        watch = Call.watch(context)
+        self.assertEqual(watch, context.cancelled.watch.return_value)
+
+    def test_watch_not_supported(self):
+        context = Mock(cancelled=lambda: False)
+        watch = Call.watch(context)
+        self.assertEqual(watch, None)
 
     @patch(MODULE + '.protocol.Reply')
     def test_read(self, reply):
@@ -135,3 +264,71 @@ class TestCall(TestCase):
                 call(pipe)
             ])
         self.assertEqual(retval, 18)
+
+    @patch(MODULE + '.protocol.Reply')
+    @patch(MODULE + '.Call.cancelled')
+    def test_read_watched(self, cancelled, reply):
+        cancelled.return_value = False
+        replies = [Mock(), Mock(side_effect=protocol.End(18))]
+        reply.read.side_effect = replies
+        _call = Call(Mock())
+        pipe = Mock()
+        watch = Mock()
+        cancel = Mock()
+
+        # test
+        retval = _call.read(pipe, watch, cancel)
+
+        # validation
+        self.assertEqual(cancelled.call_count, 2)
+        self.assertFalse(cancel.called)
+        self.assertEqual(retval, 18)
+
+    @patch(MODULE + '.protocol.Reply')
+    @patch(MODULE + '.Call.cancelled')
+    def test_read_cancelled(self, cancelled, reply):
+        cancelled.return_value = True
+        replies = [Mock(), Mock(side_effect=protocol.End())]
+        reply.read.side_effect = replies
+        _call = Call(Mock())
+        pipe = Mock()
+        watch = Mock()
+        cancel = Mock()
+
+        # test
+        retval = _call.read(pipe, watch, cancel)
+
+        # validation
+        cancelled.assert_called_once_with(pipe, watch)
+        cancel.assert_called_once_with()
+        self.assertEqual(reply.read.call_count, 2)
+        self.assertEqual(retval, None)
+
+    def test_cancelled(self):
+        pipe = os.pipe()
+        watch = os.pipe()
+        try:
+            p = Mock(fileno=Mock(return_value=pipe[0]))
+            w = Mock(fileno=Mock(return_value=watch[0]))
+            # readable
+            os.write(pipe[1], '0')
+            self.assertFalse(Call.cancelled(p, w))
+            # cancelled
+            os.write(watch[1], '0')
+            self.assertTrue(Call.cancelled(p, w))
+        finally:
+            for fd in pipe + watch:
+                os.close(fd)
+
+    @patch(MODULE + '.select')
+    def test_cancelled_interrupted(self, select):
+        pipe = Mock()
+        watch = Mock()
+        select.side_effect = [SelectError(EINTR, ''), ([pipe], [], [])]
+
+        # test
+        cancelled = Call.cancelled(pipe, watch)
+
+        # validation
+        self.assertEqual(select.call_count, 2)
+        self.assertFalse(cancelled)
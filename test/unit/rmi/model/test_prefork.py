@@ -0,0 +1,344 @@
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+
+from threading import Thread
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from gofer.rmi.model.prefork import MB
+from gofer.rmi.model.prefork import serve, Worker, Pool
+
+
+MODULE = 'gofer.rmi.model.prefork'
+
+
+class TestServe(TestCase):
+
+    @patch(MODULE + '.Context')
+    def test_serve(self, context):
+        target = Mock()
+        pipe = Mock()
+        pipe.recv.side_effect = [('sn-1', target), None]
+
+        # test
+        serve(pipe)
+
+        # validation
+        context.assert_called_once_with('sn-1', None, None)
+        target.assert_called_once_with(pipe)
+        self.assertEqual(context.set.call_count, 2)
+
+    def test_serve_closed(self):
+        pipe = Mock()
+        pipe.recv.side_effect = EOFError
+
+        # test
+        serve(pipe)
+
+        # validation
+        pipe.recv.assert_called_once_with()
+
+
+class TestWorker(TestCase):
+
+    @patch(MODULE + '.Process')
+    @patch(MODULE + '.Pipe')
+    def test_start(self, pipe, process):
+        parent = Mock()
+        child = Mock()
+        pipe.return_value = parent, child
+
+        # test
+        worker = Worker()
+        worker.start()
+
+        # validation
+        process.assert_called_once_with(target=serve, args=(child,))
+        process.return_value.start.assert_called_once_with()
+        child.close.assert_called_once_with()
+        self.assertTrue(process.return_value.daemon)
+        self.assertEqual(worker.process, process.return_value)
+        self.assertEqual(worker.pipe, parent)
+
+    def test_send(self):
+        worker = Worker()
+        worker.pipe = Mock()
+        target = Mock()
+
+        # test
+        worker.send('sn-1', target)
+
+        # validation
+        worker.pipe.send.assert_called_once_with(('sn-1', target))
+        self.assertEqual(worker.calls, 1)
+
+    def test_send_failed(self):
+        worker = Worker()
+        worker.pipe = Mock()
+        worker.pipe.send.side_effect = TypeError
+
+        # test
+        self.assertRaises(TypeError, worker.send, 'sn-1', Mock())
+
+        # validation
+        self.assertEqual(worker.calls, 0)
+
+    def test_healthy(self):
+        worker = Worker()
+        worker.process = Mock()
+        worker.pipe = Mock()
+        worker.process.is_alive.return_value = True
+        worker.pipe.poll.return_value = False
+        self.assertTrue(worker.healthy)
+
+    def test_not_healthy(self):
+        worker = Worker()
+        worker.process = Mock()
+        worker.pipe = Mock()
+        worker.process.is_alive.return_value = True
+        worker.pipe.poll.return_value = False
+        # terminated
+        worker.terminated = True
+        self.assertFalse(worker.healthy)
+        # died
+        worker.terminated = False
+        worker.process.is_alive.return_value = False
+        self.assertFalse(worker.healthy)
+        # closed
+        worker.process.is_alive.return_value = True
+        worker.pipe.poll.return_value = True
+        self.assertFalse(worker.healthy)
+
+    @patch(MODULE + '.os.sysconf')
+    @patch(MODULE + '.open', create=True)
+    def test_rss(self, _open, sysconf):
+        sysconf.return_value = 4096
+        fp = Mock()
+        fp.read.return_value = '1000 512 100 1 0 200 0'
+        _open.return_value.__enter__ = Mock(return_value=fp)
+        _open.return_value.__exit__ = Mock(return_value=False)
+        worker = Worker()
+        worker.process = Mock(pid=18)
+
+        # test
+        rss = worker.rss
+
+        # validation
+        _open.assert_called_once_with('/proc/18/statm')
+        self.assertEqual(rss, 512 * 4096 / MB)
+
+    @patch(MODULE + '.open', create=True)
+    def test_rss_not_found(self, _open):
+        _open.side_effect = IOError
+        worker = Worker()
+        worker.process = Mock(pid=18)
+        self.assertEqual(worker.rss, 0)
+
+    def test_stop(self):
+        worker = Worker()
+        worker.process = Mock()
+        worker.pipe = Mock()
+
+        # test
+        worker.stop()
+
+        # validation
+        worker.pipe.send.assert_called_once_with(None)
+        worker.pipe.close.assert_called_once_with()
+        worker.process.join.assert_called_once_with()
+
+    def test_stop_terminated(self):
+        worker = Worker()
+        worker.process = Mock()
+        worker.pipe = Mock()
+        worker.pipe.send.side_effect = IOError
+
+        # test
+        worker.stop()
+
+        # validation
+        worker.pipe.close.assert_called_once_with()
+        worker.process.join.assert_called_once_with()
+
+    def test_terminate(self):
+        worker = Worker()
+        worker.process = Mock()
+        worker.pipe = Mock()
+
+        # test
+        worker.terminate()
+
+        # validation
+        worker.process.terminate.assert_called_once_with()
+        self.assertTrue(worker.terminated)
+        self.assertFalse(worker.pipe.close.called)
+
+
+class TestPool(TestCase):
+
+    def test_init(self):
+        pool = Pool(3, calls=10, rss=100)
+        self.assertEqual(pool.capacity, 3)
+        self.assertEqual(pool.calls, 10)
+        self.assertEqual(pool.rss, 100)
+        self.assertEqual(pool.idle, [])
+        self.assertEqual(pool.workers, set())
+        self.assertEqual(pool.recycled.value, 0)
+        self.assertEqual(len(pool), 0)
+
+    @patch(MODULE + '.Worker')
+    def test_get_forked(self, worker):
+        pool = Pool(2)
+
+        # test
+        w = pool.get()
+
+        # validation
+        worker.return_value.start.assert_called_once_with()
+        self.assertEqual(w, worker.return_value)
+        self.assertEqual(pool.workers, set([w]))
+        self.assertEqual(pool.forking, 0)
+
+    @patch(MODULE + '.Worker')
+    def test_get_fork_unlocked(self, worker):
+        pool = Pool(1)
+
+        def start():
+            # the pool is not locked while forking
+            self.assertEqual(pool.forking, 1)
+            thread = Thread(target=pool.shutdown)
+            thread.start()
+            thread.join(5)
+            self.assertFalse(thread.isAlive())
+
+        worker.return_value.start.side_effect = start
+
+        # test
+        w = pool.get()
+
+        # validation
+        self.assertEqual(pool.workers, set([w]))
+
+    @patch(MODULE + '.Worker')
+    def test_get_fork_failed(self, worker):
+        worker.return_value.start.side_effect = OSError
+        pool = Pool(1)
+
+        # test
+        self.assertRaises(OSError, pool.get)
+
+        # validation
+        self.assertEqual(pool.forking, 0)
+        self.assertEqual(pool.workers, set())
+
+    @patch(MODULE + '.Worker')
+    def test_get_idle(self, worker):
+        idle = Mock()
+        pool = Pool(2)
+        pool.workers.add(idle)
+        pool.idle.append(idle)
+
+        # test
+        w = pool.get()
+
+        # validation
+        self.assertFalse(worker.called)
+        self.assertEqual(w, idle)
+        self.assertEqual(pool.idle, [])
+
+    def test_put(self):
+        worker = Mock(healthy=True, calls=1)
+        pool = Pool(2)
+        pool.workers.add(worker)
+
+        # test
+        pool.put(worker)
+
+        # validation
+        self.assertEqual(pool.idle, [worker])
+        self.assertFalse(worker.stop.called)
+
+    def test_put_not_healthy(self):
+        worker = Mock(healthy=False, process=Mock(pid=18))
+        pool = Pool(2)
+        pool.workers.add(worker)
+
+        # test
+        pool.put(worker)
+
+        # validation
+        worker.terminate.assert_called_once_with()
+        worker.close.assert_called_once_with()
+        self.assertEqual(pool.workers, set())
+        self.assertEqual(pool.idle, [])
+
+    def test_put_recycled_calls(self):
+        worker = Mock(healthy=True, calls=10, process=Mock(pid=18))
+        pool = Pool(2, calls=10)
+        pool.workers.add(worker)
+
+        # test
+        pool.put(worker)
+
+        # validation
+        worker.stop.assert_called_once_with()
+        self.assertEqual(pool.workers, set())
+        self.assertEqual(pool.idle, [])
+        self.assertEqual(pool.recycled.value, 1)
+
+    def test_put_recycled_rss(self):
+        worker = Mock(healthy=True, calls=1, rss=101, process=Mock(pid=18))
+        pool = Pool(2, rss=100)
+        pool.workers.add(worker)
+
+        # test
+        pool.put(worker)
+
+        # validation
+        worker.stop.assert_called_once_with()
+        self.assertEqual(pool.recycled.value, 1)
+
+    def test_put_after_shutdown(self):
+        worker = Mock()
+        pool = Pool(2)
+
+        # test
+        pool.put(worker)
+
+        # validation
+        worker.close.assert_called_once_with()
+        self.assertEqual(pool.idle, [])
+
+    def test_expired(self):
+        pool = Pool(2)
+        self.assertFalse(pool.expired(Mock(calls=1000, rss=1000)))
+        pool = Pool(2, calls=10, rss=100)
+        self.assertFalse(pool.expired(Mock(calls=9, rss=100)))
+        self.assertTrue(pool.expired(Mock(calls=10, rss=100)))
+        self.assertTrue(pool.expired(Mock(calls=9, rss=101)))
+
+    def test_shutdown(self):
+        idle = Mock()
+        busy = Mock()
+        pool = Pool(2)
+        pool.workers.add(idle)
+        pool.workers.add(busy)
+        pool.idle.append(idle)
+
+        # test
+        pool.shutdown()
+
+        # validation
+        idle.stop.assert_called_once_with()
+        busy.terminate.assert_called_once_with()
+        self.assertEqual(pool.workers, set())
+        self.assertEqual(pool.idle, [])
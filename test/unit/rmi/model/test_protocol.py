@@ -1,10 +1,16 @@
+import os
+import errno
+
+from multiprocessing import Pipe as MultiPipe
+from tempfile import mkdtemp
+from shutil import rmtree
 from unittest import TestCase
 
-from mock import Mock
+from mock import patch, Mock
 
 from gofer.rmi.model.protocol import End
 from gofer.rmi.model.protocol import Message, Call, Reply
-from gofer.rmi.model.protocol import Progress, Result, Error, Raised
+from gofer.rmi.model.protocol import Progress, Result, Error, Raised, Shared, Segment
 
 
 class Pipe(object):
@@ -55,6 +61,23 @@ class TestMessage(TestCase):
         pipe.send(0)
         self.assertRaises(End, Person.read, pipe)
 
+    def test_dump(self):
+        p_in = Person()
+        p_in.name = 'john'
+        p_in.age = 18
+        inbound, outbound = MultiPipe()
+
+        # test
+        outbound.send_bytes(p_in.dump())
+        p = Person.read(inbound)
+
+        # validation
+        self.assertTrue(isinstance(p, Person))
+        self.assertEqual(p.name, p_in.name)
+        self.assertEqual(p.age, p_in.age)
+        inbound.close()
+        outbound.close()
+
 
 class TestRequest(TestCase):
 
@@ -123,3 +146,114 @@ class TestReplies(TestCase):
         reply = Raised(payload)
         self.assertEqual(reply.code, Raised.CODE)
         self.assertEqual(reply.payload, payload)
+
+    def test_shared(self):
+        payload = Mock()
+        reply = Shared(payload)
+        self.assertEqual(reply.code, Shared.CODE)
+        self.assertEqual(reply.payload, payload)
+
+
+class TestSegment(TestCase):
+
+    def setUp(self):
+        self.root = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.root)
+
+    def test_allocate(self):
+        with patch.object(Segment, 'ROOT', self.root):
+            segment = Segment.allocate()
+        name = os.path.basename(segment.path)
+        self.assertEqual(os.path.dirname(segment.path), self.root)
+        self.assertTrue(name.startswith('%s%d-' % (Segment.PREFIX, os.getpid())))
+        self.assertFalse(os.path.exists(segment.path))
+
+    def test_write_read(self):
+        reply = Result(dict(name='john', age=18, data='x' * 1024))
+
+        # test
+        with patch.object(Segment, 'ROOT', self.root):
+            segment = Segment.allocate()
+        segment.write(reply.dump())
+        path = segment.path
+        self.assertTrue(os.path.isfile(path))
+        read = segment.read()
+
+        # validation
+        self.assertEqual(read.code, reply.code)
+        self.assertEqual(read.payload, reply.payload)
+        self.assertFalse(os.path.exists(path))
+
+    @patch('gofer.rmi.model.protocol.os.fdopen')
+    def test_write_failed(self, fdopen):
+        fdopen.side_effect = IOError
+
+        # test
+        with patch.object(Segment, 'ROOT', self.root):
+            segment = Segment.allocate()
+        self.assertRaises(IOError, segment.write, 'abc')
+
+        # validation
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_write_exists(self):
+        segment = Segment(os.path.join(self.root, 'test'))
+        segment.write('abc')
+        self.assertRaises(OSError, segment.write, 'abc')
+
+    @patch('gofer.rmi.model.protocol.gettempdir')
+    def test_root_no_shm(self, gettempdir):
+        gettempdir.return_value = self.root
+
+        # test
+        with patch.object(Segment, 'ROOT', '/nothing'):
+            root = Segment.root()
+
+        # validation
+        self.assertEqual(root, self.root)
+
+    def test_unlink(self):
+        segment = Segment(os.path.join(self.root, 'test'))
+        segment.write('abc')
+
+        # test
+        segment.unlink()
+        segment.unlink()
+
+        # validation
+        self.assertFalse(os.path.exists(segment.path))
+
+    @patch('gofer.rmi.model.protocol.os.kill')
+    def test_purge(self, kill):
+        def _kill(pid, sig):
+            if pid == 2:
+                raise OSError(errno.ESRCH, '')
+            if pid == 3:
+                raise OSError(errno.EPERM, '')
+        kill.side_effect = _kill
+        names = [
+            'gofer-1-ab',
+            'gofer-2-ab',
+            'gofer-3-ab',
+            'gofer-x-ab',
+            'other-2-ab',
+        ]
+        for name in names:
+            Segment(os.path.join(self.root, name)).write('abc')
+
+        # test
+        with patch.object(Segment, 'ROOT', self.root):
+            count = Segment.purge()
+
+        # validation
+        self.assertEqual(count, 1)
+        self.assertEqual(
+            sorted(os.listdir(self.root)),
+            [
+                'gofer-1-ab',
+                'gofer-3-ab',
+                'gofer-x-ab',
+                'other-2-ab',
+            ])
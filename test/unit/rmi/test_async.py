@@ -11,6 +11,30 @@
 
 from unittest import TestCase
 
+from mock import Mock
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+from gofer.rmi.async import ReplyConsumer, Listener, subscription
+
+
+class MyListener(Listener):
+
+    def started(self, reply):
+        pass
+
+
+class TestSubscription(TestCase):
+
+    def test_none(self):
+        self.assertEqual(subscription(None), [])
+
+    def test_callable(self):
+        self.assertEqual(subscription(Mock()), ['accepted', 'started', 'progress'])
+
+    def test_listener(self):
+        self.assertEqual(subscription(Listener()), [])
+        self.assertEqual(subscription(MyListener()), ['started'])
+
+    def test_consumer(self):
+        consumer = ReplyConsumer(Mock(), url='')
+        consumer.listener = MyListener()
+        self.assertEqual(consumer.notify, ['started'])
\ No newline at end of file
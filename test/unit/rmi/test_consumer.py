@@ -11,6 +11,28 @@
 
 from unittest import TestCase
 
+from mock import patch, Mock
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+from gofer.messaging import Document
+from gofer.rmi.consumer import RequestConsumer
+
+
+class TestRequestConsumer(TestCase):
+
+    @patch('gofer.rmi.consumer.RequestConsumer.send')
+    def test_dispatch(self, send):
+        plugin = Mock(url='')
+        request = Document(sn=1)
+        consumer = RequestConsumer(Mock(), plugin)
+        consumer.dispatch(request)
+        send.assert_called_once_with(request, 'accepted')
+        plugin.scheduler.add.assert_called_once_with(request)
+
+    @patch('gofer.rmi.consumer.RequestConsumer.send')
+    def test_dispatch_not_subscribed(self, send):
+        plugin = Mock(url='')
+        request = Document(sn=1, notify=['progress'])
+        consumer = RequestConsumer(Mock(), plugin)
+        consumer.dispatch(request)
+        self.assertFalse(send.called)
+        plugin.scheduler.add.assert_called_once_with(request)
\ No newline at end of file
@@ -2,12 +2,22 @@ from unittest import TestCase
 
 from mock import Mock, patch
 
-from gofer.rmi.context import Context, Progress, Cancelled
+from gofer.messaging import Document
+from gofer.rmi.context import Context, Reporter, Progress, Cancelled, subscribed
 
 
 MODULE = 'gofer.rmi.context'
 
 
+class TestSubscribed(TestCase):
+
+    def test_subscribed(self):
+        self.assertTrue(subscribed(Document(), 'started'))
+        self.assertTrue(subscribed(Document(notify=['started']), 'started'))
+        self.assertFalse(subscribed(Document(notify=['progress']), 'started'))
+        self.assertFalse(subscribed(Document(notify=[]), 'started'))
+
+
 class TestContext(TestCase):
 
     def setUp(self):
@@ -35,10 +45,212 @@ class TestContext(TestCase):
         self.assertEqual(Context._current.inst, None)
 
 
+class TestReporter(TestCase):
+
+    def test_init(self):
+        reporter = Reporter(2)
+        self.assertEqual(reporter.interval, 2)
+        self.assertEqual(reporter.sent, 0)
+        self.assertFalse(reporter.pending)
+        self.assertEqual(reporter.timer, None)
+        self.assertEqual(reporter.total, 0)
+        self.assertEqual(reporter.completed, 0)
+        self.assertEqual(reporter.details, {})
+
+    @patch(MODULE + '.time')
+    def test_report(self, time):
+        time.return_value = 100
+        reporter = Reporter(2)
+        reporter.send = Mock()
+
+        # test
+        reporter.report()
+
+        # validation
+        reporter.send.assert_called_once_with()
+        self.assertFalse(reporter.pending)
+        self.assertEqual(reporter.sent, 100)
+
+    @patch(MODULE + '.Timer')
+    @patch(MODULE + '.time')
+    def test_report_coalesced(self, time, timer):
+        time.return_value = 101
+        reporter = Reporter(2)
+        reporter.sent = 100
+        reporter.send = Mock()
+
+        # test
+        reporter.report()
+        reporter.report()
+
+        # validation
+        timer.assert_called_once_with(1, reporter._expired)
+        timer.return_value.setDaemon.assert_called_once_with(True)
+        timer.return_value.start.assert_called_once_with()
+        self.assertEqual(reporter.timer, timer.return_value)
+        self.assertFalse(reporter.send.called)
+        self.assertTrue(reporter.pending)
+
+    def test_report_trailing(self):
+        reporter = Reporter(0.1)
+        reporter.send = Mock()
+
+        # test
+        reporter.report()
+        reporter.report()
+        timer = reporter.timer
+        timer.join(5)
+
+        # validation
+        self.assertFalse(timer.isAlive())
+        self.assertEqual(reporter.send.call_count, 2)
+        self.assertFalse(reporter.pending)
+        self.assertEqual(reporter.timer, None)
+
+    @patch(MODULE + '.time')
+    def test_expired(self, time):
+        time.return_value = 102
+        reporter = Reporter(2)
+        reporter.timer = Mock()
+        reporter.pending = True
+        reporter.send = Mock()
+
+        # test
+        reporter._expired()
+
+        # validation
+        reporter.send.assert_called_once_with()
+        self.assertFalse(reporter.pending)
+        self.assertEqual(reporter.timer, None)
+        self.assertEqual(reporter.sent, 102)
+
+    def test_expired_nothing_pending(self):
+        reporter = Reporter(2)
+        reporter.timer = Mock()
+        reporter.send = Mock()
+
+        # test
+        reporter._expired()
+
+        # validation
+        self.assertFalse(reporter.send.called)
+        self.assertEqual(reporter.timer, None)
+
+    @patch(MODULE + '.time')
+    def test_flush(self, time):
+        time.return_value = 101
+        reporter = Reporter(2)
+        reporter.pending = True
+        reporter.send = Mock()
+        timer = Mock()
+        reporter.timer = timer
+
+        # test
+        reporter.flush()
+
+        # validation
+        timer.cancel.assert_called_once_with()
+        reporter.send.assert_called_once_with()
+        self.assertFalse(reporter.pending)
+        self.assertEqual(reporter.timer, None)
+        self.assertEqual(reporter.sent, 101)
+
+    def test_close(self):
+        reporter = Reporter(2)
+        reporter.pending = True
+        reporter.send = Mock()
+        timer = Mock()
+        reporter.timer = timer
+
+        # test
+        reporter.close()
+        reporter.close()
+
+        # validation
+        timer.cancel.assert_called_once_with()
+        self.assertFalse(reporter.send.called)
+        self.assertEqual(reporter.timer, None)
+
+    @patch(MODULE + '.time')
+    def test_report_appended(self, time):
+        sent = []
+        time.return_value = 101
+        reporter = Reporter(2)
+        reporter.sent = 100
+        reporter._schedule = Mock()
+        reporter.send = Mock(side_effect=lambda: sent.append(reporter.details))
+
+        # test
+        for n in range(3):
+            reporter.report({'stdout': 'line%d' % n, 'stderr': ''})
+        reporter.report({'stdout': '', 'stderr': 'error'})
+        reporter.flush()
+        reporter.report({'stdout': 'line3'})
+        reporter.flush()
+
+        # validation
+        self.assertEqual(
+            sent,
+            [
+                {'stdout': 'line0line1line2', 'stderr': 'error'},
+                {'stdout': 'line3'},
+            ])
+        self.assertEqual(reporter.details, {})
+        self.assertFalse(reporter.appended)
+
+    def test_report_appended_not_dict(self):
+        reporter = Reporter(2)
+        reporter.sent = 1e12
+        reporter._schedule = Mock()
+        reporter.send = Mock()
+
+        # test
+        reporter.report('a')
+        reporter.report('b')
+        self.assertEqual(reporter.details, 'ab')
+        reporter.report(18)
+        self.assertEqual(reporter.details, 18)
+
+    def test_report_not_appended(self):
+        reporter = Reporter()
+        reporter.send = Mock()
+        reporter.details = {'step': 1}
+
+        # test
+        reporter.report()
+        reporter.report()
+
+        # validation
+        self.assertEqual(reporter.send.call_count, 2)
+        self.assertEqual(reporter.details, {'step': 1})
+
+    def test_flush_nothing_pending(self):
+        reporter = Reporter(2)
+        reporter.send = Mock()
+
+        # test
+        reporter.flush()
+
+        # validation
+        self.assertFalse(reporter.send.called)
+
+    def test_send(self):
+        reporter = Reporter()
+        self.assertRaises(NotImplementedError, reporter.send)
+
+
 class TestProgress(TestCase):
 
+    def test_init(self):
+        request = Mock()
+        producer = Mock()
+        progress = Progress(request, producer, 2)
+        self.assertEqual(progress.request, request)
+        self.assertEqual(progress.producer, producer)
+        self.assertEqual(progress.interval, 2)
+
     def test_report(self):
-        request = Mock(sn=1, data=2, replyto=3)
+        request = Mock(sn=1, data=2, replyto=3, notify=None)
         producer = Mock()
         progress = Progress(request, producer)
         progress.total = 10
@@ -60,7 +272,7 @@ class TestProgress(TestCase):
 
     @patch(MODULE + '.log')
     def test_report_exception(self, log):
-        request = Mock(sn=1, data=2, replyto=3)
+        request = Mock(sn=1, data=2, replyto=3, notify=None)
         producer = Mock()
         producer.send.side_effect = ValueError()
         progress = Progress(request, producer)
@@ -71,6 +283,17 @@ class TestProgress(TestCase):
         # validation
         self.assertTrue(log.exception.called)
 
+    def test_report_not_subscribed(self):
+        request = Mock(sn=1, data=2, replyto=3, notify=[])
+        producer = Mock()
+        progress = Progress(request, producer)
+
+        # test
+        progress.report()
+
+        # validation
+        self.assertFalse(producer.send.called)
+
     def test_report_no_replyto(self):
         request = Mock(sn=1, data=2, replyto=None)
         producer = Mock()
@@ -94,6 +317,14 @@ class TestCancelled(TestCase):
         tracker.return_value.cancelled.assert_called_once_with(sn)
         self.assertEqual(r, tracker.return_value.cancelled.return_value)
 
+    @patch(MODULE + '.Tracker')
+    def test_watch(self, tracker):
+        sn = '1'
+        cancelled = Cancelled(sn)
+        watch = cancelled.watch()
+        tracker.return_value.watch.assert_called_once_with(sn)
+        self.assertEqual(watch, tracker.return_value.watch.return_value)
+
     @patch(MODULE + '.Tracker')
     def test_del(self, tracker):
         sn = '1'
@@ -0,0 +1,231 @@
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from gofer.rmi.deadline import CallTimeout, interrupt, Deadline, Watchdog
+
+
+MODULE = 'gofer.rmi.deadline'
+
+
+class TestCallTimeout(TestCase):
+
+    def test_init(self):
+        exception = CallTimeout(10)
+        self.assertEqual(str(exception), 'call timeout after 10 (seconds)')
+
+
+class TestInterrupt(TestCase):
+
+    @patch(MODULE + '.c_long')
+    @patch(MODULE + '.py_object')
+    @patch(MODULE + '.pythonapi')
+    def test_interrupt(self, api, py_object, c_long):
+        thread = Mock(ident=18)
+        api.PyThreadState_SetAsyncExc.return_value = 1
+
+        # test
+        interrupted = interrupt(thread, CallTimeout)
+
+        # validation
+        c_long.assert_called_once_with(18)
+        py_object.assert_called_once_with(CallTimeout)
+        api.PyThreadState_SetAsyncExc.assert_called_once_with(
+            c_long.return_value, py_object.return_value)
+        self.assertTrue(interrupted)
+
+    @patch(MODULE + '.c_long')
+    @patch(MODULE + '.py_object')
+    @patch(MODULE + '.pythonapi')
+    def test_clear(self, api, py_object, c_long):
+        thread = Mock(ident=18)
+        api.PyThreadState_SetAsyncExc.return_value = 0
+
+        # test
+        interrupted = interrupt(thread, None)
+
+        # validation
+        self.assertFalse(py_object.called)
+        api.PyThreadState_SetAsyncExc.assert_called_once_with(c_long.return_value, None)
+        self.assertFalse(interrupted)
+
+
+class TestDeadline(TestCase):
+
+    @patch(MODULE + '.current_thread')
+    @patch(MODULE + '.Context')
+    def test_init(self, context, current):
+        context.current.return_value = Mock(sn='sn-1')
+
+        # test
+        deadline = Deadline(10, True)
+
+        # validation
+        self.assertEqual(deadline.timeout, 10)
+        self.assertTrue(deadline.interruptible)
+        self.assertEqual(deadline.thread, current.return_value)
+        self.assertEqual(deadline.sn, 'sn-1')
+        self.assertFalse(deadline.done)
+        self.assertFalse(deadline.timed_out)
+        self.assertFalse(deadline.interrupted)
+
+    @patch(MODULE + '.time')
+    @patch(MODULE + '.Watchdog')
+    def test_start(self, watchdog, time):
+        time.return_value = 100
+        deadline = Deadline(10)
+
+        # test
+        deadline.start()
+
+        # validation
+        self.assertEqual(deadline.at, 110)
+        watchdog.instance.return_value.add.assert_called_once_with(deadline)
+
+    @patch(MODULE + '.Watchdog')
+    def test_start_unlimited(self, watchdog):
+        deadline = Deadline(None)
+
+        # test
+        deadline.start()
+
+        # validation
+        self.assertFalse(watchdog.instance.called)
+
+    @patch(MODULE + '.interrupt')
+    def test_stop(self, interrupt):
+        deadline = Deadline(10)
+
+        # test
+        deadline.stop()
+
+        # validation
+        self.assertTrue(deadline.done)
+        self.assertFalse(interrupt.called)
+
+    @patch(MODULE + '.interrupt')
+    def test_stop_timed_out(self, interrupt):
+        deadline = Deadline(10)
+        deadline.timed_out = True
+        deadline.interrupted = True
+
+        # test
+        self.assertRaises(CallTimeout, deadline.stop)
+
+        # validation
+        interrupt.assert_called_once_with(deadline.thread, None)
+        self.assertTrue(deadline.done)
+
+    @patch(MODULE + '.interrupt')
+    @patch(MODULE + '.Tracker')
+    def test_expire(self, tracker, interrupt):
+        deadline = Deadline(10)
+        deadline.sn = 'sn-1'
+        expired = Deadline.expired.value
+
+        # test
+        deadline.expire()
+
+        # validation
+        tracker.return_value.cancel.assert_called_once_with('sn-1')
+        self.assertTrue(deadline.timed_out)
+        self.assertFalse(interrupt.called)
+        self.assertEqual(Deadline.expired.value, expired + 1)
+
+    @patch(MODULE + '.interrupt')
+    @patch(MODULE + '.Tracker')
+    def test_expire_interruptible(self, tracker, interrupt):
+        interrupt.return_value = True
+        deadline = Deadline(10, True)
+        deadline.sn = 'sn-1'
+        deadline.thread = Mock()
+
+        # test
+        deadline.expire()
+
+        # validation
+        tracker.return_value.cancel.assert_called_once_with('sn-1')
+        interrupt.assert_called_once_with(deadline.thread, CallTimeout)
+        deadline.thread.pool.replace.assert_called_once_with(deadline.thread)
+        self.assertTrue(deadline.interrupted)
+
+    @patch(MODULE + '.interrupt')
+    @patch(MODULE + '.Tracker')
+    def test_expire_done(self, tracker, interrupt):
+        deadline = Deadline(10, True)
+        deadline.done = True
+
+        # test
+        deadline.expire()
+
+        # validation
+        self.assertFalse(deadline.timed_out)
+        self.assertFalse(tracker.called)
+        self.assertFalse(interrupt.called)
+
+    @patch(MODULE + '.Tracker')
+    def test_cancel_not_tracked(self, tracker):
+        tracker.return_value.cancel.side_effect = KeyError
+        deadline = Deadline(10)
+        deadline.sn = 'sn-1'
+
+        # test
+        deadline.cancel()
+
+        # validation
+        tracker.return_value.cancel.assert_called_once_with('sn-1')
+
+
+class TestWatchdog(TestCase):
+
+    @patch(MODULE + '.Watchdog.start')
+    def test_instance(self, start):
+        try:
+            watchdog = Watchdog.instance()
+            self.assertTrue(isinstance(watchdog, Watchdog))
+            self.assertEqual(Watchdog.instance(), watchdog)
+            start.assert_called_once_with()
+        finally:
+            Watchdog._Watchdog__inst = None
+
+    def test_next(self):
+        done = Mock(at=1, done=True)
+        reached = Mock(at=2, done=False)
+        pending = Mock(at=2 ** 40, done=False)
+        watchdog = Watchdog()
+        watchdog.add(pending)
+        watchdog.add(reached)
+        watchdog.add(done)
+
+        # test
+        deadline = watchdog.next()
+
+        # validation
+        self.assertEqual(deadline, reached)
+        self.assertEqual(watchdog.heap, [(pending.at, 1, pending)])
+
+    @patch(MODULE + '.Thread.aborted')
+    def test_run(self, aborted):
+        aborted.side_effect = [False, False, True]
+        deadlines = [Mock(), Mock()]
+        deadlines[0].expire.side_effect = ValueError
+        watchdog = Watchdog()
+        watchdog.next = Mock(side_effect=deadlines)
+
+        # test
+        watchdog.run()
+
+        # validation
+        for deadline in deadlines:
+            deadline.expire.assert_called_once_with()
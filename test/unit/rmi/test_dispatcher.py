@@ -11,6 +11,332 @@
 
 from unittest import TestCase
 
+from mock import patch, Mock
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+from gofer.common import Options
+from gofer.decorators import remote, scope as _scope
+from gofer.rmi import scope
+from gofer.collator import Module
+from gofer.rmi.dispatcher import Target, RMI, Request, Dispatcher
+from gofer.rmi.dispatcher import ClassNotFound, MethodNotFound, NotPermitted
+from gofer.rmi.dispatcher import SecretRequired
+
+
+MODULE = 'gofer.rmi.dispatcher'
+
+
+class Dog(object):
+
+    def __init__(self, name='max'):
+        self.name = name
+
+    @remote
+    def bark(self, words):
+        return '%s: %s' % (self.name, words)
+
+    @remote(secret='xyz', timeout=10)
+    def fetch(self):
+        return self.name
+
+    @staticmethod
+    @remote
+    def sit(n=1):
+        return n
+
+    def wag(self):
+        pass
+
+
+@_scope(scope.SINGLETON)
+class Cat(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.closed = False
+
+    @remote
+    def meow(self):
+        self.calls += 1
+        return '%s: %d' % (self.name, self.calls)
+
+    @remote(scope=scope.POOLED, size=2)
+    def purr(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@remote
+def echo(text):
+    return text
+
+
+def functions():
+    mod = Module('functions')
+    mod += echo
+    return mod
+
+
+def request(classname, method, args=(), kws=None, cntr=None):
+    return Request(
+        classname=classname,
+        method=method,
+        args=list(args),
+        kws=kws or {},
+        cntr=cntr)
+
+
+class TestTarget(TestCase):
+
+    def test_init(self):
+        fn = Dog.fetch
+        fninfo = RMI.fninfo(fn)
+
+        # test
+        target = Target('Dog', Dog, 'fetch', fn, fninfo)
+
+        # validation
+        self.assertEqual(target.name, 'Dog.fetch')
+        self.assertEqual(target.owner, Dog)
+        self.assertEqual(target.method, 'fetch')
+        self.assertEqual(target.fninfo, fninfo)
+        self.assertEqual(target.security.method, target)
+        self.assertEqual(target.security.stack, fninfo.security)
+        self.assertEqual(target.model, 'direct')
+        self.assertEqual(target.timeout, 10)
+        self.assertEqual(target.argspec.args, ['self'])
+        self.assertTrue(target.implicit)
+        self.assertEqual(str(target), target.name)
+
+    def test_instance(self):
+        target = Target(
+            'Dog', Dog, 'bark', Dog.bark, RMI.fninfo(Dog.bark), scope.Request(Dog))
+        inst = target.instance(request('Dog', 'bark', cntr=(['rover'], {})))
+        self.assertTrue(isinstance(inst, Dog))
+        self.assertEqual(inst.name, 'rover')
+
+    def test_release(self):
+        _scope = Mock()
+        req = request('Dog', 'bark', cntr=(['rover'], {}))
+        target = Target('Dog', Dog, 'bark', Dog.bark, RMI.fninfo(Dog.bark), _scope)
+        inst = target.instance(req)
+        target.release(req, inst)
+        _scope.get.assert_called_once_with((['rover'], {}))
+        _scope.put.assert_called_once_with((['rover'], {}), inst)
+
+    def test_instance_not_class(self):
+        mod = functions()
+        target = Target('functions', mod, 'echo', echo, RMI.fninfo(echo))
+        self.assertEqual(target.instance(request('functions', 'echo')), mod)
+
+    def test_bind(self):
+        target = Target('Dog', Dog, 'bark', Dog.bark, RMI.fninfo(Dog.bark))
+        method = target.bind(Dog())
+        self.assertEqual(method('hello'), 'max: hello')
+
+    def test_check(self):
+        target = Target('Dog', Dog, 'bark', Dog.bark, RMI.fninfo(Dog.bark))
+        target.check(['hello'], {})
+        target.check([], {'words': 'hello'})
+        self.assertRaises(TypeError, target.check, [], {})
+        self.assertRaises(TypeError, target.check, ['hello', 'world'], {})
+
+    def test_check_static(self):
+        fn = Dog.sit
+        target = Target('Dog', Dog, 'sit', fn, RMI.fninfo(fn))
+        self.assertFalse(target.implicit)
+        target.check([], {})
+        target.check([2], {})
+        self.assertRaises(TypeError, target.check, [1, 2], {})
+
+
+class TestRMI(TestCase):
+
+    def target(self, method):
+        fn = getattr(Dog, method)
+        return Target('Dog', Dog, method, fn, RMI.fninfo(fn), scope.Request(Dog))
+
+    def test_init(self):
+        req = request('Dog', 'bark', args=['hello'])
+        auth = Options()
+        target = self.target('bark')
+
+        # test
+        rmi = RMI(req, auth, target)
+
+        # validation
+        self.assertEqual(rmi.name, 'Dog.bark')
+        self.assertEqual(rmi.request, req)
+        self.assertEqual(rmi.auth, auth)
+        self.assertEqual(rmi.target, target)
+        self.assertEqual(rmi.args, ['hello'])
+        self.assertEqual(rmi.kwargs, {})
+
+    @patch(MODULE + '.Deadline')
+    def test_call(self, deadline):
+        req = request('Dog', 'bark', args=['hello'], cntr=(['rover'], {}))
+        rmi = RMI(req, Options(), self.target('bark'))
+
+        # test
+        retval = rmi()
+
+        # validation
+        self.assertEqual(retval.retval, 'rover: hello')
+        deadline.assert_called_once_with(None, True)
+        deadline.return_value.start.assert_called_once_with()
+        deadline.return_value.stop.assert_called_once_with()
+
+    def test_call_not_authorized(self):
+        target = self.target('fetch')
+        target.instance = Mock()
+        rmi = RMI(request('Dog', 'fetch'), Options(), target)
+
+        # test
+        retval = rmi()
+
+        # validation
+        self.assertEqual(retval.xclass, SecretRequired.__name__)
+        self.assertFalse(target.instance.called)
+
+    def test_call_invalid_arguments(self):
+        target = self.target('bark')
+        target.instance = Mock()
+        rmi = RMI(request('Dog', 'bark'), Options(), target)
+
+        # test
+        retval = rmi()
+
+        # validation
+        self.assertEqual(retval.xclass, TypeError.__name__)
+        self.assertFalse(target.instance.called)
+
+
+class TestDispatcher(TestCase):
+
+    def test_init(self):
+        dispatcher = Dispatcher([Dog])
+        self.assertEqual(dispatcher.catalog, {'Dog': Dog})
+        self.assertEqual(
+            sorted(dispatcher.table),
+            ['Dog.bark', 'Dog.fetch', 'Dog.sit'])
+
+    def test_compiled_on_add(self):
+        dispatcher = Dispatcher()
+        self.assertEqual(dispatcher.table, {})
+        # list
+        dispatcher += [Dog]
+        self.assertTrue('Dog.bark' in dispatcher.table)
+        # dispatcher
+        other = Dispatcher()
+        other['functions'] = functions()
+        self.assertEqual(list(other.table), ['functions.echo'])
+        dispatcher += other
+        self.assertTrue('functions.echo' in dispatcher.table)
+        self.assertTrue('Dog.bark' in dispatcher.table)
+
+    def test_find(self):
+        dispatcher = Dispatcher([Dog])
+        target = dispatcher.find(request('Dog', 'bark'))
+        self.assertEqual(target, dispatcher.table['Dog.bark'])
+
+    def test_find_failed(self):
+        dispatcher = Dispatcher([Dog])
+        self.assertRaises(ClassNotFound, dispatcher.find, request('Cat', 'bark'))
+        self.assertRaises(MethodNotFound, dispatcher.find, request('Dog', 'meow'))
+        self.assertRaises(NotPermitted, dispatcher.find, request('Dog', 'wag'))
+
+    def document(self, classname, method, args=(), secret=None):
+        return Options(
+            routing=['A', 'B'],
+            secret=secret,
+            pam=None,
+            sn='sn-1',
+            data=None,
+            request=request(classname, method, args))
+
+    @patch(MODULE + '.Deadline', Mock())
+    def test_dispatch(self):
+        dispatcher = Dispatcher([Dog])
+        dispatcher['functions'] = functions()
+
+        # test
+        method = dispatcher.dispatch(self.document('Dog', 'bark', ['hello']))
+        function = dispatcher.dispatch(self.document('functions', 'echo', ['hello']))
+        static = dispatcher.dispatch(self.document('Dog', 'sit', [2]))
+        secured = dispatcher.dispatch(self.document('Dog', 'fetch', secret='xyz'))
+
+        # validation
+        self.assertEqual(method.retval, 'max: hello')
+        self.assertEqual(function.retval, 'hello')
+        self.assertEqual(static.retval, 2)
+        self.assertEqual(secured.retval, 'max')
+
+    def test_dispatch_not_found(self):
+        dispatcher = Dispatcher([Dog])
+
+        # test
+        retval = dispatcher.dispatch(self.document('Cat', 'meow'))
+
+        # validation
+        self.assertEqual(retval.xclass, ClassNotFound.__name__)
+
+
+class TestScopes(TestCase):
+
+    def test_scope(self):
+        dispatcher = Dispatcher([Dog])
+        target = dispatcher.table['Dog.bark']
+        self.assertTrue(isinstance(target.scope, scope.Request))
+        self.assertEqual(target.scope, dispatcher.table['Dog.fetch'].scope)
+
+    def test_scope_not_class(self):
+        dispatcher = Dispatcher()
+        dispatcher['functions'] = functions()
+        self.assertEqual(dispatcher.table['functions.echo'].scope, None)
+
+    def test_scope_class(self):
+        dispatcher = Dispatcher([Cat])
+        target = dispatcher.table['Cat.meow']
+        self.assertTrue(isinstance(target.scope, scope.Singleton))
+        self.assertEqual(target.scope.owner, Cat)
+
+    def test_scope_method(self):
+        dispatcher = Dispatcher([Cat])
+        target = dispatcher.table['Cat.purr']
+        self.assertTrue(isinstance(target.scope, scope.Pooled))
+        self.assertEqual(target.scope.size, 2)
+        self.assertEqual(len(dispatcher.scopes), 2)
+
+    def test_scopes_kept(self):
+        dispatcher = Dispatcher([Cat])
+        target = dispatcher.table['Cat.meow']
+        dispatcher += [Dog]
+        self.assertEqual(dispatcher.table['Cat.meow'].scope, target.scope)
+
+    @patch(MODULE + '.Deadline', Mock())
+    def test_dispatch_singleton(self):
+        dispatcher = Dispatcher([Cat])
+        document = Options(
+            routing=['A', 'B'],
+            sn='sn-1',
+            request=request('Cat', 'meow', cntr=(['tom'], {})))
+
+        # test
+        first = dispatcher.dispatch(document)
+        second = dispatcher.dispatch(document)
+
+        # validation
+        self.assertEqual(first.retval, 'tom: 1')
+        self.assertEqual(second.retval, 'tom: 2')
+
+    def test_close(self):
+        dispatcher = Dispatcher([Cat])
+        inst = dispatcher.table['Cat.meow'].scope.get((['tom'], {}))
+
+        # test
+        dispatcher.close()
+
+        # validation
+        self.assertTrue(inst.closed)
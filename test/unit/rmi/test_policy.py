@@ -11,7 +11,11 @@
 
 
 from unittest import TestCase
-from gofer.rmi.policy import Timeout
+
+from mock import patch, Mock
+
+from gofer.common import Options
+from gofer.rmi.policy import Timeout, Trigger, Policy
 
 
 class TimeoutTests(TestCase):
@@ -91,3 +95,38 @@ class TimeoutTests(TestCase):
         self.assertRaises(ValueError, Timeout, 'x')
         self.assertRaises(ValueError, Timeout, '10x')
         self.assertRaises(ValueError, Timeout, '')
+
+
+class TriggerTests(TestCase):
+
+    @patch('gofer.rmi.policy.time')
+    def test_deadline(self, time):
+        time.return_value = 1000
+        policy = Mock(ttl=None, wait=90)
+        trigger = Trigger(policy, Mock())
+        self.assertEqual(trigger._deadline(False), None)
+        self.assertEqual(trigger._deadline(True), 1090)
+        policy.ttl = 30
+        self.assertEqual(trigger._deadline(False), 1030)
+        self.assertEqual(trigger._deadline(True), 1030)
+        policy.ttl = 120
+        self.assertEqual(trigger._deadline(True), 1090)
+
+
+class PolicyTests(TestCase):
+
+    def test_notify(self):
+        policy = Policy('', '', Options())
+        self.assertEqual(policy.notify, [])
+        policy = Policy('', '', Options(progress=Mock()))
+        self.assertEqual(policy.notify, ['progress'])
+        policy = Policy('', '', Options(notify=('accepted', 'started')))
+        self.assertEqual(policy.notify, ['accepted', 'started'])
+
+    def test_notify_async(self):
+        policy = Policy('', '', Options(reply='q1'))
+        self.assertEqual(policy.notify, None)
+        policy = Policy('', '', Options(exchange='amq.direct'))
+        self.assertEqual(policy.notify, None)
+        policy = Policy('', '', Options(reply='q1', notify=('started',)))
+        self.assertEqual(policy.notify, ['started'])
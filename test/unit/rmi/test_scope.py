@@ -0,0 +1,188 @@
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+
+from threading import Thread
+from unittest import TestCase
+
+from mock import Mock
+
+from gofer.rmi.scope import REQUEST, SINGLETON, POOLED
+from gofer.rmi.scope import valid_scope, valid_size, key, teardown
+from gofer.rmi.scope import Request, Singleton, Pooled
+
+
+class Connection(object):
+
+    def __init__(self, url=None):
+        self.url = url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestFunctions(TestCase):
+
+    def test_valid_scope(self):
+        for scope in (REQUEST, SINGLETON, POOLED):
+            self.assertEqual(valid_scope(scope), scope)
+        self.assertRaises(ValueError, valid_scope, 'session')
+
+    def test_valid_size(self):
+        self.assertEqual(valid_size(3), 3)
+        self.assertRaises(ValueError, valid_size, 0)
+        self.assertRaises(ValueError, valid_size, '3')
+
+    def test_key(self):
+        self.assertEqual(
+            key((['a'], {'x': 1, 'y': 2})),
+            key([['a'], {'y': 2, 'x': 1}]))
+        self.assertNotEqual(key((['a'], {})), key((['b'], {})))
+
+    def test_teardown(self):
+        inst = Connection()
+        teardown(inst)
+        self.assertTrue(inst.closed)
+
+    def test_teardown_not_closable(self):
+        teardown(object())
+
+    def test_teardown_failed(self):
+        inst = Mock()
+        inst.close.side_effect = ValueError
+        teardown(inst)
+        inst.close.assert_called_once_with()
+
+
+class TestRequest(TestCase):
+
+    def test_get(self):
+        scope = Request(Connection)
+        inst = scope.get((['qemu:///system'], {}))
+        inst2 = scope.get(([], {'url': 'qemu:///system'}))
+        self.assertTrue(isinstance(inst, Connection))
+        self.assertEqual(inst.url, 'qemu:///system')
+        self.assertEqual(inst2.url, 'qemu:///system')
+        self.assertNotEqual(inst, inst2)
+        scope.put(([], {}), inst)
+        scope.close()
+        self.assertFalse(inst.closed)
+
+
+class TestSingleton(TestCase):
+
+    def test_get(self):
+        scope = Singleton(Connection)
+        inst = scope.get((['A'], {}))
+        self.assertEqual(scope.get((['A'], {})), inst)
+        self.assertNotEqual(scope.get((['B'], {})), inst)
+        self.assertEqual(len(scope.instances), 2)
+
+    def test_close(self):
+        scope = Singleton(Connection)
+        inst = scope.get(([], {}))
+        scope.put(([], {}), inst)
+        self.assertFalse(inst.closed)
+
+        # test
+        scope.close()
+
+        # validation
+        self.assertTrue(inst.closed)
+        self.assertEqual(scope.instances, {})
+
+
+class TestPooled(TestCase):
+
+    def test_get(self):
+        cntr = (['A'], {})
+        scope = Pooled(Connection, 2)
+        inst = scope.get(cntr)
+        inst2 = scope.get(cntr)
+        self.assertNotEqual(inst, inst2)
+        self.assertEqual(scope.created, {key(cntr): 2})
+        scope.put(cntr, inst)
+        self.assertEqual(scope.get(cntr), inst)
+
+    def test_get_wait(self):
+        cntr = ([], {})
+        scope = Pooled(Connection, 1)
+        inst = scope.get(cntr)
+        got = []
+        thread = Thread(target=lambda: got.append(scope.get(cntr)))
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+
+        # test
+        scope.put(cntr, inst)
+
+        # validation
+        thread.join(5)
+        self.assertEqual(got, [inst])
+
+    def test_get_wait_closed(self):
+        cntr = ([], {})
+        scope = Pooled(Connection, 1)
+        scope.get(cntr)
+        raised = []
+
+        def get():
+            try:
+                scope.get(cntr)
+            except ValueError, e:
+                raised.append(e)
+
+        thread = Thread(target=get)
+        thread.start()
+        thread.join(0.1)
+        self.assertTrue(thread.is_alive())
+
+        # test
+        scope.close()
+
+        # validation
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(raised), 1)
+
+    def test_get_closed(self):
+        cntr = ([], {})
+        scope = Pooled(Connection, 1)
+        scope.close()
+        self.assertRaises(ValueError, scope.get, cntr)
+        self.assertEqual(scope.created, {})
+
+    def test_get_failed(self):
+        cntr = ([], {})
+        owner = Mock(side_effect=ValueError)
+        scope = Pooled(owner, 1)
+        self.assertRaises(ValueError, scope.get, cntr)
+        self.assertEqual(scope.created, {key(cntr): 0})
+
+    def test_close(self):
+        cntr = ([], {})
+        scope = Pooled(Connection, 2)
+        idle = scope.get(cntr)
+        busy = scope.get(cntr)
+        scope.put(cntr, idle)
+
+        # test
+        scope.close()
+        self.assertTrue(idle.closed)
+        self.assertFalse(busy.closed)
+        scope.put(cntr, busy)
+
+        # validation
+        self.assertTrue(busy.closed)
+        self.assertTrue(scope.closed)
+        self.assertEqual(scope.idle, {})
+        self.assertEqual(scope.created, {})
@@ -0,0 +1,220 @@
+# Copyright (c) 2016 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU Lesser General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (LGPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of LGPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/lgpl-2.0.txt.
+
+from time import time
+from unittest import TestCase
+
+from mock import patch, Mock
+
+from gofer.rmi.context import Reporter
+from gofer.rmi.shell import Output, Shell, STDOUT, STDERR, TRUNCATED
+
+
+MODULE = 'gofer.rmi.shell'
+
+
+class TestOutput(TestCase):
+
+    def test_write(self):
+        output = Output(10)
+        output.write('hello')
+        output.write('world')
+        self.assertEqual(output.getvalue(), 'helloworld')
+        self.assertEqual(output.size, 10)
+        self.assertEqual(output.file, None)
+        self.assertFalse(output.truncated)
+
+    def test_spill(self):
+        output = Output(8)
+        output.write('hello')
+        output.write('world')
+        output.write('!')
+        try:
+            self.assertNotEqual(output.file, None)
+            self.assertEqual(output.buffer, [])
+            self.assertEqual(output.getvalue(), 'helloworld!')
+        finally:
+            output.close()
+        self.assertEqual(output.file, None)
+
+    def test_truncated(self):
+        output = Output(8, spill=False)
+        output.write('hello')
+        output.write('world')
+        output.write('!')
+        self.assertEqual(output.getvalue(), 'hellowor')
+        self.assertEqual(output.file, None)
+        self.assertTrue(output.truncated)
+        self.assertEqual(output.discarded, 3)
+
+    def test_spill_truncated(self):
+        output = Output(4, maximum=8)
+        output.write('hello')
+        output.write('world')
+        output.write('!')
+        try:
+            self.assertEqual(output.spilled, 8)
+            self.assertEqual(output.discarded, 3)
+            self.assertTrue(output.truncated)
+            self.assertEqual(output.getvalue(), 'hellowor' + TRUNCATED % 3)
+        finally:
+            output.close()
+
+
+class TestShell(TestCase):
+
+    def setUp(self):
+        self.context = Mock()
+        self.context.cancelled.return_value = False
+        self.context.cancelled.watch.side_effect = AttributeError
+        patcher = patch(MODULE + '.Context.current')
+        current = patcher.start()
+        current.return_value = self.context
+        self.addCleanup(patcher.stop)
+
+    def test_init(self):
+        shell = Shell(10, False, 20)
+        self.assertTrue(shell.progress_reported)
+        self.assertEqual(shell.limit, 10)
+        self.assertFalse(shell.spill)
+        self.assertEqual(shell.maximum, 20)
+
+    def test_run(self):
+        shell = Shell()
+
+        # test
+        status, result = shell.run('sh', '-c', 'echo hello; echo world >&2; exit 3')
+
+        # validation
+        self.assertEqual(status, 3)
+        self.assertEqual(result, {STDOUT: 'hello\n', STDERR: 'world\n'})
+        self.assertTrue(self.context.progress.report.called)
+
+    def test_run_partial_lines(self):
+        shell = Shell()
+
+        # test
+        status, result = shell.run('sh', '-c', 'printf abc; printf def >&2')
+
+        # validation
+        self.assertEqual(status, 0)
+        self.assertEqual(result, {STDOUT: 'abc', STDERR: 'def'})
+
+    def test_run_spilled(self):
+        shell = Shell(limit=100)
+
+        # test
+        status, result = shell.run('sh', '-c', 'seq 1 1000')
+
+        # validation
+        self.assertEqual(status, 0)
+        self.assertEqual(result[STDOUT].split(), [str(n) for n in range(1, 1001)])
+
+    def test_run_truncated(self):
+        shell = Shell(limit=100, spill=False)
+
+        # test
+        status, result = shell.run('sh', '-c', 'seq 1 1000')
+
+        # validation
+        self.assertEqual(status, 0)
+        self.assertEqual(len(result[STDOUT]), 100)
+
+    def test_run_spilled_truncated(self):
+        shell = Shell(limit=100, maximum=200)
+
+        # test
+        status, result = shell.run('sh', '-c', 'seq 1 1000')
+
+        # validation
+        self.assertEqual(status, 0)
+        self.assertTrue(result[STDOUT].endswith(TRUNCATED % (3893 - 200)))
+        self.assertEqual(len(result[STDOUT]), 200 + len(TRUNCATED % (3893 - 200)))
+
+    def test_run_chunks(self):
+        shell = Shell()
+
+        # test
+        shell.run('sh', '-c', 'echo hello; sleep 0.1; echo world')
+
+        # validation
+        reported = [c[0][0] for c in self.context.progress.report.call_args_list]
+        self.assertEqual(reported[0], {STDOUT: 'hello\n', STDERR: ''})
+        self.assertEqual(reported[-1], {STDOUT: 'world\n', STDERR: ''})
+
+    def test_run_coalesced(self):
+        sent = []
+
+        class Progress(Reporter):
+            def send(self):
+                sent.append(self.details[STDOUT])
+
+        self.context.progress = Progress(0.3)
+        shell = Shell()
+
+        # test
+        shell.run('sh', '-c', 'for n in 0 1 2 3 4 5 6 7; do echo l$n; sleep 0.1; done')
+        self.context.progress.flush()
+
+        # validation
+        self.assertTrue(len(sent) > 1)
+        self.assertEqual(''.join(sent), ''.join(['l%d\n' % n for n in range(8)]))
+
+    def test_run_not_reported(self):
+        shell = Shell()
+        shell.progress_reported = False
+
+        # test
+        status, result = shell.run('sh', '-c', 'echo hello')
+
+        # validation
+        self.assertEqual(result[STDOUT], 'hello\n')
+        self.assertFalse(self.context.progress.report.called)
+
+    def test_run_cancelled(self):
+        self.context.cancelled.side_effect = [False, True]
+        shell = Shell()
+
+        # test
+        started = time()
+        status, result = shell.run('sh', '-c', 'exec sleep 10')
+
+        # validation
+        self.assertTrue(time() - started < 5)
+        self.assertEqual(status, -15)
+
+    def test_run_watched(self):
+        watch = Mock()
+        watch.fileno.return_value = -1
+        self.context.cancelled.watch.side_effect = None
+        self.context.cancelled.watch.return_value = watch
+        shell = Shell()
+
+        # test
+        with patch(MODULE + '.select') as select:
+            select.side_effect = lambda r, w, x, t: (r, [], [])
+            status, result = shell.run('sh', '-c', 'echo hello')
+
+        # validation
+        args = select.call_args_list[0][0]
+        self.assertTrue(watch in args[0])
+        self.assertEqual(args[3], None)
+        watch.close.assert_called_once_with()
+        self.assertEqual(result[STDOUT], 'hello\n')
+
+    def test_run_not_found(self):
+        shell = Shell()
+
+        # test
+        status, result = shell.run('/no/such/command')
+
+        # validation
+        self.assertEqual(status, -1)
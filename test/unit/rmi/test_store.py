@@ -9,23 +9,21 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import os
+import shutil
+
+from tempfile import mkdtemp
+from threading import Thread
 from unittest import TestCase
+
 from mock import patch, Mock
 
-from gofer.rmi.store import Pending, Sequential
+from gofer.messaging import Document
+from gofer.rmi.store import Pending, Journal, Segment
 
 
 class TestPendingQueue(TestCase):
 
-    @patch('__builtin__.open')
-    def test_write(self, _open):
-        request = Mock()
-        path = '/tmp/123'
-        Pending._write(request, path)
-        _open.assert_called_once_with(path, 'w+')
-        _open.return_value.write.assert_called_once_with(request.dump.return_value)
-        _open.return_value.close.assert_called_once_with()
-
     @patch('__builtin__.open')
     @patch('gofer.rmi.store.unlink')
     def test_read(self, unlink, _open):
@@ -52,67 +50,409 @@ class TestPendingQueue(TestCase):
         unlink.assert_called_once_with(path)
         self.assertEqual(document, None)
 
-    @patch('gofer.rmi.store.unlink')
+    @patch('gofer.rmi.store.Journal')
+    @patch('gofer.rmi.store.Thread')
+    def test_put(self, thread, journal):
+        thread.aborted.return_value = False
+        request = Document(sn='123')
+        p = Pending('')
+        p.opened.set()
+        p.put(request)
+        journal.return_value.put.assert_called_once_with(request)
+        self.assertEqual(list(p.window), [request])
+        self.assertEqual(len(p.backlog), 0)
+        self.assertEqual(p.get(), request)
+
+    @patch('gofer.rmi.store.Pending.WINDOW', 1)
+    @patch('gofer.rmi.store.Journal')
+    @patch('gofer.rmi.store.Thread')
+    def test_put_spilled(self, thread, journal):
+        thread.aborted.return_value = False
+        requests = [Document(sn='1'), Document(sn='2'), Document(sn='3')]
+        journal.return_value.read.side_effect = [requests[1], None]
+        p = Pending('')
+        p.opened.set()
+        for request in requests:
+            p.put(request)
+        self.assertEqual(list(p.window), requests[:1])
+        self.assertEqual([sn for sn, ts in p.backlog], ['2', '3'])
+        self.assertEqual(p.get(), requests[0])
+        self.assertEqual(p.get(), requests[1])
+        self.assertEqual(p.backlog[0][0], '3')
+        # not found
+        self.assertEqual(p._next(), None)
+        self.assertEqual(len(p.backlog), 0)
+        self.assertEqual(
+            journal.return_value.read.call_args_list,
+            [(('2',), {}), (('3',), {})])
+
+    @patch('gofer.rmi.store.Journal')
     @patch('gofer.rmi.store.Thread', Mock())
-    def test_commit(self, unlink):
+    def test_commit(self, journal):
         sn = '123'
-        path = '/tmp/123'
         p = Pending('')
-        p.journal = {sn: path}
         p.commit(sn)
-        unlink.assert_called_once_with(path)
-        self.assertEqual(p.journal, {})
+        journal.return_value.commit.assert_called_once_with(sn)
 
+    @patch('gofer.rmi.store.Thread')
+    @patch('gofer.rmi.store.mkdir', Mock())
+    @patch('gofer.rmi.store.Journal')
     @patch('gofer.rmi.store.unlink')
-    @patch('gofer.rmi.store.Thread', Mock())
-    def test_commit_not_found(self, unlink):
-        sn = '123'
-        path = '/tmp/123'
+    @patch('gofer.rmi.store.Pending._read')
+    @patch('gofer.rmi.store.Pending._list')
+    def test_open(self, _list, _read, unlink, journal, thread):
+        thread.aborted.return_value = False
+        restored = [Document(sn='1'), Document(sn='2')]
+        legacy = Document(sn='3')
+        journal.return_value.replay.return_value = [(r.sn, None) for r in restored]
+        journal.return_value.read.side_effect = restored + [legacy]
+        _list.return_value = ['/tmp/3.json']
+        _read.return_value = legacy
         p = Pending('')
-        p.journal = {sn: path}
-        p.commit('invalid')
-        self.assertFalse(unlink.called)
-        self.assertEqual(p.journal, {sn: path})
+        p._open()
+        journal.return_value.open.assert_called_once_with()
+        journal.return_value.put.assert_called_once_with(legacy)
+        unlink.assert_called_once_with('/tmp/3.json')
+        self.assertTrue(p.opened.isSet())
+        self.assertEqual([p.get() for n in range(3)], restored + [legacy])
+
+    @patch('gofer.rmi.store.Journal')
+    @patch('gofer.rmi.store.Thread')
+    def test_restore(self, thread, journal):
+        thread.aborted.return_value = False
+        queued = [Document(sn='3'), Document(sn='4')]
+        restored = [Document(sn='1'), Document(sn='2')]
+        journal.return_value.read.side_effect = restored + queued
+        p = Pending('')
+        p.opened.set()
+        for request in queued:
+            p.put(request)
+        p._restore([(r.sn, None) for r in restored])
+        self.assertEqual(len(p.window), 0)
+        self.assertEqual([sn for sn, ts in p.backlog], ['1', '2', '3', '4'])
+        self.assertEqual([p.get() for n in range(4)], restored + queued)
+        self.assertEqual(
+            journal.return_value.read.call_args_list,
+            [((sn,), {}) for sn in ('1', '2', '3', '4')])
+
+    @patch('gofer.rmi.store.Journal')
+    @patch('gofer.rmi.store.Thread')
+    def test_next_read_unlocked(self, thread, journal):
+        thread.aborted.return_value = False
+        p = Pending('')
+        p.opened.set()
+        p._restore([('1', None)])
+
+        def read(sn):
+            # a put() is not blocked by the read
+            put = Thread(target=p.put, args=(Document(sn='2'),))
+            put.start()
+            put.join(5)
+            self.assertFalse(put.isAlive())
+            return Document(sn=sn)
+
+        journal.return_value.read.side_effect = read
+        request = p._next()
+        self.assertEqual(request.sn, '1')
+        self.assertEqual([sn for sn, ts in p.backlog], [])
+        self.assertEqual([r.sn for r in p.window], ['2'])
+
+    @patch('gofer.rmi.store.Journal')
+    @patch('gofer.rmi.store.Thread')
+    def test_adopt(self, thread, journal):
+        p = Pending('')
+        p.opened.set()
+        p.adopt('1')
+        p._restore([('1', None), ('2', None), ('3', None)])
+        p.adopt('3')
+        self.assertEqual([sn for sn, ts in p.backlog], ['2'])
+        self.assertEqual(p.adopted, set(['1', '3']))
+
+    @patch('gofer.rmi.store.Thread')
+    @patch('gofer.rmi.store.Journal')
+    def test_close(self, journal, thread):
+        p = Pending('s1')
+        p.opened.set()
+        p.put(Document(sn='1'))
+        p.close()
+        thread.return_value.abort.assert_called_once_with()
+        thread.return_value.join.assert_called_once_with()
+        journal.return_value.close.assert_called_once_with()
+        self.assertEqual(len(p.window), 0)
+
+    @patch('gofer.rmi.store.Journal.FSYNC_INTERVAL', 0.1)
+    def test_close_reopened(self):
+        root = mkdtemp()
+        try:
+            with patch.object(Pending, 'PENDING', root):
+                p = Pending('s1')
+                for sn in range(6):
+                    p.put(Document(sn=str(sn)))
+                for sn in range(5):
+                    p.commit(p.get().sn)
+                thread = p.journal.thread
+                p.close()
+                self.assertFalse(thread.isAlive())
+                p = Pending('s1')
+                p.thread.join(5)
+                try:
+                    self.assertEqual([sn for sn, ts in p.backlog], ['5'])
+                finally:
+                    p.close()
+        finally:
+            shutil.rmtree(root)
 
+    @patch('gofer.rmi.store.Thread')
+    @patch('gofer.rmi.store.rmdir')
+    @patch('gofer.rmi.store.Journal')
+    def test_delete(self, journal, rmdir, thread):
+        p = Pending('s1')
+        p.opened.set()
+        p.put(Document(sn='1'))
+        p.delete()
+        thread.return_value.abort.assert_called_once_with()
+        thread.return_value.join.assert_called_once_with()
+        journal.return_value.delete.assert_called_once_with()
+        rmdir.assert_called_once_with(os.path.join(Pending.PENDING, 's1'))
+        self.assertFalse(p.opened.isSet())
+        self.assertEqual(len(p.window), 0)
 
-class TestSequential(TestCase):
+
+class TestJournal(TestCase):
+
+    def setUp(self):
+        self.root = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_replay(self):
+        journal = Journal(self.root)
+        journal.open()
+        for sn in ('1', '2', '3'):
+            journal.put(Document(sn=sn))
+        journal.commit('2')
+        journal.close()
+
+        # test
+        journal = Journal(self.root)
+        journal.open()
+        restored = journal.replay()
+
+        # validation
+        self.assertEqual([sn for sn, data in restored], ['1', '3'])
+        self.assertEqual(sorted(journal.index), ['1', '3'])
+        self.assertEqual(len(journal.segments), 2)
+        self.assertEqual(journal.recovered, [])
+        self.assertEqual(journal.read('3').sn, '3')
+        self.assertEqual(journal.read('2'), None)
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_replay_concurrent_put(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1'))
+        journal.close()
+
+        # test
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='2'))
+        restored = journal.replay()
+
+        # validation
+        self.assertEqual([sn for sn, data in restored], ['1'])
+        self.assertEqual(sorted(journal.index), ['1', '2'])
+        self.assertEqual(journal.read('1').sn, '1')
+        self.assertEqual(journal.read('2').sn, '2')
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_read_relocated(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1', data=1))
+        journal.put(Document(sn='2', data=2))
+        journal.commit('1')
+        journal._roll()
+        journal.compact()
+        request = journal.read('2')
+        self.assertEqual(request.sn, '2')
+        self.assertEqual(request.data, 2)
+        self.assertEqual(journal.read('1'), None)
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_replay_truncated(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1'))
+        journal.close()
+        fp = open(journal.segments[0].path, 'a')
+        fp.write('+{"sn": "2"')
+        fp.close()
+
+        # test
+        journal = Journal(self.root)
+        journal.open()
+        restored = journal.replay()
+
+        # validation
+        self.assertEqual([sn for sn, data in restored], ['1'])
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_commit_not_found(self):
+        journal = Journal(self.root)
+        journal.open()
+        self.assertFalse(journal.commit('1'))
+        self.assertEqual(journal.written, 0)
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_compact(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1'))
+        journal.put(Document(sn='2'))
+        journal.put(Document(sn='3'))
+        journal.commit('1')
+        journal.commit('3')
+        journal._roll()
+
+        # test
+        journal.compact()
+
+        # validation
+        self.assertEqual(len(journal.segments), 1)
+        self.assertEqual(journal.index.keys(), ['2'])
+        self.assertEqual(journal.index['2'], journal.segments[0])
+        self.assertEqual(journal.segments[0].n, 1)
+        journal.close()
+        journal = Journal(self.root)
+        journal.open()
+        restored = journal.replay()
+        self.assertEqual([sn for sn, data in restored], ['2'])
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_compact_live(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1'))
+        journal.put(Document(sn='2'))
+        journal.put(Document(sn='3'))
+        journal.commit('1')
+        journal._roll()
+
+        # test
+        journal.compact()
+
+        # validation
+        self.assertEqual(len(journal.segments), 2)
+        self.assertEqual(journal.index['2'], journal.segments[0])
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_compact_referenced(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1'))
+        journal.put(Document(sn='2'))
+        journal.put(Document(sn='3'))
+        journal._roll()
+        journal.commit('1')
+        journal._roll()
+
+        # test
+        journal.compact()
+
+        # validation
+        self.assertEqual([s.n for s in journal.segments], [0, 1, 2])
+        self.assertEqual(journal.segments[1].refs, set([0]))
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_compact_relocated_referenced(self):
+        journal = Journal(self.root)
+        journal.open()
+        for sn in ('1', '2', '3'):
+            journal.put(Document(sn=sn))
+        journal._roll()
+        journal.commit('3')
+        for sn in ('4', '5', '6'):
+            journal.put(Document(sn=sn))
+        journal.commit('5')
+        journal.commit('6')
+        journal._roll()
+
+        # test
+        journal.compact()
+        journal._roll()
+        journal.commit('4')
+        journal._roll()
+        journal.compact()
+
+        # validation
+        self.assertEqual([s.n for s in journal.segments], [0, 1, 2, 3, 4])
+        self.assertEqual(journal.segments[2].refs, set([1]))
+        journal.close()
+        journal = Journal(self.root)
+        journal.open()
+        restored = journal.replay()
+        self.assertEqual([sn for sn, data in restored], ['1', '2'])
+        self.assertEqual(journal.segments[2].refs, set([1]))
+
+    @patch('gofer.rmi.store.Journal.SEGMENTS', 0)
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_compact_forced(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1'))
+        journal.put(Document(sn='2'))
+        journal.put(Document(sn='3'))
+        journal._roll()
+        journal.commit('1')
+        journal._roll()
+
+        # test
+        journal.compact()
+
+        # validation
+        self.assertEqual([s.n for s in journal.segments], [2])
+        self.assertEqual(sorted(journal.index), ['2', '3'])
+
+    @patch('gofer.rmi.store.Thread', Mock())
+    def test_delete(self):
+        journal = Journal(self.root)
+        journal.open()
+        journal.put(Document(sn='1'))
+        journal.delete()
+        self.assertEqual(journal.segments, [])
+        self.assertEqual(os.listdir(self.root), [])
+
+    def test_sync(self):
+        segment = Mock()
+        journal = Journal(self.root)
+        journal.segments = [segment]
+        journal.written = 3
+        journal.sync(2)
+        segment.sync.assert_called_once_with()
+        self.assertEqual(journal.synced, 3)
+        journal.sync(3)
+        segment.sync.assert_called_once_with()
+
+
+class TestSegment(TestCase):
 
     def test_init(self):
+        segment = Segment('/tmp', 12)
+        self.assertEqual(segment.n, 12)
+        self.assertEqual(segment.path, '/tmp/0000000012.jnl')
+        self.assertEqual(segment.live, {})
+        self.assertEqual(segment.written, 0)
+        self.assertEqual(segment.size, 0)
+        self.assertEqual(segment.fp, None)
 
-        s = Sequential()
-        self.assertEqual(s.n, 0)
-        self.assertEqual(s.last, 0.0)
-
-    @patch('gofer.rmi.store.time')
-    def test_next_time_stopped(self, time):
-        time.return_value = 3.14
-        s = Sequential()
-        values = [
-            s.next(),
-            s.next(),
-            s.next(),
-        ]
-        self.assertEqual(
-                values,
-                [
-                    '3-140000-0000.json',
-                    '3-140000-0001.json',
-                    '3-140000-0002.json'
-                ])
-
-    @patch('gofer.rmi.store.time')
-    def test_next_time_moving(self, time):
-        time.side_effect = [3.14, 3.15, 3.16]
-        s = Sequential()
-        values = [
-            s.next(),
-            s.next(),
-            s.next(),
-        ]
-        self.assertEqual(
-                values,
-                [
-                    '3-140000-0000.json',
-                    '3-150000-0000.json',
-                    '3-160000-0000.json'
-                ])
+    @patch('gofer.rmi.store.os.fsync')
+    def test_append(self, fsync):
+        segment = Segment('/tmp', 12)
+        segment.fp = Mock()
+        segment.append('+{}\n')
+        segment.fp.write.assert_called_once_with('+{}\n')
+        segment.fp.flush.assert_called_once_with()
+        self.assertEqual(segment.size, 4)
@@ -9,8 +9,229 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+from time import sleep
+from threading import Event, Timer
 from unittest import TestCase
 
+from mock import patch, Mock
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+from Queue import Empty
+
+from gofer.common import Thread
+from gofer.threadpool import ThreadPool, Queue, Call, Budget
+
+
+class TestQueue(TestCase):
+
+    def test_put_get(self):
+        queue = Queue()
+        calls = [Mock(), Mock()]
+        for call in calls:
+            queue.put(call)
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.get(), calls[0])
+        self.assertEqual(queue.get(), calls[1])
+        self.assertEqual(len(queue), 0)
+
+    def test_close(self):
+        queue = Queue()
+        queue.put(Mock())
+        queue.close()
+        self.assertTrue(queue.closed)
+        self.assertEqual(queue.get(), None)
+        self.assertEqual(len(queue.drain()), 1)
+
+    def test_get_timeout(self):
+        queue = Queue()
+        self.assertRaises(Empty, queue.get, 0.01)
+        self.assertEqual(queue.waiting, 0)
+
+    def test_saturated(self):
+        queue = Queue()
+        self.assertTrue(queue.saturated())
+        queue.waiting = 1
+        self.assertFalse(queue.saturated())
+        queue.put(Mock())
+        self.assertTrue(queue.saturated())
+
+    def test_drain(self):
+        queue = Queue()
+        calls = [Mock(), Mock()]
+        for call in calls:
+            queue.put(call)
+        self.assertEqual(queue.drain(), calls)
+        self.assertEqual(len(queue), 0)
+
+
+class TestBudget(TestCase):
+
+    def test_unlimited(self):
+        budget = Budget()
+        for n in range(10):
+            self.assertTrue(budget.acquire())
+        self.assertEqual(budget.used, 10)
+
+    def test_limit(self):
+        budget = Budget(2)
+        self.assertTrue(budget.acquire())
+        self.assertTrue(budget.acquire())
+        self.assertFalse(budget.acquire())
+        self.assertTrue(budget.acquire(True))
+        self.assertEqual(budget.used, 3)
+        budget.release(2)
+        self.assertEqual(budget.used, 1)
+        self.assertTrue(budget.acquire())
+
+
+class TestThreadPool(TestCase):
+
+    def test_budget(self):
+        budget = Budget(1)
+        with patch('gofer.threadpool.ThreadPool.budget', budget):
+            pool = ThreadPool(1, limit=3)
+            self.assertEqual(budget.used, 1)
+            pool._ThreadPool__grow()
+            self.assertEqual(len(pool), 1)
+            budget.limit = 2
+            pool._ThreadPool__grow()
+            self.assertEqual(len(pool), 2)
+            pool.shutdown()
+            self.assertEqual(budget.used, 0)
+
+    def test_run(self):
+        done = Event()
+        pool = ThreadPool(2)
+        try:
+            call_id = pool.run(done.set)
+            self.assertTrue(call_id is not None)
+            done.wait(10)
+            self.assertTrue(done.isSet())
+        finally:
+            pool.shutdown()
+
+    def test_no_head_of_line_blocking(self):
+        blocked = Event()
+        done = Event()
+        pool = ThreadPool(2)
+        try:
+            pool.run(blocked.wait, 10)
+            pool.run(done.set)
+            done.wait(10)
+            self.assertTrue(done.isSet())
+        finally:
+            blocked.set()
+            pool.shutdown()
+
+    def test_grow(self):
+        blocked = Event()
+        done = Event()
+        pool = ThreadPool(1, limit=2)
+        try:
+            pool.run(blocked.wait, 10)
+            pool.run(done.set)
+            done.wait(10)
+            self.assertTrue(done.isSet())
+            self.assertEqual(len(pool), 2)
+            self.assertEqual(pool.added.value, 2)
+        finally:
+            blocked.set()
+            pool.shutdown()
+
+    def test_grow_limit(self):
+        pool = ThreadPool(1, limit=1)
+        try:
+            pool.queue.put(Mock())
+            pool._ThreadPool__grow()
+            self.assertEqual(len(pool), 1)
+        finally:
+            pool.shutdown()
+
+    @patch('gofer.threadpool.ThreadPool.IDLE', 0.1)
+    def test_retire(self):
+        pool = ThreadPool(1, limit=2)
+        try:
+            pool._ThreadPool__grow()
+            self.assertEqual(len(pool), 2)
+            for n in range(50):
+                if len(pool) == 1:
+                    break
+                sleep(0.1)
+            self.assertEqual(len(pool), 1)
+            self.assertEqual(pool.retired.value, 1)
+        finally:
+            pool.shutdown()
+
+    @patch('gofer.threadpool.ThreadPool.IDLE', 0.1)
+    def test_retire_queued(self):
+        pool = ThreadPool(0, limit=1)
+        try:
+            pool._ThreadPool__grow()
+            worker = pool.threads[0]
+            pool.queue.put(Mock())
+            self.assertFalse(pool._ThreadPool__retire(worker))
+            self.assertEqual(pool.threads, [worker])
+        finally:
+            pool.shutdown()
+
+    def test_retired_while_queued(self):
+        done = Event()
+        pool = ThreadPool(0, limit=1)
+        try:
+            # the last worker retired after the grow decision
+            pool._ThreadPool__grow = Mock()
+            pool.run(done.set)
+            done.wait(10)
+            self.assertTrue(done.isSet())
+            self.assertEqual(pool.added.value, 1)
+        finally:
+            pool.shutdown()
+
+    def test_budget_exhausted(self):
+        done = Event()
+        budget = Budget(1)
+        budget.used = 1
+        with patch('gofer.threadpool.ThreadPool.budget', budget):
+            pool = ThreadPool(0, limit=4)
+            try:
+                pool.run(done.set)
+                done.wait(10)
+                self.assertTrue(done.isSet())
+                self.assertEqual(pool.added.value, 1)
+            finally:
+                pool.shutdown()
+
+    def test_replace(self):
+        pool = ThreadPool(1)
+        try:
+            worker = pool.threads[0]
+            thread = pool.replace(worker)
+            self.assertTrue(getattr(worker, Thread.ABORT).isSet())
+            self.assertEqual(pool.threads, [thread])
+            self.assertEqual(pool.replaced.value, 1)
+            # not in the pool
+            self.assertEqual(pool.replace(worker), None)
+            self.assertEqual(pool.replaced.value, 1)
+        finally:
+            pool.shutdown()
+
+    def test_shutdown(self):
+        blocked = Event()
+        started = Event()
+
+        def block():
+            started.set()
+            blocked.wait(10)
+
+        pool = ThreadPool(1)
+        threads = list(pool.threads)
+        pool.run(block)
+        started.wait(10)
+        orphan = Call(1, Mock())
+        pool.schedule(orphan)
+        Timer(0.1, blocked.set).start()
+        orphans = pool.shutdown()
+        self.assertEqual(orphans, [orphan])
+        self.assertFalse(orphan.fn.called)
+        for t in threads:
+            self.assertFalse(t.isAlive())
+        self.assertEqual(pool.threads, [])
\ No newline at end of file
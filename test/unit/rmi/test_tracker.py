@@ -9,8 +9,120 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+from select import select
 from unittest import TestCase
 
+from mock import patch, Mock
 
-class Test(TestCase):
-    pass
\ No newline at end of file
+from gofer.rmi.tracker import Tracker, Watch
+
+
+MODULE = 'gofer.rmi.tracker'
+
+
+def readable(watch):
+    return watch in select([watch], [], [], 0)[0]
+
+
+class Canceled(set):
+
+    def delete(self, sn):
+        self.discard(sn)
+
+
+class TestTracker(TestCase):
+
+    @patch(MODULE + '.Canceled', Canceled)
+    def tracker(self):
+        tracker = Tracker.__new__(Tracker)
+        tracker.__init__()
+        return tracker
+
+    def test_cancel(self):
+        tracker = self.tracker()
+        tracker.add('1', None)
+
+        # test
+        self.assertEqual(tracker.cancel('1'), '1')
+        self.assertEqual(tracker.cancel('1'), None)
+
+        # validation
+        self.assertTrue(tracker.cancelled('1'))
+        self.assertRaises(Exception, tracker.cancel, '2')
+
+    def test_watch(self):
+        tracker = self.tracker()
+        tracker.add('1', None)
+        tracker.add('2', None)
+
+        # test
+        watch = tracker.watch('1')
+        other = tracker.watch('2')
+        try:
+            self.assertFalse(readable(watch))
+            tracker.cancel('1')
+
+            # validation
+            self.assertTrue(readable(watch))
+            self.assertFalse(readable(other))
+        finally:
+            watch.close()
+            other.close()
+
+    def test_watch_cancelled(self):
+        tracker = self.tracker()
+        tracker.add('1', None)
+        tracker.cancel('1')
+
+        # test
+        watch = tracker.watch('1')
+        try:
+            # validation
+            self.assertTrue(readable(watch))
+        finally:
+            watch.close()
+
+    def test_unwatch(self):
+        tracker = self.tracker()
+        tracker.add('1', None)
+        watch = tracker.watch('1')
+
+        # test
+        watch.close()
+
+        # validation
+        self.assertEqual(tracker._Tracker__watched, {})
+        tracker.cancel('1')
+
+
+class TestWatch(TestCase):
+
+    @patch(MODULE + '.os')
+    def test_init(self, os):
+        tracker = Mock()
+        watch = Watch(tracker, '1')
+        self.assertEqual(watch.tracker, tracker)
+        self.assertEqual(watch.sn, '1')
+        self.assertEqual(watch.pipe, os.pipe.return_value)
+
+    def test_signal(self):
+        watch = Watch(Mock(), '1')
+        try:
+            self.assertFalse(readable(watch))
+            watch.signal()
+            self.assertTrue(readable(watch))
+        finally:
+            watch.close()
+
+    @patch(MODULE + '.os')
+    def test_close(self, os):
+        os.pipe.return_value = (1, 2)
+        tracker = Mock()
+        watch = Watch(tracker, '1')
+
+        # test
+        watch.close()
+
+        # validation
+        tracker.unwatch.assert_called_once_with(watch)
+        self.assertEqual(os.close.call_count, 2)
@@ -13,10 +13,10 @@ from unittest import TestCase
 
 from mock import patch, Mock
 
-from gofer import NAME
-from gofer.decorators import options, remote, pam, user, action
-from gofer.decorators import load, unload, initializer
-from gofer.decorators import DIRECT
+from gofer import NAME, Options
+from gofer.decorators import options, remote, scope, pam, user, action
+from gofer.decorators import load, unload, initializer, resource
+from gofer.decorators import DIRECT, SINGLETON, POOLED
 
 
 class Function(object):
@@ -80,6 +80,86 @@ class TestRemote(TestCase):
                 }))
         _remote.add.assert_called_once_with(fn)
 
+    @patch('gofer.decorators.Remote')
+    def test_timeout(self, _remote):
+        def fn(): pass
+        remote(timeout=10)(fn)
+        opt = getattr(fn, NAME)
+        self.assertEqual(opt.call.timeout, 10)
+        _remote.add.assert_called_once_with(fn)
+
+    @patch('gofer.decorators.Remote', Mock())
+    def test_invalid_timeout(self):
+        def fn(): pass
+        self.assertRaises(ValueError, remote(timeout=0), fn)
+        self.assertRaises(ValueError, remote(timeout='10'), fn)
+
+
+    @patch('gofer.decorators.Remote')
+    def test_scope(self, _remote):
+        def fn(): pass
+        remote(scope=POOLED, size=3)(fn)
+        opt = getattr(fn, NAME)
+        self.assertEqual(opt.call.scope.name, POOLED)
+        self.assertEqual(opt.call.scope.size, 3)
+        _remote.add.assert_called_once_with(fn)
+
+    @patch('gofer.decorators.Remote', Mock())
+    def test_invalid_scope(self):
+        def fn(): pass
+        self.assertRaises(ValueError, remote(scope='session'), fn)
+        self.assertRaises(ValueError, remote(scope=POOLED, size=0), fn)
+
+    def test_size_without_scope(self):
+        self.assertRaises(ValueError, remote, size=3)
+
+
+class TestScope(TestCase):
+
+    def test_call(self):
+        class Dog(object):
+            pass
+        decorated = scope(SINGLETON)(Dog)
+        opt = getattr(Dog, NAME)
+        self.assertEqual(decorated, Dog)
+        self.assertEqual(opt.scope.name, SINGLETON)
+        self.assertEqual(opt.scope.size, 1)
+
+    def test_merged(self):
+        class Dog(object):
+            pass
+        Dog.gofer = Options(name='dog')
+        opt = Dog.gofer
+
+        # test
+        scope(POOLED, size=3)(Dog)
+
+        # validation
+        self.assertTrue(getattr(Dog, NAME) is opt)
+        self.assertEqual(opt.name, 'dog')
+        self.assertEqual(opt.scope.name, POOLED)
+        self.assertEqual(opt.scope.size, 3)
+
+    def test_inherited(self):
+        class Animal(object):
+            pass
+
+        class Dog(Animal):
+            pass
+
+        scope(SINGLETON)(Animal)
+
+        # test
+        scope(POOLED)(Dog)
+
+        # validation
+        self.assertEqual(getattr(Animal, NAME).scope.name, SINGLETON)
+        self.assertEqual(getattr(Dog, NAME).scope.name, POOLED)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, scope, 'session')
+        self.assertRaises(ValueError, scope, POOLED, size=0)
+
 
 class TestPam(TestCase):
 
@@ -164,3 +244,26 @@ class TestDelegate(TestCase):
         delegate.unload = Mock()
         unload(fn)
         delegate.unload.append.assert_called_once_with(fn)
+
+
+class TestResource(TestCase):
+
+    @patch('gofer.decorators.Delegate')
+    @patch('gofer.decorators.ResourcePool')
+    def test_call(self, pool, delegate):
+        def fn(): pass
+        validate = Mock()
+        delegate.unload = []
+        decorated = resource(limit=3, idle=10, validate=validate)(fn)
+        pool.assert_called_once_with(fn, limit=3, idle=10, validate=validate)
+        self.assertEqual(decorated, pool.return_value)
+        self.assertEqual(delegate.unload, [pool.return_value.close])
+
+    @patch('gofer.decorators.Delegate')
+    @patch('gofer.decorators.ResourcePool')
+    def test_no_params(self, pool, delegate):
+        def fn(): pass
+        delegate.unload = []
+        decorated = resource(fn)
+        pool.assert_called_once_with(fn, limit=1, idle=300, validate=None)
+        self.assertEqual(decorated, pool.return_value)
@@ -14,7 +14,7 @@ from datetime import datetime
 
 from mock import patch
 
-from gofer.metrics import Timer, timestamp
+from gofer.metrics import Timer, Counter, timestamp
 
 
 class TestUtils(TestCase):
@@ -94,4 +94,13 @@ class TestTimer(TestCase):
         # minutes
         t.started = 10.0
         t.stopped = 100.0
-        self.assertEqual(str(t), '1.500 (minutes)')
\ No newline at end of file
+        self.assertEqual(str(t), '1.500 (minutes)')
+
+class TestCounter(TestCase):
+
+    def test_increment(self):
+        counter = Counter()
+        self.assertEqual(counter.value, 0)
+        self.assertEqual(counter.increment(), 1)
+        self.assertEqual(counter.increment(3), 4)
+        self.assertEqual(counter.value, 4)
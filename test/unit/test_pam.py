@@ -18,6 +18,12 @@ from gofer import pam
 
 class Test(TestCase):
 
+    def setUp(self):
+        pam.Cache().flush()
+
+    def tearDown(self):
+        pam.Cache().flush()
+
     @patch('gofer.pam.Lib')
     def test_authenticated(self, lib):
         lib.pam_start.return_value = 0
@@ -73,3 +79,109 @@ class Test(TestCase):
         self.assertTrue(lib.pam_authenticate.called)
         self.assertFalse(lib.pam_end.called)
         self.assertFalse(valid)
+
+    @patch('gofer.pam.Lib')
+    def test_cached(self, lib):
+        lib.pam_start.return_value = 0
+        lib.pam_authenticate.return_value = 0
+        self.assertTrue(pam.authenticate('user', 'password', 'login'))
+        self.assertTrue(pam.authenticate('user', 'password', 'login'))
+        self.assertEqual(lib.pam_authenticate.call_count, 1)
+        # different password
+        lib.pam_authenticate.return_value = 1
+        self.assertFalse(pam.authenticate('user', 'other', 'login'))
+        self.assertEqual(lib.pam_authenticate.call_count, 2)
+
+    @patch('gofer.pam.Lib')
+    def test_exception_not_cached(self, lib):
+        lib.pam_start.return_value = 0
+        lib.pam_authenticate.side_effect = ValueError
+        pam.authenticate('user', 'password', 'login')
+        self.assertEqual(pam.Cache().entries, {})
+
+
+class TestCache(TestCase):
+
+    def setUp(self):
+        pam.Cache().flush()
+
+    def tearDown(self):
+        pam.Cache().flush()
+
+    def test_singleton(self):
+        self.assertEqual(pam.Cache(), pam.Cache())
+
+    def test_key(self):
+        cache = pam.Cache()
+        key = cache.key('user', 'password', 'login')
+        self.assertEqual(key[:2], ('user', 'login'))
+        self.assertFalse('password' in key[2])
+        self.assertEqual(key, cache.key('user', u'password', 'login'))
+        self.assertNotEqual(key, cache.key('user', 'other', 'login'))
+
+    @patch('gofer.pam.time')
+    def test_get(self, time):
+        time.return_value = 100
+        cache = pam.Cache()
+        cache.put('user', 'password', 'login', True)
+        cache.put('user', 'wrong', 'login', False)
+        # cached
+        time.return_value = 100 + pam.Cache.NEGATIVE_TTL - 1
+        self.assertTrue(cache.get('user', 'password', 'login'))
+        self.assertFalse(cache.get('user', 'wrong', 'login'))
+        self.assertEqual(cache.get('user', 'password', 'other'), None)
+        # negative expired
+        time.return_value = 100 + pam.Cache.NEGATIVE_TTL
+        self.assertEqual(cache.get('user', 'wrong', 'login'), None)
+        self.assertTrue(cache.get('user', 'password', 'login'))
+        # expired
+        time.return_value = 100 + pam.Cache.TTL
+        self.assertEqual(cache.get('user', 'password', 'login'), None)
+        self.assertEqual(len(cache.entries), 0)
+
+    @patch('gofer.pam.Cache.LIMIT', 2)
+    def test_put_bounded(self):
+        cache = pam.Cache()
+        cache.put('a', 'password', 'login', True)
+        cache.put('b', 'password', 'login', True)
+        cache.put('c', 'password', 'login', True)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertEqual(cache.get('a', 'password', 'login'), None)
+        self.assertTrue(cache.get('c', 'password', 'login'))
+
+    @patch('gofer.pam.Cache.LIMIT', 2)
+    def test_put_replaced(self):
+        cache = pam.Cache()
+        cache.put('a', 'password', 'login', True)
+        cache.put('b', 'password', 'login', True)
+        cache.put('a', 'password', 'login', True)
+        cache.put('c', 'password', 'login', True)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertEqual(cache.get('b', 'password', 'login'), None)
+        self.assertTrue(cache.get('a', 'password', 'login'))
+        self.assertTrue(cache.get('c', 'password', 'login'))
+
+    @patch('gofer.pam.Cache.LIMIT', 2)
+    def test_put_compacted(self):
+        cache = pam.Cache()
+        cache.put('a', 'password', 'login', True)
+        for n in range(10):
+            cache.put('b', 'password', 'login', True)
+        self.assertTrue(len(cache.order) <= 4)
+        cache.put('c', 'password', 'login', True)
+        self.assertEqual(cache.get('a', 'password', 'login'), None)
+        self.assertTrue(cache.get('b', 'password', 'login'))
+        self.assertTrue(cache.get('c', 'password', 'login'))
+
+    @patch('gofer.pam.Cache.NEGATIVE_TTL', 0)
+    def test_put_disabled(self):
+        cache = pam.Cache()
+        cache.put('user', 'password', 'login', False)
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_flush(self):
+        cache = pam.Cache()
+        cache.put('user', 'password', 'login', True)
+        self.assertEqual(cache.flush(), 1)
+        self.assertEqual(len(cache.entries), 0)
+        self.assertEqual(len(cache.order), 0)
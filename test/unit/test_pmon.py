@@ -9,8 +9,433 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
+import os
+import shutil
+
+from tempfile import mkdtemp
+from threading import Event
 from unittest import TestCase
 
+from mock import patch, Mock
+
+from gofer.pmon import IN_CREATE, IN_Q_OVERFLOW
+from gofer.pmon import status, index
+from gofer.pmon import Notifier, ChangeSet, Tracker, Tree, PathMonitor
+
+
+MODULE = 'gofer.pmon'
+
+
+class TestUtils(TestCase):
+
+    def setUp(self):
+        self.root = mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_status(self):
+        path = os.path.join(self.root, 'a')
+        with open(path, 'w') as fp:
+            fp.write('hello')
+        st = os.stat(path)
+        self.assertEqual(status(path), (st.st_ino, 5, st.st_mtime))
+        # directory
+        st = os.stat(self.root)
+        self.assertEqual(status(self.root), (st.st_ino, 0, 0))
+        # not found
+        self.assertEqual(status(os.path.join(self.root, 'none')), None)
+
+    def test_index(self):
+        a = os.path.join(self.root, 'a')
+        b = os.path.join(a, 'b')
+        os.makedirs(a)
+        open(b, 'w').close()
+        link = os.path.join(self.root, 'link')
+        os.symlink(a, link)
+
+        # test
+        entries, directories = index(self.root)
+
+        # validation
+        self.assertEqual(sorted(entries), [a, b, link])
+        self.assertEqual(directories, set([a]))
+
+
+class TestChangeSet(TestCase):
+
+    def test_diff(self):
+        before = {
+            'a': (1, 1, 1),
+            'b': (2, 1, 1),
+            'c': (3, 1, 1),
+        }
+        after = {
+            'a': (1, 1, 1),
+            'b': (2, 2, 2),
+            'd': (4, 1, 1),
+        }
+
+        # test
+        changes = ChangeSet.diff(before, after)
+
+        # validation
+        self.assertEqual(changes.added, ['d'])
+        self.assertEqual(changes.modified, ['b'])
+        self.assertEqual(changes.removed, ['c'])
+        self.assertEqual(len(changes), 3)
+        self.assertEqual(str(changes), 'added:1, modified:1, removed:1')
+
+    def test_empty(self):
+        changes = ChangeSet.diff({}, {})
+        self.assertFalse(changes)
+
+
+class TestNotifier(TestCase):
+
+    def setUp(self):
+        self.root = mkdtemp()
+        self.notifier = Notifier()
+
+    def tearDown(self):
+        self.notifier.close()
+        shutil.rmtree(self.root)
+
+    def test_watch(self):
+        self.notifier.watch(self.root)
+        wd = self.notifier.watches[self.root]
+        self.assertEqual(self.notifier.directories[wd], self.root)
+        # again
+        self.notifier.watch(self.root)
+        self.assertEqual(self.notifier.watches[self.root], wd)
+
+    def test_watch_not_found(self):
+        path = os.path.join(self.root, 'none')
+        self.assertRaises(OSError, self.notifier.watch, path)
+
+    def test_unwatch(self):
+        self.notifier.watch(self.root)
+        self.notifier.unwatch(self.root)
+        self.assertEqual(self.notifier.watches, {})
+        self.assertEqual(self.notifier.directories, {})
+        # not watched
+        self.notifier.unwatch(self.root)
+
+    def test_read(self):
+        self.notifier.watch(self.root)
+        open(os.path.join(self.root, 'a'), 'w').close()
+
+        # test
+        events = self.notifier.read()
+
+        # validation
+        directory, name, mask = events[0]
+        self.assertEqual(directory, self.root)
+        self.assertEqual(name, 'a')
+        self.assertTrue(mask & IN_CREATE)
+
+    def test_read_nothing(self):
+        self.assertEqual(self.notifier.read(), [])
+
+
+class TestTracker(TestCase):
+
+    def test_call(self):
+        target = Mock()
+        tracker = Tracker('/tmp/none', target)
+
+        # test
+        tracker(18, 'ABC')
+
+        # validation
+        target.assert_called_once_with(tracker.path)
+        self.assertEqual(tracker.last_modified, 18)
+        self.assertEqual(tracker.digest, 'ABC')
+        self.assertFalse(tracker.watched)
+
+
+class TestTree(TestCase):
+
+    def setUp(self):
+        self.root = mkdtemp()
+        self.a = os.path.join(self.root, 'a')
+        self.b = os.path.join(self.a, 'b')
+        os.makedirs(self.a)
+        with open(self.b, 'w') as fp:
+            fp.write('1')
+        self.target = Mock()
+        self.tree = Tree(self.root, self.target)
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def changes(self):
+        changes = self.target.call_args[0][1]
+        return changes.added, changes.modified, changes.removed
+
+    def test_init(self):
+        self.assertEqual(sorted(self.tree.index), [self.a, self.b])
+        self.assertEqual(self.tree.dirs, set([self.a]))
+        self.assertFalse(self.tree.watched)
+
+    def test_directories(self):
+        self.assertEqual(
+            self.tree.directories(),
+            [os.path.dirname(self.root), self.root, self.a])
+
+    def test_affected(self):
+        self.assertTrue(self.tree.affected(self.root, os.path.dirname(self.root)))
+        self.assertTrue(self.tree.affected(self.b, self.a))
+        self.assertFalse(self.tree.affected(self.root + 'x', os.path.dirname(self.root)))
+
+    def test_sniff(self):
+        c = os.path.join(self.root, 'c')
+        open(c, 'w').close()
+        with open(self.b, 'w') as fp:
+            fp.write('22')
+
+        # test
+        self.tree.sniff()
+
+        # validation
+        self.target.assert_called_once_with(self.root, self.target.call_args[0][1])
+        self.assertEqual(self.changes(), ([c], [self.b], []))
+        self.assertTrue(c in self.tree.index)
+
+    def test_sniff_unchanged(self):
+        self.tree.sniff()
+        self.tree.sniff(set([self.b]))
+        self.assertFalse(self.target.called)
+
+    def test_sniff_paths(self):
+        c = os.path.join(self.root, 'c')
+        d = os.path.join(self.root, 'd')
+        open(c, 'w').close()
+        open(d, 'w').close()
+
+        # test
+        self.tree.sniff(set([c]))
+
+        # validation
+        self.assertEqual(self.changes(), ([c], [], []))
+        self.assertFalse(d in self.tree.index)
+
+    def test_sniff_directory_added(self):
+        c = os.path.join(self.root, 'c')
+        d = os.path.join(c, 'd')
+        os.makedirs(c)
+        open(d, 'w').close()
+
+        # test
+        self.tree.sniff(set([c]))
+
+        # validation
+        self.assertEqual(self.changes(), ([c, d], [], []))
+        self.assertTrue(c in self.tree.dirs)
+
+    def test_sniff_directory_removed(self):
+        shutil.rmtree(self.a)
+
+        # test
+        self.tree.sniff(set([self.a, self.b]))
+
+        # validation
+        self.assertEqual(self.changes(), ([], [], [self.a, self.b]))
+        self.assertEqual(self.tree.index, {})
+        self.assertEqual(self.tree.dirs, set())
+
+    def test_sniff_directory_replaced(self):
+        shutil.rmtree(self.a)
+        open(self.a, 'w').close()
+
+        # test
+        self.tree.sniff(set([self.a]))
+
+        # validation
+        self.assertEqual(self.changes(), ([self.a], [], [self.a, self.b]))
+        self.assertEqual(self.tree.dirs, set())
+
+    def test_watching(self):
+        c = os.path.join(self.a, 'c')
+        open(c, 'w').close()
+
+        # test
+        self.tree.watching([self.a, os.path.dirname(self.root)])
+
+        # validation
+        self.assertEqual(self.changes(), ([c], [], []))
+
+    def test_call_raised(self):
+        self.target.side_effect = ValueError
+        self.tree(ChangeSet())
+
 
 class TestMonitor(TestCase):
-    pass
\ No newline at end of file
+
+    def setUp(self):
+        self.root = mkdtemp()
+        self.path = os.path.join(self.root, 'a.conf')
+        with open(self.path, 'w') as fp:
+            fp.write('1')
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_add(self):
+        target = Mock()
+        monitor = PathMonitor()
+
+        # test
+        monitor.add(self.path, target)
+        monitor.add(self.root, target)
+
+        # validation
+        tracker = Tracker(self.path, target)
+        self.assertEqual(len(monitor.paths()), 2)
+        self.assertTrue(all(t.watched for t in monitor.paths()))
+        self.assertTrue(tracker in monitor._watched[self.root])
+        self.assertTrue(self.root in monitor._notifier.watches)
+        self.assertTrue(os.path.dirname(self.root) in monitor._notifier.watches)
+
+    def test_add_not_watched(self):
+        path = os.path.join(self.root, 'none', 'a.conf')
+        monitor = PathMonitor()
+
+        # test
+        monitor.add(path, Mock())
+
+        # validation
+        self.assertFalse(monitor.paths()[0].watched)
+
+    @patch(MODULE + '.Notifier')
+    def test_not_supported(self, notifier):
+        notifier.side_effect = OSError
+        monitor = PathMonitor()
+
+        # test
+        monitor.add(self.path, Mock())
+
+        # validation
+        self.assertEqual(monitor._notifier, None)
+        self.assertFalse(monitor.paths()[0].watched)
+
+    def test_delete(self):
+        target = Mock()
+        monitor = PathMonitor()
+        monitor.add(self.path, target)
+        monitor.add(self.root, target)
+
+        # test
+        monitor.delete(self.path, target)
+
+        # validation
+        self.assertEqual(len(monitor.paths()), 1)
+        self.assertTrue(self.root in monitor._notifier.watches)
+        monitor.delete(self.root, target)
+        self.assertEqual(monitor.paths(), [])
+        self.assertEqual(monitor._watched, {})
+        self.assertEqual(monitor._notifier.watches, {})
+
+    def test_changed(self):
+        target = Mock()
+        monitor = PathMonitor()
+        monitor.add(self.path, target)
+        monitor.add(self.root, target)
+        tracker = Tracker(self.path, target)
+        directory = Tracker(self.root, target)
+        events = [
+            (self.root, 'a.conf', IN_CREATE),
+            (self.root, 'b.conf', IN_CREATE),
+        ]
+
+        # test
+        changed = monitor._changed(events)
+
+        # validation
+        self.assertEqual(
+            changed,
+            {
+                tracker: set([self.path]),
+                directory: set([self.path, os.path.join(self.root, 'b.conf')]),
+            })
+        # sibling
+        events = [(os.path.dirname(self.root), 'other', IN_CREATE)]
+        self.assertEqual(monitor._changed(events), {})
+        # overflow
+        events = [(None, '', IN_Q_OVERFLOW)]
+        self.assertEqual(monitor._changed(events), {tracker: None, directory: None})
+
+    def test_notified(self):
+        changed = Event()
+        monitor = PathMonitor(precision=10)
+        monitor.add(self.path, lambda p: changed.set())
+        monitor.start()
+        try:
+            # replaced
+            path = self.path + '.tmp'
+            with open(path, 'w') as fp:
+                fp.write('2')
+            os.rename(path, self.path)
+            changed.wait(5)
+            self.assertTrue(changed.isSet())
+        finally:
+            monitor.shutdown()
+
+    def test_recursive(self):
+        target = Mock()
+        monitor = PathMonitor()
+        a = os.path.join(self.root, 'a')
+        os.makedirs(a)
+
+        # test
+        monitor.add(self.root, target, recursive=True)
+        monitor.add(self.root, target)
+
+        # validation
+        self.assertEqual(len(monitor.paths()), 2)
+        self.assertTrue(a in monitor._notifier.watches)
+        events = [(a, 'b', IN_CREATE)]
+        changed = monitor._changed(events)
+        self.assertEqual(changed, {Tree(self.root, target): set([os.path.join(a, 'b')])})
+        monitor.delete(self.root, target)
+        self.assertEqual(monitor.paths(), [])
+        self.assertEqual(monitor._notifier.watches, {})
+
+    def test_recursive_notified(self):
+        found = []
+        changed = Event()
+
+        def target(path, changes):
+            found.extend(changes.added)
+            changed.set()
+
+        a = os.path.join(self.root, 'a')
+        b = os.path.join(a, 'b')
+        monitor = PathMonitor(precision=10)
+        monitor.add(self.root, target, recursive=True)
+        monitor.start()
+        try:
+            os.makedirs(a)
+            open(b, 'w').close()
+            for n in range(50):
+                changed.wait(0.1)
+                if b in found:
+                    break
+            self.assertTrue(a in found)
+            self.assertTrue(b in found)
+        finally:
+            monitor.shutdown()
+
+    def test_polled(self):
+        changed = Event()
+        monitor = PathMonitor(precision=0.1, inotify=False)
+        monitor.add(self.path, lambda p: changed.set())
+        monitor.start()
+        try:
+            with open(self.path, 'w') as fp:
+                fp.write('22')
+            os.utime(self.path, (0, 0))
+            changed.wait(5)
+            self.assertTrue(changed.isSet())
+        finally:
+            monitor.shutdown()